@@ -0,0 +1,168 @@
+"""Compare the single-process host with one process per node.
+
+For both set-ups this starts the chosen course nodes plus the ping/pong
+latency probe and measures:
+
+    * startup time  -> from starting the processes until every node is
+                       visible in the ROS graph
+    * memory        -> summed resident set size (RSS) of all started
+                       processes and their children
+    * latency       -> ping/pong round-trip time (median / p95 / max)
+
+Usage (with the workspace sourced, nothing else running on the domain):
+    ros2 run host_pkg compare
+    ros2 run host_pkg compare --nodes subpub lidar --samples 200
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import time
+
+import rclpy
+from rclpy.node import Node
+from std_msgs.msg import Float64
+
+from host_pkg.host import COURSE_NODES, NODES
+
+
+def commands(mode, names):
+    """Return the command lines that start `names` in the given mode."""
+    if mode == 'single':
+        return [['ros2', 'run', 'host_pkg', 'host', '--nodes'] + names]
+    cmds = []
+    for name in names:
+        package, executable = NODES[name][:2]
+        if package == 'host_pkg':
+            cmds.append(['ros2', 'run', 'host_pkg', 'host', '--nodes', name])
+        else:
+            cmds.append(['ros2', 'run', package, executable])
+    return cmds
+
+
+def descendants(pid):
+    """Return pid and the pids of all its children (ros2 run forks python)."""
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/%s/stat' % entry) as f:
+                # the command name may contain spaces, the ppid follows the last ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    result, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        result.append(p)
+        todo.extend(parents.get(p, []))
+    return result
+
+
+def rss_kb(pid):
+    try:
+        with open('/proc/%d/status' % pid) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class Observer(Node):
+    """Watches the graph and collects the round-trip times of the probe."""
+
+    def __init__(self):
+        super().__init__('host_compare')
+        self.rtts = []
+        self.create_subscription(
+            Float64, 'host_probe/rtt', lambda msg: self.rtts.append(msg.data), 100)
+
+    def visible(self, names):
+        return set(names) <= set(self.get_node_names())
+
+    def wait_gone(self, names, timeout):
+        """Spin until none of `names` is left in the graph."""
+        end = time.monotonic() + timeout
+        while set(names) & set(self.get_node_names()) and time.monotonic() < end:
+            rclpy.spin_once(self, timeout_sec=0.1)
+
+
+def measure(observer, mode, names, samples, timeout):
+    expected = names + ['ping', 'pong']
+    observer.rtts.clear()
+    t0 = time.monotonic()
+    procs = [subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              start_new_session=True)
+             for cmd in commands(mode, expected)]
+    try:
+        startup = None
+        while time.monotonic() - t0 < timeout:
+            rclpy.spin_once(observer, timeout_sec=0.05)
+            if observer.visible(expected):
+                startup = time.monotonic() - t0
+                break
+        # let the processes settle, then collect the latency samples
+        observer.rtts.clear()
+        t1 = time.monotonic()
+        while len(observer.rtts) < samples and time.monotonic() - t1 < timeout:
+            rclpy.spin_once(observer, timeout_sec=0.05)
+        rss = sum(rss_kb(p) for proc in procs for p in descendants(proc.pid))
+        rtts = sorted(observer.rtts)
+    finally:
+        for proc in procs:
+            os.killpg(proc.pid, signal.SIGINT)
+        for proc in procs:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+    return {
+        'mode': mode,
+        'processes': len(procs),
+        'startup_s': startup,
+        'rss_mb': rss / 1024.0,
+        'rtt_ms': ([rtts[int(q * (len(rtts) - 1))] * 1e3 for q in (0.5, 0.95, 1.0)]
+                   if rtts else None),
+        'samples': len(rtts),
+    }
+
+
+def print_table(results):
+    print('%-9s %6s %10s %9s %26s' % (
+        'mode', 'procs', 'startup s', 'RSS MB', 'rtt ms median/p95/max'))
+    for r in results:
+        startup = '%.2f' % r['startup_s'] if r['startup_s'] is not None else 'timeout'
+        rtt = '%.2f / %.2f / %.2f' % tuple(r['rtt_ms']) if r['rtt_ms'] else 'no samples'
+        print('%-9s %6d %10s %9.1f %26s' % (r['mode'], r['processes'], startup, r['rss_mb'], rtt))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Compare the node host with separate processes.')
+    parser.add_argument('--nodes', nargs='+', default=COURSE_NODES, choices=COURSE_NODES)
+    parser.add_argument('--samples', type=int, default=100, help='round-trip samples per mode')
+    parser.add_argument('--timeout', type=float, default=30.0, help='seconds per phase')
+    options = parser.parse_args(args)
+
+    rclpy.init()
+    observer = Observer()
+    try:
+        results = []
+        for mode in ('separate', 'single'):
+            print('measuring %s ...' % mode)
+            results.append(
+                measure(observer, mode, options.nodes, options.samples, options.timeout))
+            # the next mode reuses the node names, so wait until discovery has forgotten them
+            observer.wait_gone(options.nodes + ['ping', 'pong'], options.timeout)
+        print_table(results)
+    finally:
+        observer.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
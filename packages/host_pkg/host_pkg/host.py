@@ -0,0 +1,98 @@
+"""Run any subset of the course nodes in a single process.
+
+Normally every course package is started on its own (``ros2 run
+publisher_pkg simple_publisher``, ``ros2 run lidar_pkg lidar``, ...), so every
+node pays for its own Python interpreter, its own ``rclpy.init`` and its own
+DDS participant. Here the chosen nodes share one rclpy context (one DDS
+participant, so far less discovery traffic on the Pi) and are spun together on
+one MultiThreadedExecutor.
+
+rclpy has no intra-process transport (that only exists in rclcpp), so messages
+between nodes in this process still go through the RMW layer. Because they
+share one participant the middleware can still deliver them locally, without
+going over the network.
+
+Usage:
+    ros2 run host_pkg host --nodes simple_publisher subpub lidar
+    ros2 run host_pkg host --nodes all --threads 2
+"""
+
+import argparse
+import importlib
+
+import rclpy
+from rclpy.executors import ExternalShutdownException, MultiThreadedExecutor
+from rclpy.utilities import remove_ros_args
+
+
+# node name -> (ROS package, executable, python module, class name)
+# The ROS package and executable are only used by the compare tool to start
+# the same node as a separate process.
+NODES = {
+    'simple_publisher': ('publisher_pkg', 'simple_publisher',
+                         'publisher_pkg.simple_publisher', 'SimplePublisher'),
+    'simple_subscriber': ('subscriber_pkg', 'simple_subscriber',
+                          'subscriber_pkg.simple_subscriber', 'SimpleSubscriber'),
+    'subpub': ('subpub_pkg', 'subpub', 'subpub_pkg.subpub', 'Subpub'),
+    'lidar': ('lidar_pkg', 'lidar', 'lidar_pkg.lidar', 'Lidar'),
+    # latency probe, see probe.py
+    'ping': ('host_pkg', 'host', 'host_pkg.probe', 'Ping'),
+    'pong': ('host_pkg', 'host', 'host_pkg.probe', 'Pong'),
+}
+
+# what "--nodes all" means: the four course nodes, not the probe
+COURSE_NODES = ['simple_publisher', 'simple_subscriber', 'subpub', 'lidar']
+
+
+def node_class(name):
+    """Import the class for one node name (only when it is actually used)."""
+    _, _, module, cls = NODES[name]
+    return getattr(importlib.import_module(module), cls)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Run several course nodes in one process.')
+    parser.add_argument('--nodes', nargs='+', default=['all'],
+                        choices=list(NODES) + ['all'],
+                        help='nodes to start (default: all course nodes)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='executor threads (default: number of CPUs)')
+    args = parser.parse_args(argv)
+    names = []
+    for name in args.nodes:
+        for n in (COURSE_NODES if name == 'all' else [name]):
+            # a node name may only exist once in the graph
+            if n not in names:
+                names.append(n)
+    args.nodes = names
+    return args
+
+
+def main(args=None):
+    # initialize the ROS communication (one context for all nodes)
+    rclpy.init(args=args)
+    options = parse_args(remove_ros_args(args)[1:])
+    # declare the node constructors
+    nodes = [node_class(name)() for name in options.nodes]
+    # one executor spins every node; callbacks of different nodes run in parallel
+    executor = MultiThreadedExecutor(num_threads=options.threads)
+    for node in nodes:
+        executor.add_node(node)
+    nodes[0].get_logger().info('hosting %d node(s): %s' % (len(nodes), ', '.join(options.nodes)))
+    try:
+        # pause the program execution, waits for a request to kill the nodes (ctrl+c)
+        executor.spin()
+    except (KeyboardInterrupt, ExternalShutdownException):
+        pass
+    finally:
+        executor.shutdown()
+        # Explicity destroy the nodes
+        for node in nodes:
+            node.destroy_node()
+        # shutdown the ROS communication
+        if rclpy.ok():
+            rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
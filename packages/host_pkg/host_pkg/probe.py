@@ -0,0 +1,55 @@
+"""Ping/pong nodes that measure message round-trip latency.
+
+Ping publishes a stamped Header on ``host_probe/ping``, Pong sends it straight
+back on ``host_probe/pong`` and Ping publishes every round-trip time (seconds)
+on ``host_probe/rtt``. Start both in the host, or each in its own process, to
+compare the latency of the two set-ups.
+"""
+
+from collections import deque
+
+from rclpy.node import Node
+from rclpy.time import Time
+from std_msgs.msg import Float64, Header
+
+
+class Ping(Node):
+
+    def __init__(self):
+        super().__init__('ping')
+        self.rate = self.declare_parameter('rate', 20.0).value
+        self.publisher_ = self.create_publisher(Header, 'host_probe/ping', 10)
+        self.rtt_publisher = self.create_publisher(Float64, 'host_probe/rtt', 10)
+        self.subscriber = self.create_subscription(
+            Header, 'host_probe/pong', self.pong_callback, 10)
+        # last round-trip times, only used for the periodic log line
+        self.rtts = deque(maxlen=200)
+        self.timer = self.create_timer(1.0 / self.rate, self.timer_callback)
+        self.report_timer = self.create_timer(5.0, self.report)
+
+    def timer_callback(self):
+        msg = Header()
+        msg.stamp = self.get_clock().now().to_msg()
+        self.publisher_.publish(msg)
+
+    def pong_callback(self, msg):
+        rtt = (self.get_clock().now() - Time.from_msg(msg.stamp)).nanoseconds / 1e9
+        self.rtts.append(rtt)
+        self.rtt_publisher.publish(Float64(data=rtt))
+
+    def report(self):
+        if not self.rtts:
+            self.get_logger().info('no pong received yet')
+            return
+        rtts = sorted(self.rtts)
+        self.get_logger().info('rtt median %.2f ms, max %.2f ms (%d samples)' % (
+            rtts[len(rtts) // 2] * 1e3, rtts[-1] * 1e3, len(rtts)))
+
+
+class Pong(Node):
+
+    def __init__(self):
+        super().__init__('pong')
+        self.publisher_ = self.create_publisher(Header, 'host_probe/pong', 10)
+        self.subscriber = self.create_subscription(
+            Header, 'host_probe/ping', self.publisher_.publish, 10)
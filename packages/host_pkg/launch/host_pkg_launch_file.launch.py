@@ -0,0 +1,11 @@
+from launch import LaunchDescription
+from launch_ros.actions import Node
+
+def generate_launch_description():
+    return LaunchDescription([
+        Node(
+            package='host_pkg',
+            executable='host',
+            arguments=['--nodes', 'simple_publisher', 'simple_subscriber', 'subpub', 'lidar'],
+            output='screen'),
+    ])
@@ -0,0 +1,244 @@
+"""Compressed /scan for viewing many robots over one Wi-Fi network.
+
+scan_compressor (on the robot) turns every LaserScan into a small
+UInt8MultiArray on /scan_compressed:
+
+    * ranges are quantized to millimetres (invalid / out of range -> 0)
+    * key frames (every `keyframe_interval` scans) store the difference
+      between neighbouring beams, the frames in between store the difference
+      with the previous scan, which is mostly zero for a robot standing still
+    * the deltas are stored as int16 when they fit (int32 otherwise) and
+      compressed with zlib, or LZ4 when python3-lz4 is installed
+
+scan_decompressor (on the laptop) turns it back into a standard LaserScan on
+/scan_decompressed, so rviz or the dashboard can use it as usual. After a lost
+message it waits for the next key frame. Intensities are not transmitted.
+
+Both nodes log the compression ratio and the encode / decode time per scan.
+
+Usage:
+    ros2 run lidar_pkg scan_compressor --ros-args -p codec:=zlib -p keyframe_interval:=10
+    ros2 run lidar_pkg scan_decompressor
+"""
+
+import struct
+import time
+import zlib
+from array import array
+
+import numpy as np
+
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from sensor_msgs.msg import LaserScan
+from std_msgs.msg import UInt8MultiArray
+
+# LZ4 is optional: without it the compressor falls back to zlib.
+try:
+    import lz4.block
+    HAVE_LZ4 = True
+except ImportError:  # pragma: no cover
+    HAVE_LZ4 = False
+
+
+# version, flags, seq, stamp sec, stamp nanosec, angle_min, angle_increment,
+# time_increment, scan_time, range_min, range_max, number of beams, frame_id length
+HEADER = struct.Struct('<BBIiIffffffIB')
+VERSION = 1
+
+FLAG_KEYFRAME = 0x01
+FLAG_INT32 = 0x02
+FLAG_LZ4 = 0x04
+FLAG_RAW = 0x08   # not compressed
+
+CODECS = ('zlib', 'lz4', 'none')
+
+
+class ScanEncoder:
+    """LaserScan -> bytes. Keeps the previous quantized scan for delta frames."""
+
+    def __init__(self, codec='zlib', level=1, keyframe_interval=10):
+        if codec not in CODECS:
+            raise ValueError('codec must be one of %s, not %r' % (CODECS, codec))
+        self.codec = 'zlib' if codec == 'lz4' and not HAVE_LZ4 else codec
+        self.level = level
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.seq = 0
+        self.previous = None
+        self.geometry = None
+
+    def encode(self, msg):
+        ranges = np.frombuffer(array('f', msg.ranges), dtype=np.float32)
+        valid = np.isfinite(ranges) & (ranges >= msg.range_min) & (ranges <= msg.range_max)
+        mm = np.where(valid, np.rint(ranges * 1000.0), 0).astype(np.int32)
+
+        geometry = (msg.angle_min, msg.angle_increment, len(mm))
+        keyframe = (self.previous is None or geometry != self.geometry
+                    or self.seq % self.keyframe_interval == 0)
+        if keyframe:
+            delta = np.diff(mm, prepend=0)
+        else:
+            delta = mm - self.previous
+        self.previous, self.geometry = mm, geometry
+
+        flags = FLAG_KEYFRAME if keyframe else 0
+        if delta.size and (delta.min() < -32768 or delta.max() > 32767):
+            flags |= FLAG_INT32
+            body = delta.astype('<i4').tobytes()
+        else:
+            body = delta.astype('<i2').tobytes()
+        if self.codec == 'zlib':
+            body = zlib.compress(body, self.level)
+        elif self.codec == 'lz4':
+            flags |= FLAG_LZ4
+            body = lz4.block.compress(body, store_size=True)
+        else:
+            flags |= FLAG_RAW
+
+        frame_id = msg.header.frame_id.encode()[:255]
+        header = HEADER.pack(
+            VERSION, flags, self.seq, msg.header.stamp.sec, msg.header.stamp.nanosec,
+            msg.angle_min, msg.angle_increment, msg.time_increment, msg.scan_time,
+            msg.range_min, msg.range_max, len(mm), len(frame_id))
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        return header + frame_id + body
+
+
+class ScanDecoder:
+    """bytes -> LaserScan, or None while waiting for a key frame."""
+
+    def __init__(self):
+        self.previous = None
+        self.last_seq = None
+        self.dropped = 0
+
+    def decode(self, data):
+        (version, flags, seq, sec, nanosec, angle_min, angle_increment, time_increment,
+         scan_time, range_min, range_max, n, frame_len) = HEADER.unpack_from(data)
+        if version != VERSION:
+            raise ValueError('unsupported compressed scan version %d' % version)
+        offset = HEADER.size
+        frame_id = bytes(data[offset:offset + frame_len]).decode()
+        body = bytes(data[offset + frame_len:])
+
+        keyframe = flags & FLAG_KEYFRAME
+        in_order = self.last_seq is not None and seq == (self.last_seq + 1) & 0xFFFFFFFF
+        self.last_seq = seq
+        have_previous = self.previous is not None and len(self.previous) == n
+        if not keyframe and not (in_order and have_previous):
+            # a delta frame without its predecessor cannot be decoded
+            self.previous = None
+            self.dropped += 1
+            return None
+
+        if flags & FLAG_LZ4:
+            if not HAVE_LZ4:
+                raise RuntimeError('received an LZ4 scan but python3-lz4 is not installed')
+            body = lz4.block.decompress(body)
+        elif not flags & FLAG_RAW:
+            body = zlib.decompress(body)
+        delta = np.frombuffer(body, dtype='<i4' if flags & FLAG_INT32 else '<i2').astype(np.int32)
+        mm = np.cumsum(delta, dtype=np.int32) if keyframe else self.previous + delta
+        self.previous = mm
+
+        ranges = mm.astype(np.float32) / 1000.0
+        ranges[mm == 0] = np.inf
+
+        msg = LaserScan()
+        msg.header.stamp.sec = sec
+        msg.header.stamp.nanosec = nanosec
+        msg.header.frame_id = frame_id
+        msg.angle_min = angle_min
+        msg.angle_increment = angle_increment
+        msg.angle_max = angle_min + angle_increment * (n - 1)
+        msg.time_increment = time_increment
+        msg.scan_time = scan_time
+        msg.range_min = range_min
+        msg.range_max = range_max
+        msg.ranges = array('f', ranges.tobytes())
+        return msg
+
+
+class ScanCompressor(Node):
+
+    def __init__(self):
+        super().__init__('scan_compressor')
+        codec = self.declare_parameter('codec', 'zlib').value
+        self.encoder = ScanEncoder(
+            codec,
+            self.declare_parameter('level', 1).value,
+            self.declare_parameter('keyframe_interval', 10).value)
+        if codec == 'lz4' and not HAVE_LZ4:
+            self.get_logger().warn('python3-lz4 not found: using zlib instead.')
+        self.report_every = self.declare_parameter('report_every', 100).value
+        self.publisher_ = self.create_publisher(
+            UInt8MultiArray, 'scan_compressed', qos_profile_sensor_data)
+        self.subscriber = self.create_subscription(
+            LaserScan, '/scan', self.laser_callback, qos_profile_sensor_data)
+        self.raw_bytes = self.compressed_bytes = 0
+        self.times = []
+
+    def laser_callback(self, msg):
+        start = time.perf_counter()
+        data = self.encoder.encode(msg)
+        self.times.append(time.perf_counter() - start)
+        self.publisher_.publish(UInt8MultiArray(data=array('B', data)))
+        # what the float32 ranges alone would have cost (intensities are not transmitted)
+        self.raw_bytes += 4 * len(msg.ranges)
+        self.compressed_bytes += len(data)
+        if len(self.times) >= self.report_every:
+            self.get_logger().info(
+                'compression %.1fx (%d B/scan), encode %.2f ms mean, %.2f ms max' % (
+                    self.raw_bytes / self.compressed_bytes,
+                    self.compressed_bytes / len(self.times),
+                    sum(self.times) / len(self.times) * 1e3, max(self.times) * 1e3))
+            self.raw_bytes = self.compressed_bytes = 0
+            self.times.clear()
+
+
+class ScanDecompressor(Node):
+
+    def __init__(self):
+        super().__init__('scan_decompressor')
+        self.decoder = ScanDecoder()
+        self.report_every = self.declare_parameter('report_every', 100).value
+        self.publisher_ = self.create_publisher(
+            LaserScan, 'scan_decompressed', qos_profile_sensor_data)
+        self.subscriber = self.create_subscription(
+            UInt8MultiArray, 'scan_compressed', self.compressed_callback, qos_profile_sensor_data)
+        self.times = []
+
+    def compressed_callback(self, msg):
+        start = time.perf_counter()
+        scan = self.decoder.decode(msg.data)
+        if scan is None:
+            return
+        self.times.append(time.perf_counter() - start)
+        self.publisher_.publish(scan)
+        if len(self.times) >= self.report_every:
+            self.get_logger().info(
+                'decode %.2f ms mean, %.2f ms max, %d frame(s) dropped waiting for a key frame' % (
+                    sum(self.times) / len(self.times) * 1e3, max(self.times) * 1e3,
+                    self.decoder.dropped))
+            self.times.clear()
+
+
+def run(node_class, args=None):
+    # initialize the ROS communication
+    rclpy.init(args=args)
+    node = node_class()
+    # pause the program execution, waits for a request to kill the node (ctrl+c)
+    rclpy.spin(node)
+    # Explicity destroy the node
+    node.destroy_node()
+    # shutdown the ROS communication
+    rclpy.shutdown()
+
+
+def compressor_main(args=None):
+    run(ScanCompressor, args)
+
+
+def decompressor_main(args=None):
+    run(ScanDecompressor, args)
@@ -0,0 +1,242 @@
+"""Lidar odometry: how far did the robot move between two scans?
+
+Every new /scan is aligned with the previous one using ICP (iterative closest
+point). The result does not depend on the wheels, so it keeps working when
+the wheels slip. The pose of the scanner is integrated and published as
+nav_msgs/Odometry on /scan_odom at scan rate.
+
+    * polar -> cartesian uses cos/sin tables that are only rebuilt when the
+      scan geometry (angle_min, angle_increment, number of beams) changes
+    * nearest neighbours come from a KD-tree (scipy cKDTree) of the previous
+      scan; every scan's tree is built once and reused as the reference
+    * method 'point_to_line' (default) converges in fewer iterations in
+      corridors and rooms, 'point_to_point' is the classic SVD version
+
+Every `report_every` scans the node logs the mean / max alignment time and the
+mean number of ICP iterations, and warns when alignment is slower than the
+scanner.
+
+Usage:
+    ros2 run lidar_pkg scan_odometry
+    ros2 run lidar_pkg scan_odometry --ros-args -p method:=point_to_point -p step:=2
+"""
+
+import math
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from nav_msgs.msg import Odometry
+from sensor_msgs.msg import LaserScan
+
+
+class TrigTable:
+    """cos/sin of every beam angle, cached for one scan geometry."""
+
+    def __init__(self):
+        self.key = None
+        self.cos = self.sin = None
+
+    def get(self, msg, step):
+        key = (msg.angle_min, msg.angle_increment, len(msg.ranges), step)
+        if key != self.key:
+            angles = msg.angle_min + msg.angle_increment * np.arange(0, len(msg.ranges), step)
+            self.cos, self.sin = np.cos(angles), np.sin(angles)
+            self.key = key
+        return self.cos, self.sin
+
+
+def rotation(theta):
+    c, s = math.cos(theta), math.sin(theta)
+    return np.array([[c, -s], [s, c]])
+
+
+def line_normals(points):
+    """Normal of every point, from its neighbours in scan order."""
+    tangent = np.empty_like(points)
+    tangent[1:-1] = points[2:] - points[:-2]
+    tangent[0] = points[1] - points[0]
+    tangent[-1] = points[-1] - points[-2]
+    length = np.hypot(tangent[:, 0], tangent[:, 1])
+    length[length == 0] = 1.0
+    return np.column_stack((-tangent[:, 1], tangent[:, 0])) / length[:, None]
+
+
+class Reference:
+    """A scan to match against: its points, KD-tree and (optionally) normals."""
+
+    def __init__(self, points, with_normals):
+        self.points = points
+        self.tree = cKDTree(points)
+        self.normals = line_normals(points) if with_normals else None
+
+
+def icp(source, ref, guess, method, max_iterations, tolerance, max_distance):
+    """Align `source` (N x 2) with `ref`.
+
+    Returns (R, t, iterations, matched) with ref ~= source @ R.T + t.
+    """
+    R, t = rotation(guess[2]), np.array(guess[:2], dtype=float)
+    matched = iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        moved = source @ R.T + t
+        dist, idx = ref.tree.query(moved, distance_upper_bound=max_distance)
+        ok = np.isfinite(dist)
+        matched = int(ok.sum())
+        if matched < 10:
+            break
+        p, q = moved[ok], ref.points[idx[ok]]
+        if method == 'point_to_point':
+            # best rotation of the centred point sets (Kabsch / SVD)
+            pc, qc = p.mean(axis=0), q.mean(axis=0)
+            U, _, Vt = np.linalg.svd((p - pc).T @ (q - qc))
+            dR = Vt.T @ U.T
+            if np.linalg.det(dR) < 0:
+                Vt[1] *= -1
+                dR = Vt.T @ U.T
+            dt = qc - dR @ pc
+            dtheta = math.atan2(dR[1, 0], dR[0, 0])
+        else:
+            # minimise the distance to the line through each reference point:
+            # linearised in (dtheta, dx, dy), solved with least squares
+            n = ref.normals[idx[ok]]
+            residual = np.einsum('ij,ij->i', n, p - q)
+            J = np.column_stack((n[:, 1] * p[:, 0] - n[:, 0] * p[:, 1], n[:, 0], n[:, 1]))
+            delta, *_ = np.linalg.lstsq(J, -residual, rcond=None)
+            dtheta, dt = delta[0], delta[1:]
+            dR = rotation(dtheta)
+        R, t = dR @ R, dR @ t + dt
+        if abs(dtheta) < tolerance and np.hypot(*dt) < tolerance:
+            break
+    return R, t, iteration, matched
+
+
+class ScanOdometry(Node):
+
+    def __init__(self):
+        super().__init__('scan_odometry')
+        self.method = self.declare_parameter('method', 'point_to_line').value
+        if self.method not in ('point_to_line', 'point_to_point'):
+            raise ValueError(
+                'method must be point_to_line or point_to_point, not %r' % self.method)
+        # use every `step`-th beam: fewer points = faster matching on the Pi
+        self.step = max(1, self.declare_parameter('step', 1).value)
+        self.max_iterations = self.declare_parameter('max_iterations', 20).value
+        if self.max_iterations < 1:
+            raise ValueError('max_iterations must be at least 1, not %r' % self.max_iterations)
+        self.tolerance = self.declare_parameter('tolerance', 1e-4).value
+        # pairs further apart than this (m) are not used
+        self.max_distance = self.declare_parameter('max_distance', 0.3).value
+        self.report_every = self.declare_parameter('report_every', 50).value
+        self.frame_id = self.declare_parameter('frame_id', 'odom_scan').value
+
+        self.publisher_ = self.create_publisher(Odometry, 'scan_odom', 10)
+        self.subscriber = self.create_subscription(
+            LaserScan, '/scan', self.laser_callback, qos_profile_sensor_data)
+
+        self.trig = TrigTable()
+        self.reference = None
+        self.last_stamp = None
+        # pose of the scanner in the odometry frame
+        self.x = self.y = self.yaw = 0.0
+        # last increment, used as the initial guess for the next scan
+        self.guess = (0.0, 0.0, 0.0)
+        # timing report
+        self.times = []
+        self.iterations = []
+        self.scan_period = None
+
+    def to_points(self, msg):
+        cos, sin = self.trig.get(msg, self.step)
+        r = np.asarray(msg.ranges, dtype=np.float64)[::self.step]
+        ok = np.isfinite(r) & (r >= msg.range_min) & (r <= msg.range_max)
+        return np.column_stack((r[ok] * cos[ok], r[ok] * sin[ok]))
+
+    def laser_callback(self, msg):
+        start = time.perf_counter()
+        points = self.to_points(msg)
+        stamp = msg.header.stamp.sec + msg.header.stamp.nanosec * 1e-9
+        if len(points) < 10:
+            self.get_logger().warn('scan with only %d valid points skipped' % len(points))
+            return
+        current = Reference(points, self.method == 'point_to_line')
+        if self.reference is None:
+            self.reference, self.last_stamp = current, stamp
+            return
+
+        R, t, iterations, matched = icp(points, self.reference, self.guess, self.method,
+                                        self.max_iterations, self.tolerance, self.max_distance)
+        dt = stamp - self.last_stamp
+        self.reference, self.last_stamp = current, stamp
+        if matched < 10:
+            # nothing to match against (e.g. turned too fast): restart from this scan
+            self.get_logger().warn('scan matching lost (%d pairs), pose not updated' % matched)
+            self.guess = (0.0, 0.0, 0.0)
+            return
+
+        # the current scan expressed in the previous scan frame: that is the motion
+        dtheta = math.atan2(R[1, 0], R[0, 0])
+        self.guess = (t[0], t[1], dtheta)
+        c, s = math.cos(self.yaw), math.sin(self.yaw)
+        self.x += c * t[0] - s * t[1]
+        self.y += s * t[0] + c * t[1]
+        self.yaw = math.atan2(math.sin(self.yaw + dtheta), math.cos(self.yaw + dtheta))
+        self.publish(msg, t, dtheta, dt)
+
+        self.times.append(time.perf_counter() - start)
+        self.iterations.append(iterations)
+        if dt > 0:
+            self.scan_period = dt
+        if len(self.times) >= self.report_every:
+            self.report()
+
+    def publish(self, scan, t, dtheta, dt):
+        odom = Odometry()
+        odom.header.stamp = scan.header.stamp
+        odom.header.frame_id = self.frame_id
+        odom.child_frame_id = scan.header.frame_id
+        odom.pose.pose.position.x = self.x
+        odom.pose.pose.position.y = self.y
+        odom.pose.pose.orientation.z = math.sin(self.yaw / 2.0)
+        odom.pose.pose.orientation.w = math.cos(self.yaw / 2.0)
+        if dt > 0:
+            odom.twist.twist.linear.x = t[0] / dt
+            odom.twist.twist.linear.y = t[1] / dt
+            odom.twist.twist.angular.z = dtheta / dt
+        self.publisher_.publish(odom)
+
+    def report(self):
+        mean = sum(self.times) / len(self.times)
+        self.get_logger().info(
+            'ICP %s: %.1f ms mean, %.1f ms max, %.1f iterations mean over %d scans, '
+            'pose %.2f %.2f %.0f°' % (
+                self.method, mean * 1e3, max(self.times) * 1e3,
+                sum(self.iterations) / len(self.iterations), len(self.times),
+                self.x, self.y, math.degrees(self.yaw)))
+        if self.scan_period and mean > self.scan_period:
+            self.get_logger().warn(
+                'alignment (%.1f ms) is slower than the scanner (%.1f ms): '
+                'increase step or lower max_iterations' % (mean * 1e3, self.scan_period * 1e3))
+        self.times.clear()
+        self.iterations.clear()
+
+
+def main(args=None):
+    # initialize the ROS communication
+    rclpy.init(args=args)
+    # declare the node constructor
+    scan_odometry = ScanOdometry()
+    # pause the program execution, waits for a request to kill the node (ctrl+c)
+    rclpy.spin(scan_odometry)
+    # Explicity destroy the node
+    scan_odometry.destroy_node()
+    # shutdown the ROS communication
+    rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -23,7 +23,10 @@ setup(
     tests_require=['pytest'],
     entry_points={
         'console_scripts': [
-            'lidar = lidar_pkg.lidar:main'
+            'lidar = lidar_pkg.lidar:main',
+            'scan_odometry = lidar_pkg.scan_odometry:main',
+            'scan_compressor = lidar_pkg.scan_compression:compressor_main',
+            'scan_decompressor = lidar_pkg.scan_compression:decompressor_main'
         ],
     },
 )
\ No newline at end of file
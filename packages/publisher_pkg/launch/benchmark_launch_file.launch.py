@@ -0,0 +1,15 @@
+from launch import LaunchDescription
+from launch_ros.actions import Node
+
+def generate_launch_description():
+    return LaunchDescription([
+        Node(
+            package='publisher_pkg',
+            executable='benchmark_receiver',
+            parameters=[{'output': 'benchmark_results.csv'}],
+            output='screen'),
+        Node(
+            package='publisher_pkg',
+            executable='benchmark_publisher',
+            output='screen'),
+    ])
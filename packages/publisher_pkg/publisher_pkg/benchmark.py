@@ -0,0 +1,275 @@
+"""Throughput / QoS benchmark for publishing on a robot.
+
+Two nodes work together:
+
+    * benchmark_publisher  sweeps every combination of publish rate, payload
+                           size, reliability and history depth. Every run
+                           publishes UInt8MultiArray messages for `duration`
+                           seconds; the first bytes of each message hold the
+                           run number, a sequence number and the send time.
+    * benchmark_receiver   subscribes with the same QoS as the current run and
+                           measures loss, duplicates, reordering and latency.
+                           Every finished run becomes one row in a CSV file.
+
+The publisher announces the start and end of every run on the reliable
+``benchmark/control`` topic, so the receiver can switch QoS between runs.
+Latency compares the clocks of both machines: run both nodes on one machine,
+or make sure the clocks are synchronised (chrony / NTP).
+
+Usage:
+    ros2 run publisher_pkg benchmark_receiver --ros-args -p output:=results.csv
+    ros2 run publisher_pkg benchmark_publisher --ros-args \\
+        -p rates:="[10.0, 100.0]" -p sizes:="[64, 65536]" -p depths:="[1, 10]"
+"""
+
+import csv
+import json
+import os
+import struct
+import time
+from array import array
+
+import rclpy
+from rclpy.node import Node
+from rclpy.qos import HistoryPolicy, QoSProfile, ReliabilityPolicy
+from std_msgs.msg import String, UInt8MultiArray
+
+# run number, sequence number, send time (ns since epoch)
+HEADER = struct.Struct('<IIq')
+
+RELIABILITY = {
+    'reliable': ReliabilityPolicy.RELIABLE,
+    'best_effort': ReliabilityPolicy.BEST_EFFORT,
+}
+
+CSV_FIELDS = [
+    'run', 'reliability', 'depth', 'rate_hz', 'size', 'duration_s',
+    'sent', 'received', 'lost', 'loss_pct', 'duplicates', 'reordered',
+    'receive_rate_hz', 'throughput_mbps',
+    'latency_mean_ms', 'latency_p50_ms', 'latency_p95_ms', 'latency_p99_ms', 'latency_max_ms',
+]
+
+
+def data_qos(reliability, depth):
+    return QoSProfile(history=HistoryPolicy.KEEP_LAST, depth=int(depth),
+                      reliability=RELIABILITY[reliability])
+
+
+def control_qos():
+    # control messages must never get lost
+    return QoSProfile(depth=10, reliability=ReliabilityPolicy.RELIABLE)
+
+
+def percentile(values, q):
+    """`values` must be sorted."""
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(round(q * (len(values) - 1))))], 3)
+
+
+class BenchmarkPublisher(Node):
+
+    def __init__(self):
+        super().__init__('benchmark_publisher')
+        self.rates = list(self.declare_parameter('rates', [10.0, 100.0, 500.0]).value)
+        self.sizes = list(self.declare_parameter('sizes', [64, 1024, 65536]).value)
+        self.reliabilities = list(
+            self.declare_parameter('reliabilities', ['reliable', 'best_effort']).value)
+        self.depths = list(self.declare_parameter('depths', [1, 10]).value)
+        self.duration = self.declare_parameter('duration', 5.0).value
+        # seconds to wait for the receiver before giving up on a run
+        self.timeout = self.declare_parameter('timeout', 10.0).value
+        for r in self.reliabilities:
+            if r not in RELIABILITY:
+                raise ValueError('unknown reliability %r, use one of %s' % (r, list(RELIABILITY)))
+        self.control = self.create_publisher(String, 'benchmark/control', control_qos())
+
+    def runs(self):
+        run = 0
+        for reliability in self.reliabilities:
+            for depth in self.depths:
+                for rate in self.rates:
+                    for size in self.sizes:
+                        run += 1
+                        yield {'run': run, 'reliability': reliability, 'depth': int(depth),
+                               'rate_hz': float(rate), 'size': max(int(size), HEADER.size),
+                               'duration_s': float(self.duration)}
+
+    def send_control(self, **fields):
+        self.control.publish(String(data=json.dumps(fields)))
+
+    def wait_for(self, condition):
+        end = time.monotonic() + self.timeout
+        while not condition():
+            if time.monotonic() > end:
+                return False
+            rclpy.spin_once(self, timeout_sec=0.05)
+        return True
+
+    def run_sweep(self):
+        self.get_logger().info('Waiting for benchmark_receiver...')
+        if not self.wait_for(lambda: self.control.get_subscription_count() > 0):
+            self.get_logger().error('No receiver on benchmark/control, giving up.')
+            return
+        for params in self.runs():
+            self.run_once(params)
+        self.send_control(event='done')
+        self.get_logger().info('Sweep complete.')
+
+    def run_once(self, params):
+        publisher = self.create_publisher(
+            UInt8MultiArray, 'benchmark/data', data_qos(params['reliability'], params['depth']))
+        try:
+            self.send_control(event='start', **params)
+            # the receiver creates its subscription after the start message
+            if not self.wait_for(lambda: publisher.get_subscription_count() > 0):
+                self.get_logger().error(
+                    'Receiver did not subscribe for run %d, skipped.' % params['run'])
+                return
+            msg = UInt8MultiArray()
+            payload = bytearray(params['size'])
+            period = 1.0 / params['rate_hz']
+            sent = 0
+            start = time.perf_counter()
+            next_time = start
+            while time.perf_counter() - start < params['duration_s']:
+                HEADER.pack_into(payload, 0, params['run'], sent, time.time_ns())
+                # array('B') is copied straight into the message,
+                # a bytes/list would be checked per element
+                msg.data = array('B', payload)
+                publisher.publish(msg)
+                sent += 1
+                # sleep until the next slot; when we fall behind, don't try to catch up in a burst
+                next_time = max(next_time + period, time.perf_counter())
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            elapsed = time.perf_counter() - start
+            self.send_control(event='end', run=params['run'], sent=sent)
+            self.get_logger().info('run %d: %s %d depth, %.0f Hz, %d B -> sent %d (%.1f Hz)' % (
+                params['run'], params['reliability'], params['depth'], params['rate_hz'],
+                params['size'], sent, sent / elapsed))
+            # the receiver drops its subscription once it has written the result
+            self.wait_for(lambda: publisher.get_subscription_count() == 0)
+        finally:
+            self.destroy_publisher(publisher)
+
+
+class BenchmarkReceiver(Node):
+
+    def __init__(self):
+        super().__init__('benchmark_receiver')
+        self.output = self.declare_parameter('output', 'benchmark_results.csv').value
+        # how long to keep listening after the end of a run for late messages
+        self.grace = self.declare_parameter('grace', 1.0).value
+        self.subscriber = None
+        self.params = None
+        self.create_subscription(String, 'benchmark/control', self.control_callback, control_qos())
+
+    def control_callback(self, msg):
+        event = json.loads(msg.data)
+        if event['event'] == 'start':
+            self.start_run(event)
+        elif event['event'] == 'end' and self.params and event['run'] == self.params['run']:
+            self.params['sent'] = event['sent']
+            # one-shot timer: finish after the grace period
+            self.finish_timer = self.create_timer(self.grace, self.finish_run)
+        elif event['event'] == 'done':
+            self.get_logger().info('Sweep complete, results in %s' % os.path.abspath(self.output))
+
+    def start_run(self, params):
+        if self.subscriber is not None:
+            self.destroy_subscription(self.subscriber)
+        self.params = params
+        self.seen = set()
+        self.duplicates = 0
+        self.reordered = 0
+        self.highest = -1
+        self.latencies = []
+        self.bytes = 0
+        self.first = self.last = None
+        self.subscriber = self.create_subscription(
+            UInt8MultiArray, 'benchmark/data', self.data_callback,
+            data_qos(params['reliability'], params['depth']))
+
+    def data_callback(self, msg):
+        now = time.time_ns()
+        run, seq, stamp = HEADER.unpack_from(msg.data)
+        if self.params is None or run != self.params['run']:
+            return
+        self.latencies.append((now - stamp) / 1e6)
+        self.bytes += len(msg.data)
+        self.first = self.first or now
+        self.last = now
+        if seq in self.seen:
+            self.duplicates += 1
+            return
+        self.seen.add(seq)
+        if seq < self.highest:
+            self.reordered += 1
+        self.highest = max(self.highest, seq)
+
+    def finish_run(self):
+        self.finish_timer.cancel()
+        self.destroy_timer(self.finish_timer)
+        self.destroy_subscription(self.subscriber)
+        self.subscriber = None
+        p = self.params
+        self.params = None
+        received = len(self.seen)
+        lat = sorted(self.latencies)
+        span = (self.last - self.first) / 1e9 if self.first and self.last > self.first else None
+        row = dict((k, p[k]) for k in (
+            'run', 'reliability', 'depth', 'rate_hz', 'size', 'duration_s', 'sent'))
+        loss_pct = round(100.0 * (p['sent'] - received) / p['sent'], 3) if p['sent'] else None
+        row.update({
+            'received': received,
+            'lost': p['sent'] - received,
+            'loss_pct': loss_pct,
+            'duplicates': self.duplicates,
+            'reordered': self.reordered,
+            'receive_rate_hz': round((received - 1) / span, 2) if span else None,
+            'throughput_mbps': round(self.bytes * 8 / span / 1e6, 3) if span else None,
+            'latency_mean_ms': round(sum(lat) / len(lat), 3) if lat else None,
+            'latency_p50_ms': percentile(lat, 0.50),
+            'latency_p95_ms': percentile(lat, 0.95),
+            'latency_p99_ms': percentile(lat, 0.99),
+            'latency_max_ms': round(lat[-1], 3) if lat else None,
+        })
+        self.write_row(row)
+        self.get_logger().info(
+            'run %d: received %d/%d, reordered %d, latency p50 %s ms p99 %s ms' % (
+                row['run'], received, p['sent'], self.reordered,
+                row['latency_p50_ms'], row['latency_p99_ms']))
+
+    def write_row(self, row):
+        new = not os.path.exists(self.output)
+        with open(self.output, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+
+
+def publisher_main(args=None):
+    # initialize the ROS communication
+    rclpy.init(args=args)
+    node = BenchmarkPublisher()
+    try:
+        # the sweep drives itself and returns when every run is done
+        node.run_sweep()
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+def receiver_main(args=None):
+    rclpy.init(args=args)
+    node = BenchmarkReceiver()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
@@ -23,7 +23,9 @@ setup(
     tests_require=['pytest'],
     entry_points={
         'console_scripts': [
-            'simple_publisher = publisher_pkg.simple_publisher:main'
+            'simple_publisher = publisher_pkg.simple_publisher:main',
+            'benchmark_publisher = publisher_pkg.benchmark:publisher_main',
+            'benchmark_receiver = publisher_pkg.benchmark:receiver_main'
         ],
     },
 )
\ No newline at end of file
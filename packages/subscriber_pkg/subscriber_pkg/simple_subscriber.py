@@ -3,8 +3,13 @@ import rclpy
 from rclpy.node import Node
 # import the LaserScan module from sensor_msgs interface
 from sensor_msgs.msg import LaserScan
-# import Quality of Service library, to set the correct profile and reliability to read sensor data.
+# import Quality of Service library, to set the correct profile and reliability
+# to read sensor data.
 from rclpy.qos import ReliabilityPolicy, QoSProfile
+# to look up a message class from its type name, e.g. 'nav_msgs/msg/Odometry'
+from rosidl_runtime_py.utilities import get_message
+
+from subscriber_pkg.topic_stats import TopicStatistics
 
 
 class SimpleSubscriber(Node):
@@ -14,20 +19,66 @@ class SimpleSubscriber(Node):
         # call super() in the constructor to initialize the Node object
         # the parameter you pass is the node name
         super().__init__('simple_subscriber')
-        # create the subscriber object
-        # in this case, the subscriptor will be subscribed on /scan topic with a queue size of 10 messages.
-        # use the LaserScan module for /scan topic
-        # send the received info to the listener_callback method.
-        self.subscriber = self.create_subscription(
-            LaserScan,
-            '/scan',
-            self.listener_callback,
-            QoSProfile(depth=10, reliability=ReliabilityPolicy.RELIABLE))  # is the most used to read LaserScan data and some sensor data.
+        # statistics mode: don't print every message, only a periodic summary of
+        # rate, jitter, bandwidth and message sizes of any topic.
+        # ros2 run subscriber_pkg simple_subscriber --ros-args -p stats:=true -p topic:=/odom
+        self.stats_mode = self.declare_parameter('stats', False).value
+        self.topic = self.declare_parameter('topic', '/scan').value
+        # message type, e.g. 'sensor_msgs/msg/LaserScan'; empty = look it up in the graph
+        self.msg_type = self.declare_parameter('type', '').value
+        self.period = self.declare_parameter('period', 2.0).value
+        self.subscriber = None
+        if not self.stats_mode:
+            # create the subscriber object
+            # in this case, the subscriptor will be subscribed on /scan topic
+            # with a queue size of 10 messages.
+            # use the LaserScan module for /scan topic
+            # send the received info to the listener_callback method.
+            self.subscriber = self.create_subscription(
+                LaserScan,
+                '/scan',
+                self.listener_callback,
+                # is the most used to read LaserScan data and some sensor data.
+                QoSProfile(depth=10, reliability=ReliabilityPolicy.RELIABLE))
+        else:
+            self.stats = TopicStatistics()
+            # the subscription is created as soon as the message type is known
+            self.subscribe_stats()
+            self.timer = self.create_timer(self.period, self.stats_callback)
 
     def listener_callback(self, msg):
         # print the log info in the terminal
         self.get_logger().info('I receive: "%s"' % str(msg))
 
+    def subscribe_stats(self):
+        if not self.msg_type:
+            # take the type from whoever publishes the topic
+            types = dict(self.get_topic_names_and_types()).get(self.topic)
+            if not types:
+                return
+            self.msg_type = types[0]
+        # raw=True: the callback gets the serialized bytes, nothing is deserialized
+        self.subscriber = self.create_subscription(
+            get_message(self.msg_type),
+            self.topic,
+            self.raw_callback,
+            # also receives from reliable publishers
+            QoSProfile(depth=10, reliability=ReliabilityPolicy.BEST_EFFORT),
+            raw=True)
+        self.get_logger().info('Statistics for %s [%s]' % (self.topic, self.msg_type))
+
+    def raw_callback(self, data):
+        # only record arrival time and size
+        self.stats.add(len(data))
+
+    def stats_callback(self):
+        if self.subscriber is None:
+            self.subscribe_stats()
+            if self.subscriber is None:
+                self.get_logger().info('Waiting for %s to appear...' % self.topic)
+            return
+        self.get_logger().info('%s: %s' % (self.topic, self.stats.report(period=self.period)))
+
 
 def main(args=None):
     # initialize the ROS communication
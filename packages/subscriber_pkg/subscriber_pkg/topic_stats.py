@@ -0,0 +1,107 @@
+"""Cheap rate / jitter / bandwidth statistics for one topic.
+
+Only the arrival time and the size of every message are stored, in buffers of
+a fixed length, so the cost per message stays the same however long the node
+runs. Together with a raw subscription (the message is never deserialized)
+this works for any topic and any message type, like ``ros2 topic hz`` and
+``ros2 topic bw`` together.
+"""
+
+import math
+import time
+from collections import deque
+
+
+class TopicStatistics:
+
+    # size histogram buckets: bucket i counts messages of <= 2**i bytes,
+    # the last bucket also counts everything bigger
+    BUCKETS = 24
+    # a topic is stale after this many of its mean intervals without a message
+    STALE_INTERVALS = 3
+
+    def __init__(self, window=1000):
+        # arrival times (s) and sizes (bytes) of the last `window` messages
+        self.stamps = deque(maxlen=window)
+        self.sizes = deque(maxlen=window)
+        self.histogram = [0] * self.BUCKETS
+        self.count = 0
+
+    def add(self, size, stamp=None):
+        """Record one message of `size` bytes (call this from the callback)."""
+        self.stamps.append(time.monotonic() if stamp is None else stamp)
+        self.sizes.append(size)
+        self.histogram[min(max(size - 1, 0).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+
+    def summary(self, now=None):
+        """Return a dict with the statistics of the current window."""
+        now = time.monotonic() if now is None else now
+        n = len(self.stamps)
+        result = {
+            'count': self.count,
+            'window': n,
+            'rate_hz': None,
+            'jitter_ms': None,
+            'bandwidth_bps': None,
+            'size_min': min(self.sizes) if n else None,
+            'size_mean': sum(self.sizes) / n if n else None,
+            'size_max': max(self.sizes) if n else None,
+            'since_last_s': now - self.stamps[-1] if n else None,
+        }
+        if n < 2:
+            return result
+        span = self.stamps[-1] - self.stamps[0]
+        if span <= 0:
+            return result
+        intervals = [b - a for a, b in zip(self.stamps, list(self.stamps)[1:])]
+        mean = span / len(intervals)
+        result['rate_hz'] = 1.0 / mean
+        variance = sum((i - mean) ** 2 for i in intervals) / len(intervals)
+        result['jitter_ms'] = math.sqrt(variance) * 1e3
+        # the first message of the window arrived at the start of the span
+        result['bandwidth_bps'] = (sum(self.sizes) - self.sizes[0]) / span
+        return result
+
+    def histogram_text(self):
+        """Non-empty histogram buckets as '<=64B:10 <=128B:3 ...'."""
+        parts = []
+        for i, c in enumerate(self.histogram):
+            if c:
+                prefix = '>' if i == self.BUCKETS - 1 else '<='
+                limit = 2 ** (i - 1 if i == self.BUCKETS - 1 else i)
+                parts.append('%s%s:%d' % (prefix, format_bytes(limit), c))
+        return ' '.join(parts)
+
+    def report(self, now=None, period=None):
+        """One-line summary for the log.
+
+        With `period` (the time since the previous report) a topic that sent
+        nothing in that time, and nothing for STALE_INTERVALS of its own mean
+        interval, is reported as stale with rate 0, instead of repeating the
+        rate of the last window. A topic slower than the report period is not
+        stale as long as it keeps its own rate.
+        """
+        s = self.summary(now)
+        stale_after = period
+        if period is not None and s['rate_hz']:
+            stale_after = max(period, self.STALE_INTERVALS / s['rate_hz'])
+        if s['since_last_s'] is not None and stale_after is not None \
+                and s['since_last_s'] > stale_after:
+            return 'STALE: rate 0 Hz, no message for %.1f s, messages %d' % (
+                s['since_last_s'], s['count'])
+        if s['rate_hz'] is None:
+            return 'messages: %d (not enough for statistics)' % s['count']
+        return ('rate %.2f Hz, jitter %.2f ms, bandwidth %s/s, size min/mean/max %s/%s/%s, '
+                'last %.2f s ago, messages %d | %s') % (
+            s['rate_hz'], s['jitter_ms'], format_bytes(s['bandwidth_bps']),
+            format_bytes(s['size_min']), format_bytes(s['size_mean']),
+            format_bytes(s['size_max']), s['since_last_s'], s['count'], self.histogram_text())
+
+
+def format_bytes(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return ('%d%s' if unit == 'B' else '%.1f%s') % (n, unit)
+        n /= 1024.0
+    return '%.1fGB' % n
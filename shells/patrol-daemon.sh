@@ -0,0 +1,8 @@
+if [ "$#" -eq 1 ]; then
+    echo "Setting ROS_DOMAIN_ID to $1"
+    export ROS_DOMAIN_ID=$1
+fi
+
+# Keeps /patrolCommands and /patrolEvents open for patrol-send-command.sh and
+# patrol-listen-to-events.sh, on /tmp/patrol-daemon-<ROS_DOMAIN_ID>.sock
+python3 $(dirname $0)/patrolDaemon.py
@@ -4,5 +4,14 @@ if [ "$#" -gt 1 ]; then
 fi
 
 command=$1
+socket=/tmp/patrol-daemon-${ROS_DOMAIN_ID:-0}.sock
 
-ros2 topic echo /patrolEvents
\ No newline at end of file
+# Stream the events buffered by the running patrol daemon (./patrol-daemon.sh),
+# starting with the last 20 it already received.
+if [ -S $socket ]; then
+    curl -sN --unix-socket $socket "http://localhost/events/stream?history=20"
+    exit $?
+fi
+
+echo "patrol daemon not running, falling back to ros2 topic echo"
+ros2 topic echo /patrolEvents
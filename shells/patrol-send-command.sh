@@ -4,5 +4,13 @@ if [ "$#" -gt 1 ]; then
 fi
 
 command=$1
+socket=/tmp/patrol-daemon-${ROS_DOMAIN_ID:-0}.sock
 
-ros2 topic pub --once /patrolCommands example_interfaces/msg/String "data: $command"
\ No newline at end of file
+# Fast path: hand the command to the running patrol daemon (./patrol-daemon.sh).
+if [ -S $socket ] && curl -sf --unix-socket $socket --data-binary "$command" http://localhost/command; then
+    echo
+    exit 0
+fi
+
+echo "patrol daemon not running, falling back to ros2 topic pub"
+ros2 topic pub --once /patrolCommands example_interfaces/msg/String "data: $command"
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""Long-running patrol commander: keeps the ROS side open between commands.
+
+`ros2 topic pub --once` and `ros2 topic echo` start Python and wait for DDS
+discovery on every call, which takes a second or more before the first
+message goes out. This daemon starts once, keeps the /patrolCommands
+publisher and the /patrolEvents subscription open, and takes commands over a
+local HTTP API on a Unix socket (and optionally a TCP port on localhost):
+
+    POST /command            body = command text    -> publish on /patrolCommands
+    GET  /events?since=ID&limit=N                   -> JSON list of buffered events
+    GET  /events/stream?history=N                   -> text lines, new events as they arrive
+    GET  /status                                    -> JSON with counters
+
+Received events are kept in a ring buffer (--buffer entries), each with an
+increasing id so clients can ask for "everything since id X".
+
+patrol-send-command.sh and patrol-listen-to-events.sh are thin curl clients
+of this daemon. Start it with patrol-daemon.sh, or:
+
+    python3 patrolDaemon.py                  # socket /tmp/patrol-daemon-<ROS_DOMAIN_ID>.sock
+    python3 patrolDaemon.py --port 8765      # also on http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import os
+import socketserver
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import rclpy
+from rclpy.node import Node
+from example_interfaces.msg import String
+
+
+def default_socket():
+    return f"/tmp/patrol-daemon-{os.environ.get('ROS_DOMAIN_ID', '0')}.sock"
+
+
+class EventLog:
+    """Ring buffer of received events; readers can wait for new ones."""
+
+    def __init__(self, size):
+        self._events = deque(maxlen=size)
+        self._next_id = 1
+        self._cond = threading.Condition()
+
+    def add(self, data):
+        with self._cond:
+            self._events.append({"id": self._next_id, "time": time.time(), "data": data})
+            self._next_id += 1
+            self._cond.notify_all()
+
+    def since(self, event_id, limit=None):
+        with self._cond:
+            events = [e for e in self._events if e["id"] > event_id]
+        return events[-limit:] if limit else events
+
+    def wait(self, event_id, timeout):
+        """Block until there is an event newer than `event_id` (or timeout)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._next_id - 1 > event_id, timeout)
+        return self.since(event_id)
+
+    @property
+    def last_id(self):
+        with self._cond:
+            return self._next_id - 1
+
+
+class PatrolCommander(Node):
+    def __init__(self, events):
+        super().__init__("patrol_commander")
+        self.events = events
+        self.commands_sent = 0
+        self.publisher_ = self.create_publisher(String, "/patrolCommands", 10)
+        self.create_subscription(String, "/patrolEvents", self._on_event, 10)
+
+    def _on_event(self, msg):
+        self.events.add(msg.data)
+
+    def send(self, command):
+        self.publisher_.publish(String(data=command))
+        self.commands_sent += 1
+        return self.publisher_.get_subscription_count()
+
+
+def format_event(e):
+    stamp = time.strftime("%H:%M:%S", time.localtime(e["time"]))
+    return f"[{stamp}.{int(e['time'] * 1000) % 1000:03d}] #{e['id']} {e['data']}\n"
+
+
+class Handler(BaseHTTPRequestHandler):
+    # set by serve()
+    commander = None
+    started = time.time()
+
+    def log_message(self, format, *args):
+        # no access log: the client address of a Unix socket is empty anyway
+        pass
+
+    def _json(self, data, status=200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/command":
+            return self._json({"ok": False, "msg": "not found"}, 404)
+        length = int(self.headers.get("Content-Length") or 0)
+        command = self.rfile.read(length).decode().strip()
+        if not command:
+            return self._json({"ok": False, "msg": "empty command"}, 400)
+        subscribers = self.commander.send(command)
+        self._json({"ok": True, "command": command, "subscribers": subscribers})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        events = self.commander.events
+        if url.path == "/events":
+            since = int(query.get("since", 0))
+            limit = int(query["limit"]) if "limit" in query else None
+            return self._json(events.since(since, limit))
+        if url.path == "/events/stream":
+            return self._stream(int(query.get("history", 0)))
+        if url.path == "/status":
+            return self._json({
+                "uptime_s": round(time.time() - self.started, 1),
+                "ros_domain_id": os.environ.get("ROS_DOMAIN_ID", "0"),
+                "commands_sent": self.commander.commands_sent,
+                "events_received": events.last_id,
+                "command_subscribers": self.commander.publisher_.get_subscription_count(),
+                "event_publishers": self.commander.count_publishers("/patrolEvents"),
+            })
+        self._json({"ok": False, "msg": "not found"}, 404)
+
+    def _stream(self, history):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.end_headers()
+        events = self.commander.events
+        last = events.last_id
+        try:
+            for e in events.since(last - history) if history else []:
+                self.wfile.write(format_event(e).encode())
+            self.wfile.flush()
+            while True:
+                for e in events.wait(last, timeout=1.0):
+                    self.wfile.write(format_event(e).encode())
+                    last = e["id"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ("local", 0)
+
+
+def serve(commander, socket_path, port):
+    Handler.commander = commander
+    servers = []
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)  # left over from a previous run
+    servers.append(UnixHTTPServer(socket_path, Handler))
+    if port:
+        servers.append(ThreadingHTTPServer(("127.0.0.1", port), Handler))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent patrol command/event daemon.")
+    parser.add_argument("--socket", default=default_socket(), help="Unix socket path")
+    parser.add_argument("--port", type=int, default=0, help="also listen on 127.0.0.1:PORT")
+    parser.add_argument("--buffer", type=int, default=1000, help="events kept in the ring log")
+    args = parser.parse_args()
+
+    rclpy.init()
+    commander = PatrolCommander(EventLog(args.buffer))
+    servers = serve(commander, args.socket, args.port)
+    commander.get_logger().info(
+        f"patrol daemon ready on {args.socket}" + (f" and 127.0.0.1:{args.port}" if args.port else "")
+    )
+    try:
+        rclpy.spin(commander)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        commander.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# ballProcess.py
+"""Elke bal in een eigen proces, met de status in shared memory.
+
+In flaskJoystick/flaskFleet delen Flask en de controlelussen één proces en
+dus één GIL: requests afhandelen en status renderen geven jitter op de lus
+van 10 ms. ProcessFleet start per bal een proces (multiprocessing, spawn)
+dat zelf zijn joystick opent, de bal zoekt en een SpheroController draait.
+Elke 100 ms schrijft dat proces speed, heading, batterij, running en de
+timing van de lus in zijn slot van één multiprocessing.shared_memory blok.
+Flask leest die slots rechtstreeks, zonder IPC heen en weer.
+
+Een slot is een vaste struct (SLOT) met voorop een teller: oneven tijdens het
+schrijven, even daarna. De lezer leest een even teller, kopieert het slot en
+leest de teller opnieuw; is die veranderd, dan probeert hij opnieuw (seqlock),
+zo gebruikt hij nooit een half geschreven slot. Na `retries` pogingen geeft
+hij het op: een proces dat midden in een write gestopt is laat een oneven
+teller achter, zo'n slot telt als niet running.
+
+    python flaskFleet.py --processes           # fleet met een proces per bal
+
+Jitter meten, met nep ballen (fakeSphero), controllers als thread of als
+proces, met en zonder Flask belasting:
+
+    python ballProcess.py --duration 10 --players 2 --clients 4
+"""
+import argparse, math, multiprocessing, struct, threading, time
+from multiprocessing import shared_memory
+
+STATES = ("unknown", "green", "yellow", "orange", "red", "critical", "not found")
+# seq, running, state, speed, heading, speler, batterij V, lussen, p50/p99/max ms, bijgewerkt, toy naam
+SLOT = struct.Struct("<IBBhhhfQfffd16s")
+SEQ = struct.Struct("<I")
+
+
+class StatusSlots:
+    """Vaste slots in één shared memory blok; create=True in Flask, op naam in de balprocessen."""
+    def __init__(self, slots=8, name=None):
+        if name is None:
+            self.shm=shared_memory.SharedMemory(create=True, size=slots*SLOT.size); self.owner=True
+            self.shm.buf[:]=bytes(len(self.shm.buf))
+        else:
+            self.shm=shared_memory.SharedMemory(name=name); self.owner=False
+        self.name=self.shm.name; self.slots=len(self.shm.buf)//SLOT.size
+
+    def write(self, slot, running, state, speed, heading, player, voltage, loop, toy_name):
+        off=slot*SLOT.size; buf=self.shm.buf
+        seq=SEQ.unpack_from(buf, off)[0]
+        SEQ.pack_into(buf, off, seq+1)  # oneven: bezig
+        nan=float("nan"); val=lambda v: nan if v is None else v
+        SLOT.pack_into(buf, off, seq+1, int(running), STATES.index(state) if state in STATES else 0,
+                       int(speed), int(heading) % 360, int(player), val(voltage), loop.get("loops", 0),
+                       val(loop.get("p50_ms")), val(loop.get("p99_ms")), val(loop.get("max_ms")),
+                       time.time(), (toy_name or "").encode()[:16])
+        SEQ.pack_into(buf, off, seq+2)  # even: klaar
+
+    def read(self, slot, retries=100):
+        """Status van één slot, of None als er na `retries` pogingen geen heel slot te lezen was."""
+        off=slot*SLOT.size; buf=self.shm.buf
+        for _ in range(retries):
+            seq=SEQ.unpack_from(buf, off)[0]
+            if seq % 2: time.sleep(0); continue
+            raw=bytes(buf[off:off+SLOT.size])  # kopie, daarna pas controleren
+            if SEQ.unpack_from(buf, off)[0]==seq: break
+            time.sleep(0)
+        else:
+            return None
+        _, running, state, speed, heading, player, voltage, loops, p50, p99, pmax, updated, name=SLOT.unpack(raw)
+        # nog nooit geschreven (proces start nog): leeg i.p.v. nullen
+        val=lambda v: None if not seq or math.isnan(v) else round(v, 2)
+        return {"running":bool(running), "toy_name":name.rstrip(b"\0").decode() or None,
+                "player_number":player or None, "speed":speed, "heading":heading,
+                "battery_voltage":val(voltage), "battery_state":STATES[state], "ble":None,
+                "loop":{"loops":loops, "p50_ms":val(p50), "p99_ms":val(p99), "max_ms":val(pmax)},
+                "updated":updated if seq else None}
+
+    def close(self):
+        self.shm.close()
+        if self.owner: self.shm.unlink()
+
+
+def publish(slots, slot, c, state=None):
+    slots.write(slot, c.running, state or c.battery_state, c.speed, c.base_heading, c.number,
+                c.battery_voltage, c.loop_timing(), getattr(c.toy, "name", None))
+
+def ball_main(shm_name, slot, player, stop_evt, fake=False, period=0.1):
+    """Doel van het balproces: joystick openen, bal zoeken, controller draaien, status publiceren."""
+    if fake:
+        import fakeSphero; fakeSphero.install()
+    from spherov2.types import Color
+    from flaskJoystick import SpheroController
+    slots=StatusSlots(name=shm_name)
+    try:
+        if fake:
+            from controllerBenchmark import DEFAULT_SCRIPT
+            joystick=fakeSphero.ScriptedJoystick(DEFAULT_SCRIPT); joystick.start()
+            c=SpheroController(joystick, Color(255, 0, 0), player["player_number"], pump=lambda: None)
+            c.toy=fakeSphero.FakeToy(player["toy_name"]); c.toy_source="scan"
+        else:
+            import pygame
+            pygame.init(); pygame.joystick.init()
+            joystick=pygame.joystick.Joystick(int(player["joystick_id"])); joystick.init()
+            c=SpheroController(joystick, Color(255, 0, 0), player["player_number"])
+            if not c.discover_toy(player["toy_name"]):
+                slots.write(slot, False, "not found", 0, 0, player["player_number"], None, {}, player["toy_name"])
+                return
+        c.start()
+        while not stop_evt.wait(period): publish(slots, slot, c)
+        c.stop(); publish(slots, slot, c)
+    finally:
+        slots.close()
+
+
+class ProcessFleet:
+    """Zelfde interface als flaskFleet.FleetManager, maar elke bal in een eigen proces."""
+    def __init__(self, slots=8, fake=False):
+        self.status_slots=StatusSlots(slots); self.fake=fake
+        self._ctx=multiprocessing.get_context("spawn")  # geen fork van Flask/pygame threads
+        self.procs={}  # speler -> (proces, slot, stop event)
+        self.startup={}; self._lock=threading.Lock()
+
+    def start(self, players):
+        with self._lock:
+            self.stop(); t0=time.time()
+            for slot, p in enumerate(players[:self.status_slots.slots]):
+                ev=self._ctx.Event()
+                proc=self._ctx.Process(target=ball_main, args=(self.status_slots.name, slot, p, ev, self.fake),
+                                       name=f"sphero-{p['player_number']}", daemon=True)
+                proc.start(); self.procs[int(p["player_number"])]=(proc, slot, ev)
+            self.startup={"processes":len(self.procs), "spawn_s":round(time.time()-t0, 2)}
+            # welke ballen niet gevonden zijn weet elk proces zelf: battery_state "not found"
+            return []
+
+    def stop(self):
+        for proc, _, ev in self.procs.values(): ev.set()
+        for proc, _, _ in self.procs.values():
+            proc.join(timeout=5)
+            if proc.is_alive(): proc.terminate()
+        self.procs={}
+
+    def close(self):
+        self.stop(); self.status_slots.close()
+
+    @property
+    def running(self):
+        return any(proc.is_alive() for proc, _, _ in self.procs.values())
+
+    def player_status(self, player):
+        entry=self.procs.get(player)
+        if entry is None: return None
+        alive=entry[0].is_alive()
+        # dood proces: de teller verandert niet meer, één poging volstaat
+        st=self.status_slots.read(entry[1], retries=100 if alive else 1)
+        if st is None:
+            st={"running":False, "toy_name":None, "player_number":player, "speed":0, "heading":0,
+                "battery_voltage":None, "battery_state":"unknown", "ble":None, "loop":None, "updated":None}
+        st["running"]=st["running"] and alive
+        return st
+
+    def status(self):
+        return {"players":[self.player_status(n) for n in sorted(self.procs)],
+                "startup":self.startup, "mode":"processes"}
+
+
+# ---- jitter meting ----
+def _load(app, clients, stop):
+    def hammer():
+        client=app.test_client()
+        while not stop.is_set(): client.get("/status")
+    threads=[threading.Thread(target=hammer, daemon=True) for _ in range(clients)]
+    for t in threads: t.start()
+    return threads
+
+def measure(mode, players, clients, duration):
+    """Lus-periode van nep ballen als 'threads' of 'processes', met `clients` Flask load threads."""
+    from flask import Flask, jsonify, render_template_string
+    from spherov2.types import Color
+    from flaskJoystick import SpheroController
+    import fakeSphero
+    from controllerBenchmark import DEFAULT_SCRIPT
+    team=[{"toy_name":f"SB-FAK{n}", "joystick_id":n-1, "player_number":n} for n in range(1, players+1)]
+    if mode=="processes":
+        fleet=ProcessFleet(fake=True); fleet.start(team)
+        status=lambda: fleet.status()["players"]
+    else:
+        controllers=[]
+        for p in team:
+            joystick=fakeSphero.ScriptedJoystick(DEFAULT_SCRIPT); joystick.start()
+            c=SpheroController(joystick, Color(255, 0, 0), p["player_number"], pump=lambda: None)
+            c.toy=fakeSphero.FakeToy(p["toy_name"]); c.toy_source="scan"; c.start(); controllers.append(c)
+        status=lambda: [c.status() for c in controllers]
+    app=Flask(__name__)
+    page="<table>{% for p in players %}<tr><td>{{p.player_number}}</td><td>{{p.loop}}</td></tr>{% endfor %}</table>"
+    @app.route("/status")
+    def route_status():
+        players=status()
+        return jsonify(players=players, html=render_template_string(page, players=players))
+
+    time.sleep(2.0 if mode=="processes" else 0.5)  # opstarten (spawn importeert alles opnieuw)
+    stop=threading.Event(); _load(app, clients, stop)
+    time.sleep(duration)
+    players=status(); stop.set()
+    if mode=="processes": fleet.close()
+    else:
+        for c in controllers: c.stop()
+    loops=[p["loop"] for p in players if p["loop"]["loops"]]
+    worst=lambda k: max((l[k] for l in loops if l[k] is not None), default=None)
+    return {"mode":mode, "clients":clients, "p50_ms":worst("p50_ms"), "p99_ms":worst("p99_ms"), "max_ms":worst("max_ms")}
+
+def main():
+    ap=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--players", type=int, default=2)
+    ap.add_argument("--clients", type=int, default=4, help="threads die /status opvragen")
+    args=ap.parse_args()
+    import fakeSphero; fakeSphero.install()
+    print(f"{'modus':<10} {'clients':>7} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7}   (slechtste speler, periode van de lus)")
+    for mode in ("threads", "processes"):
+        for clients in (0, args.clients):
+            r=measure(mode, args.players, clients, args.duration)
+            fmt=lambda v: f"{v:>7.2f}" if v is not None else f"{'—':>7}"
+            print(f"{r['mode']:<10} {r['clients']:>7} {fmt(r['p50_ms'])} {fmt(r['p99_ms'])} {fmt(r['max_ms'])}")
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,84 @@
+# batterySampler.py
+"""Batterijspanning meten in een eigen thread, los van de controlelus.
+
+Power.get_battery_voltage is een BLE-vraag met antwoord; in de controlelus
+hield die elke 30 s de joystick even vast. BatterySampler vraagt de spanning
+op in de achtergrond en de lus kijkt enkel of er een nieuwe meting is
+(`version`), zonder ooit te wachten.
+
+Het interval past zich aan: zolang de batterij vol is en nauwelijks daalt
+wordt er weinig gemeten (max_interval), hoe sneller de spanning zakt en hoe
+dichter bij CRITICAL_V, hoe vaker (tot min_interval). De laatste metingen
+staan in `history` voor /status.
+"""
+import threading, time
+from collections import deque
+
+CRITICAL_V = 3.5
+# (ondergrens in volt, toestand) van vol naar leeg; ook de front LED in flaskJoystick volgt deze
+STATES = [(4.1, "green"), (3.9, "yellow"), (3.7, "orange"), (CRITICAL_V, "red")]
+
+def state_for(voltage):
+    if voltage is None: return "unknown"
+    for low, state in STATES:
+        if voltage > low: return state
+    return "critical"
+
+
+class BatterySampler:
+    def __init__(self, read, min_interval=5.0, max_interval=60.0, history=60, name=""):
+        self.read=read  # () -> spanning in volt (BLE)
+        self.min_interval=min_interval; self.max_interval=max_interval; self.name=name
+        self.history=deque(maxlen=history)  # (time.time(), volt)
+        self.voltage=None; self.state="unknown"
+        self.version=0  # +1 bij elke nieuwe meting
+        self.interval=min_interval
+        self._stop_evt=threading.Event(); self._thread=None; self._lock=threading.Lock()
+
+    def slope(self):
+        """Daling in V/s over de laatste metingen (negatief = zakt), of None."""
+        with self._lock: samples=list(self.history)[-6:]
+        if len(samples)<2 or samples[-1][0]-samples[0][0]<=0: return None
+        t0=samples[0][0]; n=len(samples)
+        mt=sum(t-t0 for t,_ in samples)/n; mv=sum(v for _,v in samples)/n
+        var=sum((t-t0-mt)**2 for t,_ in samples)
+        return sum((t-t0-mt)*(v-mv) for t,v in samples)/var if var else None
+
+    def next_interval(self):
+        if self.voltage is None: return self.min_interval
+        margin=max(0.0, self.voltage-CRITICAL_V)
+        # dicht bij kritiek: vaker (0.6 V = van 'green' tot kritiek)
+        interval=self.max_interval*min(1.0, margin/0.6)
+        slope=self.slope()
+        if slope is not None and slope<0:
+            # minstens ~10 metingen voor de batterij kritiek wordt
+            interval=min(interval, margin/-slope/10.0)
+        return max(self.min_interval, min(self.max_interval, interval))
+
+    def sample(self):
+        try: voltage=self.read()
+        except Exception as e: print(f"Battery read error {self.name}: {e}"); return
+        if voltage is None: return
+        with self._lock:
+            self.voltage=float(voltage); self.state=state_for(self.voltage)
+            self.history.append((time.time(), self.voltage)); self.version+=1
+
+    def _loop(self):
+        while not self._stop_evt.is_set():
+            self.sample()
+            self.interval=self.next_interval()
+            self._stop_evt.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive(): return
+        self._stop_evt.clear()
+        self._thread=threading.Thread(target=self._loop, daemon=True); self._thread.start()
+
+    def stop(self):
+        self._stop_evt.set()
+
+    def status(self):
+        with self._lock:
+            return {"battery_voltage":self.voltage, "battery_state":self.state,
+                    "battery_interval_s":round(self.interval,1),
+                    "battery_history":[[round(t,1), round(v,3)] for t,v in self.history]}
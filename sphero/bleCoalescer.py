@@ -0,0 +1,87 @@
+"""Laag tussen SpheroController en SpheroEduAPI die enkel veranderingen verstuurt.
+
+SpheroController._loop draait elke 10 ms en stuurt telkens set_heading +
+set_speed, en zolang knop 1 ingedrukt is ook de volledige matrix, ook als er
+niets veranderd is. Elk commando is een BLE-bericht. CoalescingAPI onthoudt
+wat laatst verstuurd werd (heading, snelheid, leds, matrix) en laat
+herhalingen vallen. De heading wordt lokaal bijgehouden, get_heading() gaat
+dus niet naar de bal.
+
+    ble = CoalescingAPI(api)
+    ble.set_speed(50); ble.set_speed(50)   # tweede wordt niet verstuurd
+    print(ble.stats())                     # {'sent': 1, 'suppressed': 1, ...}
+
+Alle andere methodes gaan ongewijzigd door naar de echte api.
+"""
+import threading
+from collections import Counter
+
+_UNSET = object()
+
+
+def _rgb(color):
+    return (color.r, color.g, color.b) if color is not None else None
+
+
+class CoalescingAPI:
+    def __init__(self, api, heading=0):
+        self._api = api
+        self._state = {}
+        self._heading = int(heading) % 360
+        self._lock = threading.Lock()
+        self.sent = Counter(); self.suppressed = Counter()
+
+    def _send(self, key, value, fn, *args):
+        """Stuur fn(*args) enkel als `value` verschilt van wat laatst onder `key` ging."""
+        with self._lock:
+            if self._state.get(key, _UNSET) == value:
+                self.suppressed[fn.__name__] += 1; return False
+        fn(*args)  # faalt het, dan blijft de oude toestand staan en proberen we opnieuw
+        with self._lock:
+            self._state[key] = value; self.sent[fn.__name__] += 1
+        return True
+
+    # ---- beweging ----
+    def set_heading(self, heading):
+        heading = int(heading) % 360; self._heading = heading
+        return self._send('heading', heading, self._api.set_heading, heading)
+
+    def set_speed(self, speed):
+        speed = int(speed)
+        return self._send('speed', speed, self._api.set_speed, speed)
+
+    def get_heading(self):
+        # lokaal bijgehouden i.p.v. een BLE round trip
+        with self._lock: self.suppressed['get_heading'] += 1
+        return self._heading
+
+    # ---- leds / matrix ----
+    def set_front_led(self, color):
+        return self._send('front_led', _rgb(color), self._api.set_front_led, color)
+
+    def set_back_led(self, color):
+        return self._send('back_led', _rgb(color), self._api.set_back_led, color)
+
+    def set_main_led(self, color):
+        # op een BOLT vult de main led de matrix: zelfde toestand als een karakter
+        return self._send('matrix', ('fill', _rgb(color)), self._api.set_main_led, color)
+
+    def set_matrix_character(self, character, color):
+        return self._send('matrix', ('char', character, _rgb(color)),
+                          self._api.set_matrix_character, character, color)
+
+    def invalidate(self):
+        """Vergeet alles (bv. na een reconnect): de volgende commando's gaan zeker door."""
+        with self._lock: self._state.clear()
+
+    def stats(self):
+        with self._lock:
+            sent, suppressed = sum(self.sent.values()), sum(self.suppressed.values())
+            names = sorted(set(self.sent) | set(self.suppressed))
+            return {"sent": sent, "suppressed": suppressed,
+                    "saved_percent": round(100.0 * suppressed / max(1, sent + suppressed), 1),
+                    "per_command": {n: [self.sent[n], self.suppressed[n]] for n in names}}
+
+    def __getattr__(self, name):
+        # al de rest (get_acceleration, ...) rechtstreeks naar de echte api
+        return getattr(self._api, name)
@@ -0,0 +1,162 @@
+"""Prioriteiten en een snelheidsbudget voor de BLE-commando's naar één bal.
+
+Beweging, leds, matrix, vragen en de batterijmeting gingen zo snel naar de
+bal als de lus ze maakte, in volgorde van aankomst: een matrix update kon
+een stop vertragen. BLEScheduler zit tussen CoalescingAPI en de echte api en
+laat één thread alle commando's versturen, per klasse:
+
+    SAFETY    set_speed(0)                        -- gaat altijd eerst, ook zonder budget
+    MOTION    set_heading, set_speed, roll, ...
+    QUERY     de batterijspanning (query())       -- de oproeper wacht op het antwoord
+    COSMETIC  leds, matrix
+
+De get_* van SpheroEduAPI (heading, accelerometer, ...) lezen de laatste
+waarde van de sensor stream en sturen niets over BLE: die gaan rechtstreeks
+naar de api, buiten de rij en het budget.
+
+Een token bucket (`rate` commando's per seconde, `burst` ineens) houdt het
+totaal onder wat de link aankan. Schrijven wacht niet: het commando gaat in
+de wachtrij van zijn klasse en een nieuwer commando van dezelfde soort
+vervangt een nog wachtend ouder (enkel de laatste heading telt); de sleutel
+is de naam van het commando, dus set_main_led en set_matrix_character
+(verschillende writes, op een BOLT allebei de matrix) vervangen elkaar niet,
+ze gaan in volgorde. Per klasse
+houdt stats() de wachttijd in de rij bij.
+
+    sched = BLEScheduler(api, rate=40)
+    ble = CoalescingAPI(sched)           # enkel veranderingen, dan volgens prioriteit
+    sched.on_error = ble.invalidate      # mislukt commando: volgende keer zeker opnieuw
+"""
+import threading, time
+from collections import deque
+
+SAFETY, MOTION, QUERY, COSMETIC = range(4)
+CLASS_NAMES = ("safety", "motion", "query", "cosmetic")
+MOTION_COMMANDS = {"set_heading", "set_speed", "roll", "spin", "stop_roll", "reset_aim"}
+
+
+def classify(name, args=()):
+    if name == "set_speed" and args and int(args[0]) == 0: return SAFETY
+    if name in MOTION_COMMANDS: return MOTION
+    return COSMETIC
+
+
+class _Job:
+    __slots__ = ("prio", "key", "fn", "args", "queued", "done", "result", "error")
+
+    def __init__(self, prio, key, fn, args):
+        self.prio = prio; self.key = key; self.fn = fn; self.args = args
+        self.queued = time.monotonic(); self.done = None; self.result = None; self.error = None
+
+
+class BLEScheduler:
+    def __init__(self, api, rate=40.0, burst=8, name="", query_timeout=5.0):
+        self._api = api
+        self.rate = float(rate); self.burst = float(burst); self.name = name
+        self.query_timeout = query_timeout
+        self.on_error = None  # callback() na een mislukt commando
+        self.on_sent = None   # callback(klasse, in de rij gezet, verstuurd) na elk commando, in monotonic s
+        self._queues = [deque() for _ in CLASS_NAMES]
+        self._cond = threading.Condition()
+        self._tokens = self.burst; self._refilled = time.monotonic()
+        self._sent = [0] * len(CLASS_NAMES); self._superseded = [0] * len(CLASS_NAMES)
+        self._delays = [deque(maxlen=500) for _ in CLASS_NAMES]  # wachttijd in s
+        self.errors = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, daemon=True); self._thread.start()
+
+    # ---- indienen ----
+    def submit(self, prio, key, fn, *args):
+        """Commando in de rij; voor QUERY wachten op en teruggeven van het antwoord."""
+        job = _Job(prio, key, fn, args)
+        if prio == QUERY: job.done = threading.Event()
+        with self._cond:
+            if self._closed: raise RuntimeError("BLE scheduler gesloten")
+            queue = self._queues[prio]
+            if prio != QUERY:
+                # nieuwer commando van dezelfde soort vervangt een wachtend ouder
+                for i, old in enumerate(queue):
+                    if old.key == key:
+                        del queue[i]; self._superseded[prio] += 1; break
+                if prio == SAFETY:
+                    # een stop maakt een wachtende snelheid overbodig
+                    before = len(self._queues[MOTION])
+                    self._queues[MOTION] = deque(j for j in self._queues[MOTION] if j.key != "set_speed")
+                    self._superseded[MOTION] += before - len(self._queues[MOTION])
+            queue.append(job)
+            self._cond.notify()
+        if job.done is None: return None
+        if not job.done.wait(self.query_timeout): raise TimeoutError(f"BLE {key} {self.name}: geen antwoord")
+        if job.error is not None: raise job.error
+        return job.result
+
+    def query(self, fn, *args):
+        """Willekeurige vraag (bv. Power.get_battery_voltage) met QUERY prioriteit."""
+        return self.submit(QUERY, getattr(fn, "__name__", "query"), fn, *args)
+
+    def __getattr__(self, name):
+        if name.startswith("_"): raise AttributeError(name)
+        fn = getattr(self._api, name)
+        # gecachte sensorwaarden: geen BLE, dus niet wachten in de rij
+        if not callable(fn) or name.startswith("get_"): return fn
+        def call(*args):
+            return self.submit(classify(name, args), name, fn, *args)
+        call.__name__ = name
+        return call
+
+    # ---- versturen ----
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _next_job(self):
+        """Hoogste prioriteit die mag vertrekken; wacht op werk of budget. None bij sluiten."""
+        with self._cond:
+            while True:
+                if self._closed: return None
+                prio = next((p for p, q in enumerate(self._queues) if q), None)
+                if prio is None:
+                    self._cond.wait(); continue
+                now = time.monotonic(); self._refill(now)
+                if prio != SAFETY and self._tokens < 1.0:
+                    # wakker bij een nieuw commando (misschien een stop) of als er een token is
+                    self._cond.wait((1.0 - self._tokens) / self.rate); continue
+                self._tokens -= 1.0
+                job = self._queues[prio].popleft()
+                self._delays[prio].append(now - job.queued); self._sent[prio] += 1
+                return job
+
+    def _loop(self):
+        while True:
+            job = self._next_job()
+            if job is None: return
+            try: job.result = job.fn(*job.args)
+            except Exception as e:
+                job.error = e; self.errors += 1
+                print(f"BLE {job.key} {self.name} mislukt: {e}")
+                if self.on_error: self.on_error()
+            if self.on_sent and job.error is None: self.on_sent(job.prio, job.queued, time.monotonic())
+            if job.done is not None: job.done.set()
+
+    def close(self, timeout=1.0):
+        """Stop de thread; wachtende commando's vervallen, wachtende vragen krijgen een fout."""
+        with self._cond:
+            self._closed = True
+            for queue in self._queues:
+                for job in queue:
+                    if job.done is not None:
+                        job.error = RuntimeError("BLE scheduler gesloten"); job.done.set()
+                queue.clear()
+            self._cond.notify_all()
+        if self._thread is not threading.current_thread(): self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            classes = {}
+            for p, name in enumerate(CLASS_NAMES):
+                d = sorted(self._delays[p])
+                pick = lambda q: round(1000.0 * d[min(len(d) - 1, int(q * (len(d) - 1)))], 1) if d else None
+                classes[name] = {"sent": self._sent[p], "superseded": self._superseded[p],
+                                 "pending": len(self._queues[p]),
+                                 "delay_ms": {"p50": pick(0.5), "p95": pick(0.95), "max": pick(1.0)}}
+            return {"rate": self.rate, "tokens": round(self._tokens, 1), "errors": self.errors, "classes": classes}
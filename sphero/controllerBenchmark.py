@@ -0,0 +1,111 @@
+# controllerBenchmark.py
+"""SpheroController (flaskJoystick.py) meten tegen een nep bal en een gescripte joystick.
+
+Geen BLE of USB nodig (zie fakeSphero.py). Per run:
+
+    * latency: van elke wissel in de joystick invoer tot het eerste
+      beweging/led commando dat daarna vertrekt op de bal aankomt
+      (p50/p90/p99/max in ms)
+    * commando's per seconde naar de bal, per commando
+    * iteraties van de lus per seconde en CPU van het proces (% van één kern)
+    * de tellers van de coalescing laag (verstuurd/weggelaten)
+
+Gebruik:
+    python controllerBenchmark.py --duration 10 --players 2 --write-ms 8 --query-ms 30
+"""
+import argparse, json, time
+from collections import Counter
+import fakeSphero
+
+toys=fakeSphero.install()
+from spherov2.types import Color  # noqa: E402  (na install: de nep Color)
+from flaskJoystick import SpheroController, buttons  # noqa: E402
+
+FORWARD={buttons['1']: 1}
+# stil, rechtdoor, bochten, stil; knop 3 (keert om met time.sleep(1)) blijft buiten het script
+DEFAULT_SCRIPT=[
+    (0.5, (0.0, 0.0), {}),
+    (1.0, (0.0, 0.0), FORWARD),
+    (0.5, (0.9, 0.0), FORWARD),
+    (0.5, (-0.9, 0.0), FORWARD),
+    (0.5, (0.9, 0.0), {}),
+    (0.5, (0.0, 0.0), {}),
+]
+
+
+def percentile(values, p):
+    if not values: return None
+    values=sorted(values)
+    return values[min(len(values)-1, int(round((len(values)-1)*p/100.0)))]
+
+def input_latencies(changes, log):
+    """Per invoerwissel: tijd tot het eerste niet-vraag commando dat erna vertrekt, klaar is."""
+    commands=[(sent, done) for sent, done, name, _ in log if name not in fakeSphero.QUERIES]
+    out=[]; i=0
+    for t, _ in changes:
+        while i < len(commands) and commands[i][0] < t: i+=1
+        if i < len(commands): out.append(commands[i][1]-t)
+    return out
+
+
+def run(duration=10.0, players=1, write_ms=8.0, query_ms=30.0, jitter_ms=2.0, script=DEFAULT_SCRIPT):
+    runs=[]
+    for n in range(1, players+1):
+        toy=fakeSphero.FakeToy(f"SB-FAK{n}", write_delay=write_ms/1000.0, query_delay=query_ms/1000.0,
+                               jitter=jitter_ms/1000.0)
+        toys[toy.name]=toy
+        joy=fakeSphero.ScriptedJoystick(script)
+        c=SpheroController(joy, Color(255, 0, 0), n, pump=lambda: None)
+        c.toy=toy; c.toy_source="scan"  # niet via de toy cache
+        runs.append((c, joy, toy))
+    for c, _, _ in runs: c.start()
+    deadline=time.monotonic()+5
+    while any(c.ble is None for c, _, _ in runs) and time.monotonic() < deadline: time.sleep(0.005)
+
+    cpu0=time.process_time(); t0=time.monotonic()
+    for _, joy, _ in runs: joy.start(t0); joy.reads=0
+    time.sleep(duration)
+    t1=time.monotonic(); cpu1=time.process_time()
+    reads=[joy.reads for _, joy, _ in runs]
+    for c, _, _ in runs: c.stop()
+
+    result={"duration_s":round(t1-t0, 2), "cpu_percent":round(100.0*(cpu1-cpu0)/(t1-t0), 1), "players":[]}
+    for (c, joy, toy), loops in zip(runs, reads):
+        log=[entry for entry in toy.log if t0 <= entry[0] < t1]
+        lat=[1000.0*v for v in input_latencies(joy.change_times(t1), log)]
+        per=Counter(name for _, _, name, _ in log)
+        result["players"].append({
+            "player_number":c.number,
+            "latency_ms":{k: (round(percentile(lat, p), 1) if lat else None)
+                          for k, p in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+            "input_changes":len(lat),
+            "commands_per_s":round(len(log)/(t1-t0), 1),
+            "per_command":{name: round(count/(t1-t0), 1) for name, count in per.most_common()},
+            "loops_per_s":round(loops/(t1-t0), 1),
+            "ble":c.ble.stats() if c.ble else None,
+        })
+    return result
+
+
+def main():
+    ap=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--players", type=int, default=1)
+    ap.add_argument("--write-ms", type=float, default=8.0, help="BLE tijd per commando")
+    ap.add_argument("--query-ms", type=float, default=30.0, help="BLE tijd per vraag (batterij)")
+    ap.add_argument("--jitter-ms", type=float, default=2.0)
+    ap.add_argument("--json", action="store_true", help="resultaat als JSON")
+    args=ap.parse_args()
+    r=run(args.duration, args.players, args.write_ms, args.query_ms, args.jitter_ms)
+    if args.json: print(json.dumps(r, indent=1)); return
+    print(f"{r['duration_s']} s, CPU {r['cpu_percent']}% van één kern")
+    print(f"{'speler':>6} {'p50 ms':>7} {'p90 ms':>7} {'p99 ms':>7} {'max ms':>7} {'cmd/s':>7} {'lus/s':>7} {'weggelaten':>10}")
+    for p in r["players"]:
+        lat=p["latency_ms"]; fmt=lambda v: f"{v:>7.1f}" if v is not None else f"{'—':>7}"
+        saved=f"{p['ble']['saved_percent']}%" if p["ble"] else "—"
+        print(f"{p['player_number']:>6} {fmt(lat['p50'])} {fmt(lat['p90'])} {fmt(lat['p99'])} {fmt(lat['max'])} "
+              f"{p['commands_per_s']:>7.1f} {p['loops_per_s']:>7.1f} {saved:>10}")
+        print(f"{'':>6} " + ", ".join(f"{name} {rate}/s" for name, rate in p["per_command"].items()))
+
+if __name__=="__main__":
+    main()
@@ -3,9 +3,10 @@ import time
 import sys
 from spherov2 import scanner
 from spherov2.types import Color
-from spherov2.sphero_edu import SpheroEduAPI
 from spherov2.commands.power import Power
-import math
+from toyCache import ToyCache
+from batterySampler import BatterySampler
+from motionSensors import SensorRing, HillDetector, stream_accelerometer, poll
 
 '''
 SB-9DD8 1
@@ -30,9 +31,14 @@ buttons = {
 
 
 
+# naam -> BLE-adres, zodat herstarten niet telkens moet scannen
+toy_cache = ToyCache()
+
+
 class SpheroController:
     def __init__(self, joystick, color, ball_number):
         self.toy = None
+        self.toy_source = None
         self.speed = 50
         self.heading = 0
         self.base_heading = 0
@@ -69,21 +75,13 @@ class SpheroController:
     
     def discover_toy(self, toy_name):
         try:
-            self.toy = scanner.find_toy(toy_name=toy_name)
-            print(f"Sphero toy '{toy_name}' discovered.")
+            # cached address first, full scan only if the name is not cached
+            start = time.time()
+            self.toy, self.toy_source = toy_cache.find_toy(toy_name)
+            print(f"Sphero toy '{toy_name}' discovered ({self.toy_source}, {time.time() - start:.2f} s).")
         except Exception as e:
             print(f"Error discovering toy: {e}")
 
-    def connect_toy(self):
-        if self.toy is not None:
-            try:
-                return SpheroEduAPI(self.toy)
-            except Exception as e:
-                print(f"Error connecting to toy: {e}")
-        else:
-            print("No toy discovered. Please run discover_toy() first.")
-            return None
-
     def move(self, api, heading, speed):
         api.set_heading(heading)
         api.set_speed(speed)
@@ -138,8 +136,7 @@ class SpheroController:
         else:
             print(f"Error in matrix '{self.number}'")
 
-    def print_battery_level(self, api):
-        battery_voltage = Power.get_battery_voltage(self.toy)
+    def print_battery_level(self, api, battery_voltage):
         print(f"Battery status of {self.number}: {battery_voltage} V ")
         if (battery_voltage > 4.1):
             api.set_front_led(Color(r=0, g=255, b=0))
@@ -153,9 +150,22 @@ class SpheroController:
             exit("Battery")
 
     def control_toy(self):
+        battery = None
         try:
-            with self.connect_toy() as api:
-                last_battery_print_time = time.time()
+            # falls back to a full scan when the cached address does not connect
+            with toy_cache.connected(self.toy, self.toy_source) as (self.toy, api):
+                print(f"Connected: {toy_cache.last}")
+                # battery voltage is read in the background; the loop only picks up new readings
+                battery = BatterySampler(lambda: Power.get_battery_voltage(self.toy), name=str(self.number))
+                battery.start()
+                battery_seen = 0
+                # accelerometer samples are streamed into a ring buffer instead of polled every iteration
+                accel = SensorRing()
+                hills = HillDetector(accel)
+                streaming = stream_accelerometer(self.toy, accel)
+                last_poll = 0.0
+                if not streaming:
+                    print("No sensor stream, polling the accelerometer.")
                 self.set_number(self.number)
                 self.display_number(api)
                 self.enter_calibration_mode(api, 0)
@@ -168,27 +178,15 @@ class SpheroController:
                     current_time2 = time.time()
                     gameTime = current_time2 - self.gameStartTime    
 
-                    if current_time2 - last_battery_print_time >= 30:
-                        self.print_battery_level(api)
-                        last_battery_print_time = current_time2
+                    if battery.version != battery_seen:
+                        battery_seen = battery.version
+                        self.print_battery_level(api, battery.voltage)
                                                             
-                    if self.gameOn:
-                        acceleration_data = api.get_acceleration()
-                        if acceleration_data is not None:
-                            x_acc = acceleration_data['x']
-                            z_acc = acceleration_data['z']
-                            angle = math.degrees(math.atan2(x_acc, z_acc))
-
-                            if abs(angle) >= 30:
-                                hillCounter += 1
-                                if hillCounter > 10:
-                                    seconds = (current_time2 - self.gameStartTime)
-                                    print(f"Player {self.number} going wild")
-                            else:
-                                hillCounter = 0
-                        else:
-                            print("Acceleration data is not available.")
-                    
+                    if not streaming:
+                        last_poll = poll(api, accel, last_poll)
+                    if hills.update() and self.gameOn:
+                        print(f"Player {self.number} going wild (tilt {hills.tilt:.0f} deg after {gameTime:.1f} s)")
+
                     X = self.joystick.get_axis(0)
                     Y = self.joystick.get_axis(1)
                     #for i in range(self.joystick.get_numbuttons()):
@@ -232,6 +230,8 @@ class SpheroController:
                     self.base_heading = api.get_heading()
 
         finally:
+            if battery:
+                battery.stop()
             pygame.quit()
 
 def main(toy_name=None, joystickID=0, playerID=1):
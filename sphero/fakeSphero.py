@@ -0,0 +1,173 @@
+# fakeSphero.py
+"""Nep Sphero en nep joystick: de controllers testen zonder BLE-ballen of USB joystick.
+
+    import fakeSphero; fakeSphero.install()   # vóór `import flaskJoystick`
+    from flaskJoystick import SpheroController
+
+install() zet een nep spherov2 in sys.modules (scanner, types.Color,
+sphero_edu.SpheroEduAPI, commands.power.Power) en een nep pygame als pygame
+niet geïnstalleerd is. Zet de toy rechtstreeks op de controller (niet via
+discover_toy), dan komt er niets in toy_cache.json.
+
+    * FakeToy houdt elk commando bij in `log`: (verstuurd, klaar, naam, args)
+      met time.monotonic() tijden
+    * elk commando wacht `write_delay` (de batterijspanning, een echte vraag
+      met antwoord, `query_delay`) plus wat jitter, één tegelijk per bal,
+      zoals een BLE-link
+    * get_heading, get_acceleration en de andere get_* van SpheroEduAPI
+      lezen de laatste waarde van de sensor stream: geen link, geen wachten
+    * ScriptedJoystick speelt een script af: [(seconden, assen, knoppen), ...],
+      met dezelfde get_axis/get_button interface als pygame; change_times()
+      geeft wanneer de invoer veranderde (voor latency metingen)
+
+controllerBenchmark.py gebruikt dit om SpheroController te meten.
+"""
+import random, sys, threading, time, types
+from collections import namedtuple
+
+Color = namedtuple("Color", "r g b")
+# enkel dit gaat als vraag over de link; de get_* van SpheroEduAPI lezen de sensor stream
+QUERIES = {"get_battery_voltage"}
+
+
+class FakeToy:
+    def __init__(self, name="SB-FAKE", address=None, write_delay=0.008, query_delay=0.03, jitter=0.002, voltage=4.0):
+        self.name=name; self.address=address or "FA:KE:" + name[-4:]
+        self.write_delay=write_delay; self.query_delay=query_delay; self.jitter=jitter
+        self.voltage=voltage; self.heading=0; self.speed=0
+        self.log=[]  # (verstuurd, klaar, naam, args)
+        self._link=threading.Lock()  # één commando tegelijk over de link
+        self.sensor_control=FakeSensorControl()
+
+    def command(self, name, args=(), result=None):
+        sent=time.monotonic()
+        with self._link:
+            time.sleep(max(0.0, (self.query_delay if name in QUERIES else self.write_delay)
+                              + random.uniform(-self.jitter, self.jitter)))
+            done=time.monotonic()
+        self.log.append((sent, done, name, args))
+        return result
+
+    def reset_log(self):
+        self.log=[]
+
+
+class FakeSensorControl:
+    """Zelfde vorm als toy.sensor_control; stuurt niets uit zichzelf, emit() doet dat."""
+    def __init__(self):
+        self.listeners=[]; self.interval=None
+    def add_sensor_data_listener(self, fn): self.listeners.append(fn)
+    def set_interval(self, ms): self.interval=ms
+    def enable(self, *sensors): pass
+    def emit(self, data):
+        for fn in self.listeners: fn(data)
+
+
+class FakeEduAPI:
+    """Vervangt spherov2.sphero_edu.SpheroEduAPI; elk commando gaat via FakeToy.command, get_* niet."""
+    def __init__(self, toy):
+        self.toy=toy
+    def __enter__(self):
+        self.toy.command("connect"); return self
+    def __exit__(self, *exc):
+        self.toy.command("disconnect")
+    def set_heading(self, heading):
+        self.toy.heading=int(heading) % 360; self.toy.command("set_heading", (self.toy.heading,))
+    def set_speed(self, speed):
+        self.toy.speed=int(speed); self.toy.command("set_speed", (self.toy.speed,))
+    def get_heading(self):
+        return self.toy.heading
+    def get_acceleration(self):
+        return {"x": 0.0, "y": 0.0, "z": 1.0}
+    def __getattr__(self, name):
+        # leds, matrix, ...: enkel bijhouden
+        if name.startswith("_"): raise AttributeError(name)
+        if name.startswith("get_"):
+            # andere sensoren: niets gestreamd, zoals SpheroEduAPI zonder data
+            def getter(*args): return None
+            getter.__name__=name
+            return getter
+        def command(*args): return self.toy.command(name, args)
+        command.__name__=name
+        return command
+
+
+class FakePower:
+    @staticmethod
+    def get_battery_voltage(toy):
+        return toy.command("get_battery_voltage", result=toy.voltage)
+
+
+class ScriptedJoystick:
+    """Joystick die een script afspeelt: [(duur in s, (x, y), {knop: 1}), ...], daarna herhaalt."""
+    def __init__(self, script, axes=2, buttons=10, repeat=True):
+        self.script=list(script); self.repeat=repeat
+        self.numaxes=axes; self.numbuttons=buttons
+        self.length=sum(step[0] for step in self.script)
+        self.t0=None; self.reads=0  # get_axis(0) oproepen = iteraties van de lus
+
+    def start(self, t0=None):
+        self.t0=time.monotonic() if t0 is None else t0
+
+    def step_at(self, t):
+        """Index van de stap die op tijd t (s sinds start) actief is, of None na het einde."""
+        if self.repeat and self.length > 0: t %= self.length
+        for i, (duration, _, _) in enumerate(self.script):
+            if t < duration: return i
+            t -= duration
+        return None
+
+    def change_times(self, until):
+        """Alle momenten (monotonic) waarop de invoer van stap wisselde, tot `until`."""
+        out=[]; t=self.t0; i=0
+        while t < until and self.script:
+            out.append((t, i % len(self.script)))
+            t += self.script[i % len(self.script)][0]; i += 1
+            if not self.repeat and i >= len(self.script): break
+        return out
+
+    def _current(self):
+        if self.t0 is None: return None
+        i=self.step_at(time.monotonic() - self.t0)
+        return self.script[i] if i is not None else None
+
+    def init(self): pass
+    def get_numaxes(self): return self.numaxes
+    def get_numbuttons(self): return self.numbuttons
+    def get_axis(self, i):
+        if i==0: self.reads+=1
+        step=self._current()
+        return float(step[1][i]) if step and i < len(step[1]) else 0.0
+    def get_button(self, i):
+        step=self._current()
+        return int(step[2].get(i, 0)) if step else 0
+
+
+def _module(name):
+    m=types.ModuleType(name); sys.modules[name]=m
+    return m
+
+def install(toys=None):
+    """Nep spherov2 (+ pygame indien afwezig) in sys.modules. `toys`: naam -> FakeToy voor de scanner."""
+    toys={} if toys is None else toys
+    def find_toy(toy_name=None, **kw):
+        if toy_name is None: toy_name="SB-FAKE"
+        return toys.setdefault(toy_name, FakeToy(toy_name))
+    def find_toys(toy_names=None, **kw):
+        return [find_toy(n) for n in (toy_names or list(toys) or ["SB-FAKE"])]
+
+    sp=_module("spherov2")
+    sp.scanner=_module("spherov2.scanner"); sp.scanner.find_toy=find_toy; sp.scanner.find_toys=find_toys
+    sp.types=_module("spherov2.types"); sp.types.Color=Color
+    sp.sphero_edu=_module("spherov2.sphero_edu"); sp.sphero_edu.SpheroEduAPI=FakeEduAPI
+    sp.commands=_module("spherov2.commands")
+    sp.commands.power=_module("spherov2.commands.power"); sp.commands.power.Power=FakePower
+
+    try:
+        import pygame  # noqa: F401
+    except ImportError:
+        pg=_module("pygame"); pg.init=lambda: None; pg.quit=lambda: None
+        pg.event=_module("pygame.event"); pg.event.pump=lambda: None
+        pg.joystick=_module("pygame.joystick")
+        pg.joystick.init=lambda: None; pg.joystick.get_count=lambda: 0
+    return toys
@@ -0,0 +1,244 @@
+# flaskFleet.py
+"""Alle spelers vanuit één proces: één BLE-scan, één input thread, één worker per bal.
+
+flaskJoystick.py stuurt één bal; vijf spelers betekende vijf processen die elk
+pygame starten en elk zelf een BLE-scan doen. Deze fleet manager:
+
+    * neemt ballen uit de toy cache (toyCache.py) en zoekt de rest in één
+      scanner.find_toys() pass
+    * opent elke joystick één keer; één input thread leest ze allemaal
+      (pygame.event.pump + assen/knoppen) en zet de waarden in een JoystickState
+    * start per bal een SpheroController die uit zijn JoystickState leest
+      (de controllers pompen zelf geen pygame events meer)
+    * /status geeft alle spelers, /status/<speler> één speler
+
+Met --processes draait elke bal in een eigen proces (ballProcess.py) en leest
+Flask de status uit shared memory: Flask geeft dan geen jitter op de lussen.
+
+Gebruik:
+    python flaskFleet.py [--processes]     # en surf naar http://<pc>:5000
+"""
+import argparse, time, threading, json, os
+from flask import Flask, request, redirect, url_for, render_template_string, jsonify
+import pygame
+from spherov2 import scanner
+from spherov2.types import Color
+from flaskJoystick import SpheroController, toy_cache
+
+FLEET_FILE = "fleet_settings.json"
+# toy name -> speler, zoals op de ballen gelabeld
+DEFAULT_PLAYERS = [
+    {"toy_name": "SB-9DD8", "joystick_id": 0, "player_number": 1},
+    {"toy_name": "SB-2BBE", "joystick_id": 1, "player_number": 2},
+    {"toy_name": "SB-27A5", "joystick_id": 2, "player_number": 3},
+    {"toy_name": "SB-81E0", "joystick_id": 3, "player_number": 4},
+    {"toy_name": "SB-7740", "joystick_id": 4, "player_number": 5},
+]
+
+def load_fleet():
+    if os.path.exists(FLEET_FILE):
+        with open(FLEET_FILE, "r") as f:
+            return json.load(f)
+    return [dict(p) for p in DEFAULT_PLAYERS]
+
+def save_fleet(players):
+    with open(FLEET_FILE, "w") as f:
+        json.dump(players, f)
+
+
+class JoystickState:
+    """Laatste assen/knoppen van één joystick; zelfde interface als pygame.joystick.Joystick."""
+    def __init__(self, axes=0, buttons=0):
+        self.axes=[0.0]*axes; self.buttons=[0]*buttons
+    def get_axis(self, i): return self.axes[i] if i < len(self.axes) else 0.0
+    def get_button(self, i): return self.buttons[i] if i < len(self.buttons) else 0
+    def get_numaxes(self): return len(self.axes)
+    def get_numbuttons(self): return len(self.buttons)
+
+
+class InputHub:
+    """Opent elke joystick één keer en leest ze allemaal in één thread."""
+    def __init__(self, rate=100.0):
+        pygame.init(); pygame.joystick.init()
+        self.joysticks=[pygame.joystick.Joystick(i) for i in range(pygame.joystick.get_count())]
+        for j in self.joysticks: j.init()
+        self.states=[JoystickState(j.get_numaxes(), j.get_numbuttons()) for j in self.joysticks]
+        self.period=1.0/rate; self.reads=0
+        self._stop_evt=threading.Event()
+        self._thread=threading.Thread(target=self._loop, daemon=True); self._thread.start()
+
+    def state(self, jid):
+        if not 0 <= jid < len(self.states): raise RuntimeError(f"Joystick {jid} niet gevonden ({len(self.states)} aangesloten).")
+        return self.states[jid]
+
+    def _loop(self):
+        while not self._stop_evt.is_set():
+            pygame.event.pump()
+            for j, st in zip(self.joysticks, self.states):
+                # nieuwe lijsten in één keer toewijzen: workers zien nooit een half bijgewerkte toestand
+                st.axes=[j.get_axis(i) for i in range(len(st.axes))]
+                st.buttons=[j.get_button(i) for i in range(len(st.buttons))]
+            self.reads+=1
+            time.sleep(self.period)
+
+    def stop(self):
+        self._stop_evt.set(); self._thread.join(timeout=1)
+
+
+class FleetManager:
+    def __init__(self):
+        self.inputs=None; self.controllers={}  # speler -> SpheroController
+        self.startup={}; self._lock=threading.Lock()
+
+    def start(self, players):
+        """Cache + één scan voor alle ballen, dan per bal een controller. Geeft de niet gevonden namen terug."""
+        with self._lock:
+            self.stop()
+            t0=time.time()
+            if self.inputs is None: self.inputs=InputHub()
+            # eerst alle joysticks controleren: bij een fout start geen enkele controller
+            joysticks={int(p["joystick_id"]): self.inputs.state(int(p["joystick_id"])) for p in players}
+            t1=time.time()
+            toys={p["toy_name"]: toy_cache.cached_toy(p["toy_name"]) for p in players}
+            sources={n: "cache" for n, t in toys.items() if t is not None}
+            names=[n for n, t in toys.items() if t is None]
+            if names:
+                try:
+                    found=scanner.find_toys(toy_names=names); toy_cache.remember(found)
+                    toys.update({t.name: t for t in found}); sources.update({t.name: "scan" for t in found})
+                except Exception as e: print(f"Error discovering toys: {e}")
+            t2=time.time()
+            missing=[]
+            for p in players:
+                toy=toys.get(p["toy_name"])
+                if toy is None: missing.append(p["toy_name"]); continue
+                c=SpheroController(joysticks[int(p["joystick_id"])], Color(255,0,0),
+                                   int(p["player_number"]), pump=lambda: None)
+                c.toy=toy; c.toy_source=sources[toy.name]; c.startup={"source":c.toy_source}
+                c.start()
+                self.controllers[c.number]=c
+            self.startup={"joysticks_s":round(t1-t0,2),"scan_s":round(t2-t1,2),"total_s":round(time.time()-t0,2),
+                          "found":sorted(sources),"scanned":names,"missing":missing}
+            print(f"Fleet gestart: {self.startup}")
+            return missing
+
+    def stop(self):
+        for c in self.controllers.values(): c.stop()
+        self.controllers={}
+
+    @property
+    def running(self):
+        return any(c.running for c in self.controllers.values())
+
+    def player_status(self, player):
+        c=self.controllers.get(player)
+        return c.status() if c else None
+
+    def status(self):
+        return {"players":[c.status() for _, c in sorted(self.controllers.items())],
+                "startup":self.startup,
+                "input_reads":self.inputs.reads if self.inputs else 0}
+
+
+# ---------- Flask -------------
+app=Flask(__name__)
+fleet=FleetManager()
+
+INDEX_HTML="""
+<!doctype html><html><head><meta charset="utf-8">
+<title>Sphero fleet</title>
+<style>
+body{font-family:sans-serif;margin:2rem;}table{border-collapse:collapse;margin-bottom:1rem}
+td,th{padding:.3rem .6rem;border-bottom:1px solid #ddd;text-align:left}
+.status{background:#f6f6f6;padding:.6rem;border-radius:8px;margin-bottom:1rem;line-height:1.4}
+.badge{display:inline-block;padding:.1rem .4rem;border-radius:.5rem;font-size:.85rem;border:1px solid #bbb}
+.badge.green{background:#e7f8e7;border-color:#6ac46a}.badge.yellow{background:#fff9da;border-color:#e2c000}
+.badge.orange{background:#ffe9d9;border-color:#ff8a3d}.badge.red,.badge.critical{background:#ffd9d9;border-color:#ff4d4f}
+button{padding:.5rem .7rem;margin-right:.5rem;}
+</style></head><body>
+<h1>Sphero fleet</h1>
+<div class="status" id="status">Status laden…</div>
+<form method="post" action="{{ url_for('start') }}">
+<table>
+  <tr><th>Speler</th><th>Toy name</th><th>Joystick ID</th></tr>
+  {% for p in players %}
+  <tr><td>{{p.player_number}}<input type="hidden" name="player_number" value="{{p.player_number}}"></td>
+      <td><input name="toy_name" value="{{p.toy_name}}"></td>
+      <td><input name="joystick_id" type="number" min="0" max="9" value="{{p.joystick_id}}" style="width:4rem"></td></tr>
+  {% endfor %}
+</table>
+<button type="submit">Start alle</button>
+<button formaction="{{ url_for('stop') }}" formmethod="post">Stop alle</button>
+</form>
+<script>
+async function refresh(){
+  try{
+    const j=await (await fetch("{{ url_for('status') }}")).json();
+    let html = j.startup.total_s!=null
+      ? `opstart: ${j.startup.total_s} s (scan ${j.startup.scan_s} s)` +
+        (j.startup.missing.length ? ` · niet gevonden: ${j.startup.missing.join(", ")}` : "") + "<br>"
+      : "";
+    if (j.startup.processes!=null) html = `${j.startup.processes} processen<br>`;
+    html += j.players.map(p => {
+      const batt = p.battery_voltage!=null ? p.battery_voltage.toFixed(2)+" V" : "—";
+      const ble = p.ble ? ` · BLE ${p.ble.sent}/${p.ble.sent+p.ble.suppressed}` : "";
+      const loop = p.loop && p.loop.p99_ms!=null ? ` · lus p99 ${p.loop.p99_ms} ms` : "";
+      return `speler ${p.player_number} (${p.toy_name}): running ${p.running} · ${batt}
+              <span class="badge ${p.battery_state}">${p.battery_state}</span>${ble}${loop}`;
+    }).join("<br>");
+    document.getElementById('status').innerHTML = html || "Geen spelers gestart.";
+  }catch(e){
+    document.getElementById('status').textContent='Status niet beschikbaar';
+  }}
+refresh();setInterval(refresh,2000);
+</script></body></html>
+"""
+
+@app.route("/",methods=["GET"])
+def index():
+    return render_template_string(INDEX_HTML,players=load_fleet())
+
+@app.route("/status")
+def status():
+    return jsonify(fleet.status())
+
+@app.route("/status/<int:player>")
+def player_status(player):
+    st=fleet.player_status(player)
+    if st is None: return jsonify({"error":f"speler {player} niet gestart"}),404
+    return jsonify(st)
+
+@app.route("/start",methods=["POST"])
+def start():
+    players=[{"toy_name":t.strip(),"joystick_id":int(j),"player_number":int(n)}
+             for t,j,n in zip(request.form.getlist("toy_name"),request.form.getlist("joystick_id"),
+                              request.form.getlist("player_number"))]
+    save_fleet(players)
+    players=[p for p in players if p["toy_name"]]
+    try: fleet.start(players)
+    except Exception as e: return f"Fout bij starten: {e}",400
+    return redirect(url_for('index'))
+
+@app.route("/stop",methods=["POST"])
+def stop():
+    fleet.stop()
+    return redirect(url_for('index'))
+
+if __name__=="__main__":
+    ap=argparse.ArgumentParser()
+    ap.add_argument("--processes",action="store_true",help="elke bal in een eigen proces (status via shared memory)")
+    args=ap.parse_args()
+    if args.processes:
+        from ballProcess import ProcessFleet
+        fleet=ProcessFleet()
+    else:
+        # met --processes zoekt elk balproces zelf (via de cache)
+        toy_cache.start_rescan(idle=lambda: not fleet.running)
+    # geen debug reloader: die zou pygame en de BLE-scan in een tweede proces starten
+    try: app.run(host="0.0.0.0",port=5000,debug=False,threaded=True)
+    finally:
+        if args.processes: fleet.close()
+        else:
+            fleet.stop()
+            if fleet.inputs: fleet.inputs.stop()
+        pygame.quit()
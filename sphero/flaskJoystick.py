@@ -1,14 +1,20 @@
 # app.py
 import time, math, threading, json, os
+from collections import deque
 from typing import Optional
 from flask import Flask, request, redirect, url_for, render_template_string, jsonify
 import pygame
-from spherov2 import scanner
 from spherov2.types import Color
-from spherov2.sphero_edu import SpheroEduAPI
 from spherov2.commands.power import Power
+from bleCoalescer import CoalescingAPI
+from bleScheduler import BLEScheduler
+from toyCache import ToyCache
+from batterySampler import BatterySampler, CRITICAL_V, state_for
+from phoneGamepad import PhoneJoystick, HAVE_SOCK, add_routes as add_pad_routes
 
 SETTINGS_FILE = "last_settings.json"
+# naam -> BLE-adres, naast SETTINGS_FILE (toy_cache.json)
+toy_cache = ToyCache()
 
 def load_settings():
     if os.path.exists(SETTINGS_FILE):
@@ -21,33 +27,46 @@ def save_settings(data):
         json.dump(data, f)
 
 buttons = {'1':0,'2':1,'3':2,'4':3,'L1':4,'L2':6,'R1':5,'R2':7,'SELECT':8,'START':9}
+# BLE-budget per bal (commando's/s); een stop gaat altijd meteen
+BLE_RATE = 40
+# front LED per batterijtoestand (drempels in batterySampler.STATES)
+BATTERY_LEDS = {"green":Color(0,255,0), "yellow":Color(255,255,0), "orange":Color(255,100,0),
+                "red":Color(255,0,0), "critical":Color(255,0,0)}
 
 class SpheroController:
-    def __init__(self, joystick, color: Color, ball_number: int):
-        self.toy=None; self.speed=50; self.heading=0; self.base_heading=0
+    def __init__(self, joystick, color: Color, ball_number: int, pump=None, sleep=None):
+        self.toy=None; self.toy_source=None; self.speed=50; self.heading=0; self.base_heading=0
         self.calibration_mode=False; self.joystick=joystick
+        # pygame events verwerken; de fleet manager doet dat centraal en geeft een no-op mee
+        self._pump=pump or pygame.event.pump
+        # wachten in de lus; een replay (joystickLog.py) geeft zijn eigen klok mee
+        self._sleep=sleep or time.sleep
         self.color=color; self.number=int(ball_number)
         self.gameOn=False; self.hillCounter=0
         self._stop_evt=threading.Event(); self._thread=None; self._api_ctx=None
+        self.ble:Optional[CoalescingAPI]=None  # stuurt enkel veranderingen naar de bal
+        self.sched:Optional[BLEScheduler]=None  # prioriteit + budget tussen ble en de bal
+        self.startup={}  # cache of scan, zoek- en verbindingstijd
+        self.loop_periods=deque(maxlen=1000)  # duur van de laatste iteraties (s), voor jitter
 
         # --- Battery state ---
-        self._last_batt_check = 0.0
+        # gemeten in de achtergrond door BatterySampler; de lus past enkel nieuwe metingen toe
+        self.battery: Optional[BatterySampler] = None
+        self._batt_seen = 0
         self.battery_voltage: Optional[float] = None
         self.battery_state: str = "unknown"  # green/yellow/orange/red/critical/unknown
 
     def discover_toy(self,toy_name:str)->bool:
         try:
-            self.toy=scanner.find_toy(toy_name=toy_name)
-            print(f"Sphero '{toy_name}' gevonden."); return True
+            # eerst het adres uit de cache (geen scan), anders een volledige scan
+            t0=time.time()
+            self.toy,self.toy_source=toy_cache.find_toy(toy_name)
+            self.startup={"source":self.toy_source,"discover_s":round(time.time()-t0,2)}
+            if self.toy is None: print(f"Sphero '{toy_name}' niet gevonden."); return False
+            print(f"Sphero '{toy_name}' gevonden ({self.toy_source})."); return True
         except Exception as e:
             print(f"Error discovering toy: {e}"); return False
 
-    def connect_toy(self):
-        if self.toy:
-            try: return SpheroEduAPI(self.toy)
-            except Exception as e: print(f"Error connecting: {e}")
-        return None
-
     def move(self,api,heading,speed):
         api.set_heading(heading%360); api.set_speed(speed)
 
@@ -60,56 +79,54 @@ class SpheroController:
         """
         Zet front LED volgens de spanning en update state string.
         """
-        # Drempels zoals in je voorbeeldscript
-        # >4.1V = groen; 3.9-4.1 = geel; <3.9 = oranje; <3.7 = rood; <3.5 = critical stop
+        # >4.1V = groen; 3.9-4.1 = geel; 3.7-3.9 = oranje; 3.5-3.7 = rood; <=3.5 = critical stop
+        self.battery_state = state_for(voltage)
         try:
-            if voltage > 4.1:
-                api.set_front_led(Color(0, 255, 0)); self.battery_state = "green"
-            elif 3.9 < voltage <= 4.1:
-                api.set_front_led(Color(255, 255, 0)); self.battery_state = "yellow"
-            elif 3.7 < voltage <= 3.9:
-                api.set_front_led(Color(255, 100, 0)); self.battery_state = "orange"
-            elif 3.5 < voltage <= 3.7:
-                api.set_front_led(Color(255, 0, 0)); self.battery_state = "red"
-            else:
-                # <= 3.5V -> critical
-                api.set_front_led(Color(255, 0, 0)); self.battery_state = "critical"
+            api.set_front_led(BATTERY_LEDS[self.battery_state])
         except Exception as e:
             print(f"LED update error: {e}")
 
-    def _check_battery(self, api):
+    def _apply_battery(self, api):
         """
-        Vraagt batterijspanning op en past LED/drempels toe. Roept stop aan bij critical.
+        Past een nieuwe meting van de sampler toe (LED, stop bij critical). Wacht nooit op de bal.
         """
-        try:
-            voltage = Power.get_battery_voltage(self.toy)
-            self.battery_voltage = float(voltage) if voltage is not None else None
-            if self.battery_voltage is not None:
-                print(f"Battery {self.number}: {self.battery_voltage:.2f} V")
-                self._update_battery_led(api, self.battery_voltage)
-                # Veilig stoppen bij kritieke spanning
-                if self.battery_voltage <= 3.5:
-                    print("Batterij kritiek (<3.5V). Controller wordt gestopt.")
-                    self.stop()
-            else:
-                self.battery_state = "unknown"
-        except Exception as e:
-            print(f"Battery read error: {e}")
+        b = self.battery
+        if b is None or b.version == self._batt_seen: return
+        self._batt_seen = b.version
+        self.battery_voltage = b.voltage
+        print(f"Battery {self.number}: {self.battery_voltage:.2f} V (volgende meting over {b.interval:.0f} s)")
+        self._update_battery_led(api, self.battery_voltage)
+        # Veilig stoppen bij kritieke spanning
+        if self.battery_voltage <= CRITICAL_V:
+            print(f"Batterij kritiek (<{CRITICAL_V}V). Controller wordt gestopt.")
+            self._stop_evt.set()
 
     def _loop(self):
-        api=self.connect_toy()
-        if api is None: return
-        self._api_ctx=api
+        if not self.toy: return
         try:
-            with api:
+            # lukt verbinden met een gecached adres niet, dan scant connected() alsnog
+            with toy_cache.connected(self.toy,self.toy_source,self.startup) as (self.toy,raw):
+                self._api_ctx=raw
+                print(f"Sphero {self.number} verbonden: {self.startup}")
+                # alles via de coalescing laag: herhaalde commando's gaan niet over BLE,
+                # de rest volgens prioriteit (stop > beweging > vragen > leds) binnen BLE_RATE
+                self.sched=BLEScheduler(raw,rate=BLE_RATE,name=str(self.number))
+                api=self.ble=CoalescingAPI(self.sched)
+                self.sched.on_error=api.invalidate
+                # telefoon: latency per bericht tot het commando verstuurd is
+                self.sched.on_sent=getattr(self.joystick,"ble_sent",None)
                 # Toon speler-nummer op matrix
                 self.display_number(api)
-                # Initiele battery check meteen bij start
-                self._check_battery(api)
-                self._last_batt_check = time.time()
+                # Batterij meten in de achtergrond (eerste meting meteen)
+                self.battery = BatterySampler(lambda: self.sched.query(Power.get_battery_voltage, self.toy), name=str(self.number))
+                self.battery.start()
 
+                last=None
                 while not self._stop_evt.is_set():
-                    pygame.event.pump()
+                    now=time.monotonic()
+                    if last is not None: self.loop_periods.append(now-last)
+                    last=now
+                    self._pump()
                     X=self.joystick.get_axis(0); Y=self.joystick.get_axis(1)
 
                     # Snelheid presets + nummerkleur opnieuw tonen
@@ -130,7 +147,7 @@ class SpheroController:
                     if self.joystick.get_button(buttons['3']):
                         self.speed, self.color=(100,Color(255,100,0)); self.display_number(api)
                         self.move(api,self.base_heading+180,self.speed)
-                        time.sleep(1.0)  # even wachten zodat niet te snel meerdere keren triggeren
+                        self._sleep(1.0)  # even wachten zodat niet te snel meerdere keren triggeren
                         self.move(api,self.base_heading,self.speed)
 
                     # Besturing
@@ -142,22 +159,27 @@ class SpheroController:
                         self.move(api,self.base_heading-35,self.speed)
                     #else: api.set_speed(0)
 
-                    # Heading bijhouden
-                    try: self.base_heading=api.get_heading()
-                    except Exception: pass
+                    # Heading bijhouden (lokaal in de coalescing laag, geen BLE)
+                    self.base_heading=api.get_heading()
 
-                    # Elke 30s batterij-status updaten
-                    now = time.time()
-                    if now - self._last_batt_check >= 30.0:
-                        self._check_battery(api)
-                        self._last_batt_check = now
+                    # Nieuwe batterijmeting? (enkel kijken, nooit wachten)
+                    self._apply_battery(api)
 
-                    time.sleep(0.01)
+                    self._sleep(0.01)
+        except Exception as e:
+            # _api_ctx is pas gezet als connected() gelukt is
+            if self._api_ctx is None: print(f"Error connecting: {e}")
+            else: print(f"Error in control loop of Sphero {self.number}: {e!r}")
         finally:
+            # eerst de scheduler stil, dan heeft de stop de link voor zich alleen
+            if self.sched: self.sched.close()
             try:
                 if self._api_ctx: self._api_ctx.set_speed(0)
             except Exception: pass
             self._api_ctx=None
+            if self.battery: self.battery.stop()
+            if self.ble: print(f"BLE {self.number}: {self.ble.stats()}")
+            if self.sched: print(f"BLE wachtrij {self.number}: {self.sched.stats()}")
 
     def start(self):
         if self._thread and self._thread.is_alive(): return
@@ -168,17 +190,52 @@ class SpheroController:
     def stop(self):
         self._stop_evt.set()
         try:
-            if self._api_ctx: self._api_ctx.set_speed(0)
+            # via de scheduler springt de stop voor alles wat nog wacht
+            if self._api_ctx: (self.sched or self._api_ctx).set_speed(0)
         except Exception: pass
-        if self._thread and self._thread.is_alive(): self._thread.join(timeout=3)
+        # vanuit de lus zelf (bv. joystickLog replay aan het einde): die stopt na deze iteratie
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=3)
 
     @property
     def running(self): return bool(self._thread and self._thread.is_alive())
 
+    def loop_timing(self):
+        """Periode van de lus in ms (p50/p99/max) over de laatste iteraties."""
+        d=sorted(self.loop_periods)
+        if not d: return {"loops":0,"p50_ms":None,"p99_ms":None,"max_ms":None}
+        pick=lambda q: round(1000.0*d[min(len(d)-1,int(q*(len(d)-1)))],2)
+        return {"loops":len(d),"p50_ms":pick(0.5),"p99_ms":pick(0.99),"max_ms":pick(1.0)}
+
+    def status(self):
+        batt=self.battery.status() if self.battery else {}
+        return {
+            "running":self.running,
+            "toy_name":getattr(self.toy,"name",None),
+            "player_number":self.number,
+            # batterij info naar de UI
+            "battery_voltage":self.battery_voltage,
+            "battery_state":self.battery_state,
+            # verstuurde vs. weggelaten BLE-commando's
+            "ble":self.ble.stats() if self.ble else None,
+            # wachttijd per prioriteitsklasse
+            "ble_queue":self.sched.stats() if self.sched else None,
+            "startup":self.startup,
+            # laatste metingen + huidig meetinterval
+            "battery_interval_s":batt.get("battery_interval_s"),
+            "battery_history":batt.get("battery_history",[]),
+            # periode van de controlelus (jitter)
+            "loop":self.loop_timing(),
+        }
+
 # ---------- Flask -------------
 app=Flask(__name__)
 controller:Optional[SpheroController]=None
 joystick_obj=None
+# joystick_id -1: telefoon als joystick via WebSocket (/pad/<speler>)
+PHONE_JOYSTICK=-1
+phones={}  # speler -> PhoneJoystick
+add_pad_routes(app,phones.get,button_go=buttons['1'],button_back=buttons['3'])
 
 def init_pygame_and_joystick(jid:int):
     global joystick_obj
@@ -210,6 +267,7 @@ button{padding:.5rem .7rem;margin-right:.5rem;}
     <select name="joystick_id">
       <option value="0" {% if joystick_id==0 %}selected{% endif %}>0</option>
       <option value="1" {% if joystick_id==1 %}selected{% endif %}>1</option>
+      {% if have_sock %}<option value="-1" {% if joystick_id==-1 %}selected{% endif %}>telefoon</option>{% endif %}
     </select>
   </label>
   <label>Speler #
@@ -235,7 +293,19 @@ async function refresh(){
       `running: ${j.running} <br>
        toy: ${j.toy_name||'—'} <br>
        speler: ${j.player_number||'—'} <br>
-       <span class="batt">batterij:</span> ${batt} ${badge}`;
+       <span class="batt">batterij:</span> ${batt} ${badge}` +
+      (j.battery_history.length>1 ? ` (${j.battery_history.length} metingen, ` +
+        `${(j.battery_history[j.battery_history.length-1][1]-j.battery_history[0][1]).toFixed(2)} V, ` +
+        `interval ${j.battery_interval_s} s)` : "") +
+      (j.startup && j.startup.source ? `<br>opstart: ${j.startup.source}, zoeken ${j.startup.discover_s} s` +
+        (j.startup.connect_s!=null ? `, verbinden ${j.startup.connect_s} s` : "") : "") +
+      (j.ble ? `<br>BLE: ${j.ble.sent} verstuurd, ${j.ble.suppressed} weggelaten (${j.ble.saved_percent}%)` : "") +
+      (j.phone ? `<br>telefoon: <a href="/pad/${j.player_number}">/pad/${j.player_number}</a> · ` +
+        (j.phone.connected ? `${j.phone.rate_hz} Hz, latency ${j.phone.total_ms.p50} ms ` +
+          `(net ${j.phone.net_ms.p50}, lus ${j.phone.wait_ms.p50}, ble ${j.phone.send_ms.p50}), ` +
+          `${j.phone.stale+j.phone.superseded} oud, ${j.phone.malformed} onleesbaar` : "niet verbonden") : "") +
+      (j.ble_queue ? "<br>wachtrij p95: " + Object.entries(j.ble_queue.classes)
+        .map(([k,c]) => `${k} ${c.delay_ms.p95!=null ? c.delay_ms.p95+" ms" : "—"}`).join(", ") : "");
   }catch(e){
     document.getElementById('status').textContent='Status niet beschikbaar';
   }}
@@ -246,19 +316,18 @@ refresh();setInterval(refresh,2000);
 @app.route("/",methods=["GET"])
 def index():
     s=load_settings()
-    return render_template_string(INDEX_HTML,**s)
+    return render_template_string(INDEX_HTML,have_sock=HAVE_SOCK,**s)
 
 @app.route("/status")
 def status():
     global controller
-    return jsonify({
-        "running":bool(controller and controller.running),
-        "toy_name":getattr(controller.toy,"name",None) if controller else None,
-        "player_number":controller.number if controller else None,
-        # batterij info naar de UI
-        "battery_voltage":controller.battery_voltage if controller else None,
-        "battery_state":controller.battery_state if controller else "unknown",
-    })
+    if controller:
+        st=controller.status()
+        if isinstance(controller.joystick,PhoneJoystick): st["phone"]=controller.joystick.stats()
+        return jsonify(st)
+    return jsonify({"running":False,"toy_name":None,"player_number":None,
+                    "battery_voltage":None,"battery_state":"unknown","ble":None,"ble_queue":None,"startup":{},
+                    "battery_interval_s":None,"battery_history":[],"loop":None})
 
 @app.route("/start",methods=["POST"])
 def start():
@@ -266,11 +335,16 @@ def start():
     toy_name=request.form["toy_name"].strip()
     jid=int(request.form["joystick_id"]); pn=int(request.form["player_number"])
     save_settings({"toy_name":toy_name,"joystick_id":jid,"player_number":pn})
-    try:
-        if joystick_obj is None: init_pygame_and_joystick(jid)
-    except Exception as e: return f"Joystick fout: {e}",400
+    if jid==PHONE_JOYSTICK:
+        # geen pygame: de lus wacht op berichten van de telefoon i.p.v. te pollen
+        phone=phones[pn]=PhoneJoystick()
+    else:
+        try:
+            if joystick_obj is None: init_pygame_and_joystick(jid)
+        except Exception as e: return f"Joystick fout: {e}",400
     if controller and controller.running: controller.stop()
-    controller=SpheroController(joystick_obj,Color(255,0,0),pn)
+    if jid==PHONE_JOYSTICK: controller=SpheroController(phone,Color(255,0,0),pn,pump=phone.pump,sleep=phone.sleep)
+    else: controller=SpheroController(joystick_obj,Color(255,0,0),pn)
     if not controller.discover_toy(toy_name): return "Sphero niet gevonden.",404
     controller.start(); return redirect(url_for('index'))
 
@@ -281,6 +355,11 @@ def stop():
     return redirect(url_for('index'))
 
 if __name__=="__main__":
+    # cache vers houden zolang er niet gespeeld wordt; enkel in het proces dat
+    # serveert: de debug reloader draait dit ook in zijn bewakend proces, waar
+    # controller altijd None is en de scan dus midden in een spel zou lopen
+    if os.environ.get("WERKZEUG_RUN_MAIN")=="true":
+        toy_cache.start_rescan(idle=lambda: not (controller and controller.running))
     try: app.run(host="0.0.0.0",port=5000,debug=True)
     finally:
         if controller: controller.stop()
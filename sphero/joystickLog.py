@@ -0,0 +1,195 @@
+# joystickLog.py
+"""Joystick invoer van een spel opnemen in een compact binair bestand en later afspelen.
+
+RecordingJoystick zit tussen SpheroController en de echte joystick: bij elke
+pump() (het begin van een iteratie van _loop) leest hij alle assen en knoppen
+één keer, de controller ziet tijdens die iteratie precies die waarden. Enkel
+als er iets veranderd is komt er een record in het bestand.
+
+Formaat (little endian):
+    header  "SPJL", versie (B), aantal assen (B), aantal knoppen (B), starttijd (d, time.time())
+    record  delta in µs sinds het vorige record (I), assen * 32767 (h per as), knoppen als bitmask (I)
+Met 2 assen is een record 12 bytes.
+
+ReplayJoystick speelt zo'n bestand af met een eigen, virtuele klok: die loopt
+enkel verder via sleep(), die de controller als `sleep` meekrijgt. Welke
+invoer de controller in welke iteratie ziet hangt dus niet af van BLE of CPU
+en is bij elke replay gelijk. `speed` versnelt het echte wachten (10 = tien
+keer sneller, inf = niet wachten). Is de log op, dan stopt ReplayJoystick de
+controller zelf (`on_done`).
+
+Let op: de virtuele klok telt enkel de sleeps, niet de tijd die een iteratie
+aan BLE en rekenen besteedt. Met een echte bal duurt een replay daardoor
+langer dan het spel en komt elke invoer wat later dan in de opname. Met
+`realtime=True` (replay met --toy) telt ReplayJoystick die tijd wel mee; dan
+is de replay niet meer bij elke run gelijk.
+
+    python joystickLog.py record SB-9DD8 spel.spjl --joystick 0 --player 1
+    python joystickLog.py replay spel.spjl --speed 10            # nep bal (fakeSphero)
+    python joystickLog.py replay spel.spjl --toy SB-9DD8         # echte bal
+    python joystickLog.py info spel.spjl
+"""
+import argparse, os, struct, sys, time
+
+MAGIC = b"SPJL"
+VERSION = 1
+HEADER = struct.Struct("<4sBBBd")
+MAX_DELTA_US = 2**32 - 1
+
+
+def _record_struct(naxes):
+    return struct.Struct(f"<I{naxes}hI")
+
+def _mask(buttons):
+    return sum(1 << i for i, b in enumerate(buttons) if b)
+
+def read_log(path):
+    """(header dict, [(t in s sinds start, assen, knoppen bitmask), ...])"""
+    with open(path, "rb") as f: data=f.read()
+    magic, version, naxes, nbuttons, started=HEADER.unpack_from(data)
+    if magic!=MAGIC or version!=VERSION: raise ValueError(f"{path}: geen joystick log (versie {VERSION})")
+    rec=_record_struct(naxes); records=[]; t=0
+    for off in range(HEADER.size, len(data) - rec.size + 1, rec.size):
+        delta, *rest=rec.unpack_from(data, off)
+        t+=delta
+        records.append((t / 1e6, tuple(a / 32767.0 for a in rest[:naxes]), rest[naxes]))
+    return {"axes":naxes, "buttons":nbuttons, "started":started}, records
+
+
+class RecordingJoystick:
+    """Wrapper rond een pygame joystick die elke nieuwe toestand naar `path` schrijft."""
+    def __init__(self, joystick, path, pump=None):
+        if pump is None:
+            import pygame; pump=pygame.event.pump
+        self.joystick=joystick; self._pump=pump
+        self.naxes=joystick.get_numaxes(); self.nbuttons=min(32, joystick.get_numbuttons())
+        self.axes=[0.0]*self.naxes; self.buttons=[0]*self.nbuttons
+        self._rec=_record_struct(self.naxes); self._last=None; self.records=0
+        self._f=open(path, "wb")
+        self._f.write(HEADER.pack(MAGIC, VERSION, self.naxes, self.nbuttons, time.time()))
+        self._t=time.monotonic()
+
+    def pump(self):
+        """Als `pump` aan SpheroController geven: events verwerken, toestand lezen en zo nodig opnemen."""
+        self._pump()
+        self.axes=[self.joystick.get_axis(i) for i in range(self.naxes)]
+        self.buttons=[self.joystick.get_button(i) for i in range(self.nbuttons)]
+        raw=tuple(max(-32767, min(32767, int(round(a * 32767)))) for a in self.axes)
+        state=(raw, _mask(self.buttons))
+        if state==self._last or self._f.closed: return
+        now=time.monotonic()
+        delta=min(MAX_DELTA_US, int((now - self._t) * 1e6))
+        self._f.write(self._rec.pack(delta, *raw, state[1]))
+        self._t+=delta / 1e6; self._last=state; self.records+=1
+
+    def close(self):
+        if not self._f.closed: self._f.close()
+
+    def get_axis(self, i): return self.axes[i] if i < self.naxes else 0.0
+    def get_button(self, i): return self.buttons[i] if i < self.nbuttons else 0
+    def get_numaxes(self): return self.naxes
+    def get_numbuttons(self): return self.nbuttons
+    def init(self): pass
+
+
+class ReplayJoystick:
+    """Speelt een log af op een virtuele klok; geef `pump` en `sleep` mee aan SpheroController.
+
+    on_done() wordt één keer opgeroepen (vanuit pump) als de log op is, bv. controller.stop."""
+    def __init__(self, path, speed=1.0, realtime=False, on_done=None):
+        self.header, self.records=read_log(path)
+        self.naxes=self.header["axes"]; self.nbuttons=self.header["buttons"]
+        self.speed=speed; self.realtime=realtime; self.on_done=on_done
+        self.t=0.0; self._i=0; self._woke=None
+        self.axes=[0.0]*self.naxes; self.mask=0
+
+    @property
+    def duration(self): return self.records[-1][0] if self.records else 0.0
+
+    @property
+    def done(self): return self._i >= len(self.records) and self.t >= self.duration
+
+    def sleep(self, seconds):
+        if self.realtime and self._woke is not None and self.speed < float("inf"):
+            # BLE en rekenen sinds de vorige sleep, in speltijd
+            self.t+=(time.monotonic() - self._woke) * self.speed
+        self.t+=seconds
+        if self.speed > 0: time.sleep(seconds / self.speed)
+        self._woke=time.monotonic()
+
+    def pump(self):
+        while self._i < len(self.records) and self.records[self._i][0] <= self.t:
+            _, self.axes, self.mask=self.records[self._i]; self._i+=1
+        if self.on_done is not None and self.done:
+            on_done, self.on_done=self.on_done, None; on_done()
+
+    def get_axis(self, i): return self.axes[i] if i < self.naxes else 0.0
+    def get_button(self, i): return (self.mask >> i) & 1
+    def get_numaxes(self): return self.naxes
+    def get_numbuttons(self): return self.nbuttons
+    def init(self): pass
+
+
+# ---- CLI ----
+def _run(controller, until):
+    controller.start()
+    try:
+        while controller.running and not until(): time.sleep(0.05)
+    except KeyboardInterrupt: pass
+    finally: controller.stop()
+
+def record(args):
+    import pygame
+    from flaskJoystick import SpheroController, toy_cache
+    from spherov2.types import Color
+    pygame.init(); pygame.joystick.init()
+    if pygame.joystick.get_count()==0: sys.exit("Geen joystick gevonden.")
+    js=pygame.joystick.Joystick(args.joystick); js.init()
+    rec=RecordingJoystick(js, args.file, pump=pygame.event.pump)
+    c=SpheroController(rec, Color(255, 0, 0), args.player, pump=rec.pump)
+    if not c.discover_toy(args.toy): sys.exit(f"Sphero '{args.toy}' niet gevonden.")
+    print("Opnemen, Ctrl-C om te stoppen.")
+    try: _run(c, lambda: False)
+    finally:
+        rec.close(); pygame.quit()
+        print(f"{rec.records} records, {os.path.getsize(args.file)} bytes in {args.file}")
+
+def replay(args):
+    if args.toy is None:
+        import fakeSphero; fakeSphero.install()
+    from flaskJoystick import SpheroController
+    from spherov2.types import Color
+    joy=ReplayJoystick(args.file, speed=args.speed, realtime=args.toy is not None)
+    c=SpheroController(joy, Color(255, 0, 0), args.player, pump=joy.pump, sleep=joy.sleep)
+    joy.on_done=c.stop  # de lus stopt zelf, niet pas bij de volgende controle van _run
+    if args.toy is None:
+        import fakeSphero
+        c.toy=fakeSphero.FakeToy("SB-FAKE", write_delay=0.0, query_delay=0.0, jitter=0.0); c.toy_source="scan"
+    elif not c.discover_toy(args.toy): sys.exit(f"Sphero '{args.toy}' niet gevonden.")
+    t0=time.monotonic()
+    _run(c, lambda: joy.done)
+    wall=time.monotonic() - t0
+    print(f"{joy.duration:.1f} s spel in {wall:.1f} s afgespeeld ({joy.duration / max(wall, 1e-9):.1f}x)")
+    if c.ble: print(f"BLE: {c.ble.stats()}")
+
+def info(args):
+    header, records=read_log(args.file)
+    print(f"{args.file}: {len(records)} records, {records[-1][0] if records else 0:.1f} s, "
+          f"{header['axes']} assen, {header['buttons']} knoppen, {os.path.getsize(args.file)} bytes, "
+          f"opgenomen {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(header['started']))}")
+
+def main():
+    ap=argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub=ap.add_subparsers(dest="cmd", required=True)
+    p=sub.add_parser("record"); p.add_argument("toy"); p.add_argument("file")
+    p.add_argument("--joystick", type=int, default=0); p.add_argument("--player", type=int, default=1)
+    p.set_defaults(fn=record)
+    p=sub.add_parser("replay"); p.add_argument("file"); p.add_argument("--toy", help="echte bal; zonder: nep bal")
+    p.add_argument("--speed", type=float, default=1.0, help="1 = echte tijd, 10 = tien keer sneller, inf = niet wachten")
+    p.add_argument("--player", type=int, default=1)
+    p.set_defaults(fn=replay)
+    p=sub.add_parser("info"); p.add_argument("file"); p.set_defaults(fn=info)
+    args=ap.parse_args(); args.fn(args)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,90 @@
+# motionSensors.py
+"""Accelerometer via de sensor stream in een NumPy ringbuffer, met heuvel/kantel detectie.
+
+driveWithJoystick vroeg in elke iteratie van de lus api.get_acceleration() op
+en telde iteraties boven 30 graden. Nu:
+
+    * stream_accelerometer() luistert mee op de sensor stream van de toy
+      (toy.sensor_control, de stream die SpheroEduAPI al elke 150 ms
+      ontvangt); elke meting gaat in een SensorRing. Er gaat niets extra
+      over BLE: het interval blijft staan, want set_interval() zet de
+      stream van alle sensoren (9 op een BOLT) op dat interval
+    * SensorRing is een NumPy array van vaste grootte (tijd, x, y, z); de BLE
+      thread schrijft, de controlelus leest
+    * HillDetector rekent de hoek van alle metingen in een tijdvenster in
+      één keer uit; de bal staat op een heuvel als alle metingen van de
+      laatste `hold` seconden steiler zijn dan `angle`
+
+Heeft de toy geen sensor stream, dan vult poll() de ring met
+api.get_acceleration(), hoogstens elke `interval` seconden.
+"""
+import threading, time
+import numpy as np
+
+
+class SensorRing:
+    def __init__(self, size=512):
+        self.data=np.zeros((size, 4))  # time.monotonic(), x, y, z
+        self.count=0  # totaal aantal geschreven metingen
+        self._lock=threading.Lock()
+
+    def push(self, t, x, y, z):
+        with self._lock:
+            self.data[self.count % len(self.data)]=(t, x, y, z); self.count+=1
+
+    def latest(self, n):
+        """Laatste n metingen, oudste eerst."""
+        with self._lock:
+            n=min(n, self.count, len(self.data))
+            return self.data[np.arange(self.count-n, self.count) % len(self.data)]
+
+    def window(self, seconds, now=None):
+        """Metingen van de laatste `seconds` seconden, oudste eerst."""
+        rows=self.latest(len(self.data))
+        now=time.monotonic() if now is None else now
+        return rows[rows[:, 0] >= now-seconds]
+
+
+def stream_accelerometer(toy, ring, interval_ms=None):
+    """Zet de sensor stream van `toy` in `ring`. False als de toy geen stream heeft.
+
+    Met `interval_ms` wordt het interval van de hele stream aangepast, niet
+    enkel dat van de accelerometer: sneller betekent meer BLE-verkeer."""
+    control=getattr(toy, "sensor_control", None)
+    if control is None: return False
+    def on_data(data):
+        acc=data.get("accelerometer")
+        if acc: ring.push(time.monotonic(), acc["x"], acc["y"], acc["z"])
+    control.add_sensor_data_listener(on_data)
+    if interval_ms: control.set_interval(interval_ms)
+    return True
+
+def poll(api, ring, last, interval=0.15):
+    """Zonder stream: één get_acceleration() per `interval` (zo vaak ververst SpheroEduAPI). Geeft de nieuwe `last` terug."""
+    now=time.monotonic()
+    if now-last < interval: return last
+    acc=api.get_acceleration()
+    if acc is not None: ring.push(now, acc["x"], acc["y"], acc["z"])
+    return now
+
+
+class HillDetector:
+    def __init__(self, ring, angle=30.0, hold=0.5, min_samples=3):  # 0.5 s = 3 à 4 metingen van 150 ms
+        self.ring=ring
+        self.angle=angle  # graden kanteling (atan2(x, z)) die als heuvel telt
+        self.hold=hold    # zo lang moet de kanteling duren
+        self.min_samples=min_samples
+        self.on_hill=False; self.tilt=None  # laatste hoek in graden
+        self._seen=0
+
+    def update(self, now=None):
+        """Opnieuw rekenen als er nieuwe metingen zijn. True op het moment dat een heuvel begint."""
+        if self.ring.count==self._seen: return False
+        self._seen=self.ring.count
+        rows=self.ring.window(self.hold, now)
+        if len(rows)==0: return False
+        tilt=np.degrees(np.arctan2(rows[:, 1], rows[:, 3]))
+        self.tilt=float(tilt[-1])
+        was=self.on_hill
+        self.on_hill=len(rows) >= self.min_samples and bool(np.all(np.abs(tilt) >= self.angle))
+        return self.on_hill and not was
@@ -0,0 +1,222 @@
+# phoneGamepad.py
+"""Een telefoon (browser) als joystick, via WebSocket.
+
+/pad/<speler> is een pagina met een touch joystick en de knoppen 1 en 3. Ze
+stuurt 30 keer per seconde de assen en knoppen over een WebSocket met een
+volgnummer. PhoneJoystick bewaart enkel de nieuwste invoer van de speler:
+berichten met een ouder volgnummer en berichten die de lus nog niet gelezen
+had worden weggegooid.
+
+De controller leest niet meer om de 10 ms: geef `pump` en `sleep` van de
+PhoneJoystick mee aan SpheroController. De tick van de lus wacht dan tot er
+nieuwe invoer is (hoogstens `idle` s); langere pauzes (knop 3) blijven
+gewone sleeps. Komt er `timeout` s niets binnen, dan wordt alles losgelaten.
+
+Latency: de pagina krijgt voor elk bericht een ack terug en meet zo de round
+trip; die stuurt ze mee in de volgende berichten. stats() geeft het netwerk
+(rtt/2), de wachttijd tot de lus de invoer oppikt, de tijd van oppikken tot
+de BLEScheduler het commando dat eruit volgt verstuurd heeft (ble_sent als
+on_sent van de scheduler) en per bericht de som van de drie. Berichten die
+geen commando opleveren (niets veranderd) hebben geen som.
+
+Onleesbare berichten worden geteld (`malformed`) en overgeslagen.
+
+Heeft flask-sock nodig (pip install flask-sock); zonder is er geen /ws en
+toont de pagina dat.
+"""
+import json, threading, time
+from collections import deque
+from flask import jsonify, render_template_string
+from bleScheduler import QUERY
+
+try:
+    from flask_sock import Sock
+    HAVE_SOCK = True
+except ImportError:
+    HAVE_SOCK = False
+
+
+def _pct(values, q):
+    d=sorted(values)
+    return round(1000.0*d[min(len(d)-1, int(q*(len(d)-1)))], 1) if d else None
+
+
+class PhoneJoystick:
+    """Nieuwste invoer van één telefoon; zelfde get_axis/get_button interface als pygame."""
+    def __init__(self, axes=2, buttons=10, timeout=0.5, idle=0.1, tick=0.05):
+        self.naxes=axes; self.nbuttons=buttons
+        self.timeout=timeout; self.idle=idle; self.tick=tick
+        self.axes=[0.0]*axes; self.mask=0  # wat de lus deze iteratie ziet
+        self._latest=None  # (assen, knoppen, ontvangen) nog niet opgepikt
+        self._lock=threading.Lock(); self._new=threading.Event()
+        self.session=None; self.seq=-1; self.last_seen=0.0; self.first_seen=None
+        self.received=0; self.stale=0; self.superseded=0; self.applied=0; self.malformed=0
+        self.net=deque(maxlen=500)   # rtt/2 in s, gemeten door de telefoon
+        self.wait=deque(maxlen=500)  # ontvangen -> opgepikt door de lus, in s
+        self.send=deque(maxlen=500)  # opgepikt -> commando verstuurd door de scheduler, in s
+        self.total=deque(maxlen=500) # telefoon -> bal per bericht: net + wait + send, in s
+        self._picked=deque(maxlen=50)  # (rtt/2 of None, ontvangen, opgepikt) wachtend op een commando
+
+    def feed(self, msg):
+        """Bericht van de telefoon: {"k": sessie, "s": volgnummer, "x", "y", "b": bitmask, "rtt": ms}."""
+        now=time.monotonic()
+        # eerst alles omzetten: een onleesbaar bericht (ValueError/TypeError) verandert niets
+        seq=int(msg.get("s", -1)); mask=int(msg.get("b", 0))
+        net=float(msg["rtt"])/2000.0 if msg.get("rtt") is not None else None
+        axes=[max(-1.0, min(1.0, float(msg.get(k, 0.0)))) for k in ("x", "y")[:self.naxes]]
+        with self._lock:
+            if msg.get("k")!=self.session: self.session=msg.get("k"); self.seq=-1  # nieuwe verbinding
+            self.received+=1
+            if self.first_seen is None: self.first_seen=now
+            if seq<=self.seq: self.stale+=1; return False
+            self.seq=seq; self.last_seen=now
+            if net is not None: self.net.append(net)
+            if self._latest is not None: self.superseded+=1
+            self._latest=(axes, mask, now, net)
+        self._new.set()
+        return True
+
+    def pump(self):
+        """Als `pump` aan SpheroController: nieuwste invoer oppikken, of loslaten na `timeout`."""
+        with self._lock:
+            latest=self._latest; self._latest=None
+            if latest is not None:
+                self.axes, self.mask, received, net=latest; now=time.monotonic()
+                self.wait.append(now-received); self.applied+=1
+                self._picked.append((net, received, now))
+            elif self.last_seen and time.monotonic()-self.last_seen > self.timeout:
+                self.axes=[0.0]*self.naxes; self.mask=0  # telefoon weg: niet blijven rijden
+
+    def ble_sent(self, prio, queued, done):
+        """Als `on_sent` aan de BLEScheduler: een commando is verstuurd.
+
+        Het hoort bij de laatste invoer die opgepikt was toen het in de rij kwam."""
+        if prio==QUERY: return
+        with self._lock:
+            origin=None
+            while self._picked and self._picked[0][2] <= queued: origin=self._picked.popleft()
+            if origin is None: return
+            net, received, picked=origin
+            self.send.append(done-picked)
+            if net is not None: self.total.append(net+done-received)
+
+    def sleep(self, seconds):
+        """Als `sleep` aan SpheroController: de tick wacht op nieuwe invoer i.p.v. te pollen."""
+        if seconds > self.tick: time.sleep(seconds); return
+        self._new.wait(self.idle); self._new.clear()
+
+    def get_axis(self, i): return self.axes[i] if i < len(self.axes) else 0.0
+    def get_button(self, i): return (self.mask >> i) & 1
+    def get_numaxes(self): return self.naxes
+    def get_numbuttons(self): return self.nbuttons
+    def init(self): pass
+
+    def stats(self):
+        with self._lock:
+            span=self.last_seen-self.first_seen if self.first_seen is not None else 0.0
+            pct=lambda d: {"p50":_pct(d, 0.5), "p95":_pct(d, 0.95)}
+            return {"connected":bool(self.last_seen) and time.monotonic()-self.last_seen < self.timeout,
+                    "received":self.received, "stale":self.stale, "superseded":self.superseded,
+                    "applied":self.applied, "malformed":self.malformed,
+                    "rate_hz":round(self.received/span, 1) if span > 0 else None,
+                    "net_ms":pct(self.net), "wait_ms":pct(self.wait), "send_ms":pct(self.send),
+                    # telefoon -> server -> lus -> bal, per bericht opgeteld
+                    "total_ms":pct(self.total)}
+
+
+PAD_HTML="""
+<!doctype html><html><head><meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1,user-scalable=no">
+<title>Sphero {{player}} - telefoon</title>
+<style>
+body{font-family:sans-serif;margin:0;height:100vh;display:flex;flex-direction:column;user-select:none;touch-action:none}
+#info{padding:.5rem;background:#f6f6f6;font-size:.9rem}
+#pad{flex:1;display:flex;align-items:center;justify-content:space-around}
+#stick{width:45vmin;height:45vmin;border-radius:50%;background:#eee;border:2px solid #bbb;position:relative}
+#knob{width:35%;height:35%;border-radius:50%;background:#888;position:absolute;left:32.5%;top:32.5%}
+.btn{width:22vmin;height:22vmin;border-radius:50%;border:2px solid #bbb;background:#fff9da;font-size:2rem;margin:.5rem}
+.btn.on{background:#ffd966}
+</style></head><body>
+<div id="info">Speler {{player}} · verbinden…</div>
+<div id="pad">
+  <div id="stick"><div id="knob"></div></div>
+  <div><button class="btn" data-bit="{{2**button_go}}">1</button><br>
+       <button class="btn" data-bit="{{2**button_back}}">3</button></div>
+</div>
+<script>
+const HAVE_SOCK = {{ 'true' if have_sock else 'false' }};
+const RATE_HZ = 30;
+let x=0, y=0, b=0, seq=0, rtt=null, acked=0;
+const session = Math.random().toString(36).slice(2);
+const info = document.getElementById('info');
+const stick = document.getElementById('stick'), knob = document.getElementById('knob');
+
+function moveStick(t){
+  const r = stick.getBoundingClientRect(), h = r.width/2;
+  let dx = (t.clientX-r.left-h)/h, dy = (t.clientY-r.top-h)/h;
+  const n = Math.hypot(dx,dy); if(n>1){dx/=n;dy/=n;}
+  x=dx; y=dy; knob.style.left=(32.5+dx*32.5)+'%'; knob.style.top=(32.5+dy*32.5)+'%';
+}
+stick.addEventListener('touchstart', e => {e.preventDefault(); moveStick(e.targetTouches[0]);});
+stick.addEventListener('touchmove', e => {e.preventDefault(); moveStick(e.targetTouches[0]);});
+stick.addEventListener('touchend', e => {e.preventDefault(); x=0; y=0; knob.style.left=knob.style.top='32.5%';});
+document.querySelectorAll('.btn').forEach(el => {
+  const bit = +el.dataset.bit;
+  el.addEventListener('touchstart', e => {e.preventDefault(); b|=bit; el.classList.add('on');});
+  el.addEventListener('touchend', e => {e.preventDefault(); b&=~bit; el.classList.remove('on');});
+});
+
+function connect(){
+  const ws = new WebSocket((location.protocol==='https:'?'wss://':'ws://')+location.host+"{{ ws_path }}");
+  let timer = null;
+  ws.onopen = () => {
+    timer = setInterval(() => {
+      if(ws.readyState!==1 || ws.bufferedAmount>0) return;  // achterstand: niet opstapelen
+      ws.send(JSON.stringify({k:session, s:++seq, x:+x.toFixed(3), y:+y.toFixed(3), b:b,
+                              t:performance.now(), rtt:rtt}));
+    }, 1000/RATE_HZ);
+  };
+  ws.onmessage = e => {
+    const m = JSON.parse(e.data);
+    rtt = performance.now()-m.t; acked = m.a;
+    info.textContent = `Speler {{player}} · ${m.ok ? 'verbonden' : 'geen controller'} · rtt ${rtt.toFixed(0)} ms · #${acked}`;
+  };
+  ws.onclose = () => {clearInterval(timer); info.textContent='Verbinding weg, opnieuw…'; setTimeout(connect, 1000);};
+}
+if(HAVE_SOCK) connect(); else info.textContent='flask-sock niet geïnstalleerd op de server.';
+</script></body></html>
+"""
+
+
+def add_routes(app, phone_for, button_go=0, button_back=2):
+    """/pad/<speler>, /pad/<speler>/stats.json en (met flask-sock) /pad/<speler>/ws.
+
+    phone_for(speler) geeft de PhoneJoystick van die speler, of None."""
+    @app.route("/pad/<int:player>")
+    def pad(player):
+        return render_template_string(PAD_HTML, player=player, have_sock=HAVE_SOCK,
+                                      ws_path=f"/pad/{player}/ws", button_go=button_go, button_back=button_back)
+
+    @app.route("/pad/<int:player>/stats.json")
+    def pad_stats(player):
+        phone=phone_for(player)
+        if phone is None: return jsonify({"error":f"speler {player} gebruikt geen telefoon"}),404
+        return jsonify(phone.stats())
+
+    if not HAVE_SOCK: return None
+    sock=Sock(app)
+
+    @sock.route("/pad/<int:player>/ws")
+    def pad_ws(ws, player):
+        while True:
+            data=ws.receive()
+            phone=phone_for(player)
+            try:
+                msg=json.loads(data)
+                if not isinstance(msg, dict): raise ValueError("geen object")
+                if phone is not None: phone.feed(msg)
+            except (ValueError, TypeError):
+                if phone is not None: phone.malformed+=1
+                continue
+            ws.send(json.dumps({"a":msg.get("s"), "t":msg.get("t"), "ok":phone is not None}))
+    return sock
@@ -0,0 +1,125 @@
+# toyCache.py
+"""Onthoudt welke Sphero op welk BLE-adres zit, zodat (her)starten niet telkens moet scannen.
+
+scanner.find_toy(toy_name=...) scant elke keer opnieuw tot de timeout, ook als
+de bal er al lang is. ToyCache bewaart naam -> adres (+ toy klasse) in
+toy_cache.json, naast last_settings.json:
+
+    * find_toy(naam)  -> toy uit de cache zonder scan, anders een scan
+    * connected(toy)  -> verbindt; lukt dat niet met een adres uit de cache,
+                         dan pas een volledige scan en nog één poging
+    * start_rescan()  -> achtergrond thread die af en toe alle ballen scant
+                         (enkel als er niet gespeeld wordt) en de cache ververst
+
+Koude vs. cache start meten:
+    python toyCache.py SB-9DD8
+"""
+import contextlib, importlib, json, os, sys, threading, time
+from types import SimpleNamespace
+from spherov2 import scanner
+from spherov2.sphero_edu import SpheroEduAPI
+
+CACHE_FILE = "toy_cache.json"
+
+
+class ToyCache:
+    def __init__(self, path=CACHE_FILE):
+        self.path=path; self._lock=threading.Lock()
+        self.entries={}  # naam -> {"address", "cls", "seen"}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f: self.entries=json.load(f)
+            except (OSError, ValueError) as e: print(f"Toy cache niet leesbaar ({e}), start leeg.")
+        self.last={}  # timing van de laatste find/connect
+        self._rescan=None
+
+    def _save(self):
+        with open(self.path, "w") as f: json.dump(self.entries, f, indent=1)
+
+    def remember(self, toys):
+        with self._lock:
+            for t in toys:
+                cls=type(t)
+                self.entries[t.name]={"address":t.address,"cls":f"{cls.__module__}:{cls.__qualname__}","seen":time.time()}
+            self._save()
+
+    def forget(self, name):
+        with self._lock:
+            if self.entries.pop(name, None) is not None: self._save()
+
+    def cached_toy(self, name):
+        """Toy object rechtstreeks uit het bewaarde adres (geen scan), of None."""
+        entry=self.entries.get(name)
+        if entry is None: return None
+        try:
+            module, cls=entry["cls"].split(":")
+            toy_cls=getattr(importlib.import_module(module), cls)
+            from spherov2.adapter.bleak_adapter import BleakAdapter
+            # zelfde constructie als scanner.find_toys: (device met name/address, adapter klasse)
+            return toy_cls(SimpleNamespace(name=name, address=entry["address"]), BleakAdapter)
+        except Exception as e:
+            print(f"Cache entry voor {name} onbruikbaar: {e}"); return None
+
+    def scan(self, name):
+        """Volledige scan naar één bal; vult de cache aan."""
+        toy=scanner.find_toy(toy_name=name)
+        if toy is not None: self.remember([toy])
+        return toy
+
+    def find_toy(self, name):
+        """(toy, "cache" | "scan")"""
+        t0=time.time()
+        toy=self.cached_toy(name); source="cache"
+        if toy is None: toy=self.scan(name); source="scan"
+        self.last={"toy_name":name,"source":source,"discover_s":round(time.time()-t0,2)}
+        return toy, source
+
+    @contextlib.contextmanager
+    def connected(self, toy, source, info=None, api_cls=SpheroEduAPI):
+        """with cache.connected(toy, source) as (toy, api): ...  -- toy kan na een nieuwe scan veranderd zijn.
+
+        Bron en verbindingstijd komen in `info` (standaard self.last)."""
+        info=self.last if info is None else info
+        t0=time.time()
+        try: api=api_cls(toy).__enter__()
+        except Exception as e:
+            if source!="cache": raise
+            print(f"Verbinden met gecached adres van {toy.name} mislukt ({e}), volledige scan...")
+            self.forget(toy.name)
+            toy=self.scan(toy.name); source="scan"
+            api=api_cls(toy).__enter__()
+        info.update(source=source, connect_s=round(time.time()-t0,2))
+        try: yield toy, api
+        finally: api.__exit__(None, None, None)
+
+    # ---- achtergrond rescan ----
+    def start_rescan(self, idle, interval=300.0):
+        """Elke `interval` s alle ballen scannen, maar enkel als idle() True geeft."""
+        if self._rescan and self._rescan.is_alive(): return
+        def loop():
+            while True:
+                time.sleep(interval)
+                if not idle(): continue
+                try: self.remember(scanner.find_toys())
+                except Exception as e: print(f"Achtergrond scan mislukt: {e}")
+        self._rescan=threading.Thread(target=loop, daemon=True); self._rescan.start()
+
+
+def main():
+    if len(sys.argv)<2: sys.exit("Usage: python toyCache.py <toy_name>")
+    name=sys.argv[1]; cache=ToyCache()
+    rows=[]
+    for label in ("koud", "cache"):
+        if label=="koud": cache.forget(name)
+        t0=time.time()
+        toy, source=cache.find_toy(name)
+        if toy is None: sys.exit(f"Sphero '{name}' niet gevonden.")
+        t1=time.time()
+        with cache.connected(toy, source) as (toy, api):
+            t2=time.time()
+        rows.append((label, t1-t0, t2-t1, t2-t0))
+    print(f"{'start':<6} {'zoeken s':>9} {'verbinden s':>12} {'totaal s':>9}")
+    for label, find, conn, total in rows: print(f"{label:<6} {find:>9.2f} {conn:>12.2f} {total:>9.2f}")
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Turn a list of drive/turn steps into one smooth trajectory.
+
+drivePattern.py normally runs every drive and turn as its own action, so the
+robot stops (and waits for the next goal) between them. compile_steps() makes
+one trajectory of the same steps instead:
+
+    * consecutive drives and consecutive turns are merged
+    * a turn between two forward drives becomes an arc (radius up to
+      `blend_radius`) that cuts the corner; the arc starts and ends on the two
+      straight lines, so the end pose does not change
+    * other turns (at the start or the end, or next to a backwards drive) are
+      turned on the spot; a turn right after a forward drive already starts
+      while the drive slows down, so there is no stop between the two. The
+      drive is lengthened so the robot still stops at the planned distance;
+      starting the turn while moving shifts it a few mm sideways
+    * speeds follow acceleration limits, and the robot only stops where it
+      has to: at the end and around on-the-spot turns not preceded by a
+      forward drive
+
+The result is a list of samples (t, x, y, theta, v, w) in the frame of the
+start pose; Trajectory.at(t) interpolates between them.
+"""
+
+import bisect
+import math
+
+# path resolution used to compute the speed profile
+DS = 0.005               # m
+DPHI = math.radians(1)   # rad
+# time step used to integrate a turn blended into a drive
+DT = 0.005               # s
+
+
+def wrap(angle):
+    return math.atan2(math.sin(angle), math.cos(angle))
+
+
+def merge_steps(steps):
+    """[('drive', m) | ('turn', degrees)] -> same list with neighbours merged."""
+    merged = []
+    for kind, value in steps:
+        if merged and merged[-1][0] == kind and (kind == "turn" or (merged[-1][1] >= 0) == (value >= 0)):
+            merged[-1] = (kind, merged[-1][1] + value)
+        else:
+            merged.append((kind, value))
+    return [(k, v) for k, v in merged if abs(v) > 1e-9]
+
+
+def end_pose(steps):
+    """Pose (x, y, theta) after the steps, from the start pose (0, 0, 0)."""
+    x = y = theta = 0.0
+    for kind, value in steps:
+        if kind == "drive":
+            x += value * math.cos(theta)
+            y += value * math.sin(theta)
+        else:
+            theta = wrap(theta + math.radians(value))
+    return x, y, theta
+
+
+def _segments(steps, blend_radius, min_radius):
+    """Steps -> [('line', length) | ('arc', length, curvature) | ('spin', angle)]."""
+    steps = merge_steps(steps)
+    segments = []
+    # length the next line loses to the corner arc in front of it
+    cut = 0.0
+    for i, (kind, value) in enumerate(steps):
+        if kind == "drive":
+            segments.append(["line", value - cut])
+            cut = 0.0
+            continue
+        angle = math.radians(value)
+        half = abs(angle) / 2.0
+        prev = segments[-1] if segments and segments[-1][0] == "line" else None
+        nxt = steps[i + 1] if i + 1 < len(steps) else None
+        if (prev and prev[1] > 0 and nxt and nxt[0] == "drive" and nxt[1] > 0
+                and half < math.radians(85)):
+            # use at most what is left of the previous line and half of the
+            # next one (the other half may be needed for the next corner)
+            radius = min(blend_radius, min(prev[1], nxt[1] / 2.0) / math.tan(half))
+            if radius >= min_radius:
+                cut = radius * math.tan(half)
+                prev[1] -= cut
+                segments.append(["arc", radius * abs(angle), math.copysign(1.0 / radius, angle)])
+                continue
+        segments.append(["spin", angle])
+    return [tuple(s) for s in segments if s[0] != "line" or abs(s[1]) > 1e-6]
+
+
+def _speeds(lengths, limits, accel):
+    """Speed at every node between pieces: start and end at 0, respect limits."""
+    n = len(lengths)
+    v = [0.0] * (n + 1)
+    for i in range(1, n):
+        v[i] = min(limits[i - 1], limits[i])
+    for i in range(n):
+        v[i + 1] = min(v[i + 1], math.sqrt(v[i] ** 2 + 2.0 * accel * lengths[i]))
+    for i in range(n - 1, -1, -1):
+        v[i] = min(v[i], math.sqrt(v[i + 1] ** 2 + 2.0 * accel * lengths[i]))
+    return v
+
+
+def _spin_profile(angle, max_rotation, rot_accel):
+    """Turn `angle` from rest to rest: (duration, w(t)) with a trapezoid speed profile."""
+    peak = min(max_rotation, math.sqrt(abs(angle) * rot_accel))
+    ramp = peak / rot_accel
+    duration = 2.0 * ramp + (abs(angle) - peak * ramp) / peak
+    sign = math.copysign(1.0, angle)
+
+    def w(t):
+        if t <= 0.0 or t >= duration:
+            return 0.0
+        return sign * min(peak, rot_accel * t, rot_accel * (duration - t))
+    return duration, w
+
+
+def _blend_turn(drive, angle, max_rotation, rot_accel):
+    """Samples of a drive ending at rest -> same drive with `angle` turned during its braking.
+
+    The turn starts where the final deceleration starts. The constant-speed
+    part before it is lengthened by what the braking loses to the turn, so
+    the robot still comes to rest at the planned distance along the drive.
+    """
+    # last speed peak: from here on the drive only slows down
+    k = len(drive) - 1
+    while k > 0 and abs(drive[k - 1][4]) > abs(drive[k][4]):
+        k -= 1
+    t0, x, y, theta, v0, _ = drive[k]
+    tail = drive[k:]
+    times = [s[0] for s in tail]
+    duration, w_spin = _spin_profile(angle, max_rotation, rot_accel)
+
+    def line(t):
+        # speed and turn rate of the drive alone at time t
+        if t >= times[-1]:
+            return 0.0, 0.0
+        i = bisect.bisect_right(times, t)
+        a, b = tail[i - 1], tail[i]
+        f = (t - a[0]) / (b[0] - a[0]) if b[0] > a[0] else 0.0
+        return a[4] + f * (b[4] - a[4]), a[5] + f * (b[5] - a[5])
+
+    blended = [(t0, x, y, theta, v0, drive[k][5])]
+    steps = int(math.ceil(max(times[-1] - t0, duration) / DT))
+    for n in range(1, steps + 1):
+        t = t0 + n * DT
+        (va, wa), (vb, wb) = line(t - DT), line(t)
+        wa += w_spin(t - DT - t0)
+        wb += w_spin(t - t0)
+        mid = theta + (wa + wb) * DT / 4.0
+        x += (va + vb) / 2.0 * DT * math.cos(mid)
+        y += (va + vb) / 2.0 * DT * math.sin(mid)
+        theta = wrap(theta + (wa + wb) / 2.0 * DT)
+        blended.append((t, x, y, theta, vb, wb))
+
+    # distance along the drive lost by turning while braking
+    c, s = math.cos(drive[k][3]), math.sin(drive[k][3])
+    lost = ((drive[-1][1] - drive[k][1]) - (x - drive[k][1])) * c + \
+        ((drive[-1][2] - drive[k][2]) - (y - drive[k][2])) * s
+    shift = max(0.0, lost)
+    dt = shift / v0 if v0 > 0 else 0.0
+    return drive[:k + 1] + [
+        (t + dt, bx + shift * c, by + shift * s, th, v, w)
+        for t, bx, by, th, v, w in blended[1:]
+    ]
+
+
+class Trajectory:
+    def __init__(self, samples):
+        self.samples = samples
+        self.times = [s[0] for s in samples]
+
+    @property
+    def duration(self):
+        return self.times[-1]
+
+    @property
+    def end(self):
+        return self.samples[-1][1:4]
+
+    def at(self, t):
+        """Interpolated (x, y, theta, v, w) at time t (clamped to the ends)."""
+        if t <= 0.0:
+            return self.samples[0][1:]
+        if t >= self.duration:
+            x, y, theta, _, _ = self.samples[-1][1:]
+            return x, y, theta, 0.0, 0.0
+        i = bisect.bisect_right(self.times, t)
+        a, b = self.samples[i - 1], self.samples[i]
+        f = (t - a[0]) / (b[0] - a[0]) if b[0] > a[0] else 0.0
+        return (
+            a[1] + f * (b[1] - a[1]),
+            a[2] + f * (b[2] - a[2]),
+            a[3] + f * wrap(b[3] - a[3]),
+            a[4] + f * (b[4] - a[4]),
+            a[5] + f * (b[5] - a[5]),
+        )
+
+
+def compile_steps(steps, max_speed=0.2, max_rotation=1.0, accel=0.3, rot_accel=1.5,
+                  blend_radius=0.25, min_radius=0.03, blend_turns=True):
+    """Steps -> Trajectory. Speeds in m/s and rad/s, accelerations per second.
+
+    With blend_turns=False a turn after a drive waits until the robot stopped.
+    """
+    samples = [(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)]
+    t = x = y = theta = 0.0
+
+    def add_pieces(pieces, speeds):
+        # pieces: (length, (forward?, curvature, sign)); speeds: one per node
+        nonlocal t, x, y, theta
+        for (length, step), v0, v1 in zip(pieces, speeds, speeds[1:]):
+            t += length / ((v0 + v1) / 2.0)
+            forward, curvature, sign = step
+            if forward:
+                # integrate the arc at the midpoint heading
+                mid = theta + curvature * length / 2.0
+                x += sign * length * math.cos(mid)
+                y += sign * length * math.sin(mid)
+                theta = wrap(theta + curvature * length)
+                samples.append((t, x, y, theta, sign * v1, curvature * v1))
+            else:
+                theta = wrap(theta + sign * length)
+                samples.append((t, x, y, theta, 0.0, sign * v1))
+
+    # one chain = segments that are driven without stopping
+    chains, chain = [], []
+    for seg in _segments(steps, blend_radius, min_radius):
+        if seg[0] == "spin" or (chain and (seg[0] == "line") and (seg[1] < 0) != chain_reverse):
+            if chain:
+                chains.append(chain)
+            chain = []
+            if seg[0] == "spin":
+                chains.append([seg])
+                continue
+        if not chain:
+            chain_reverse = seg[0] == "line" and seg[1] < 0
+        chain.append(seg)
+    if chain:
+        chains.append(chain)
+
+    # first sample of the previous chain if it drove forward, else None
+    forward_start = None
+    for chain in chains:
+        pieces, limits = [], []
+        if chain[0][0] == "spin":
+            angle = chain[0][1]
+            if blend_turns and forward_start is not None:
+                samples[forward_start:] = _blend_turn(samples[forward_start:], angle,
+                                                      max_rotation, rot_accel)
+                t, x, y, theta = samples[-1][:4]
+                forward_start = None
+                continue
+            forward_start = None
+            n = max(1, int(math.ceil(abs(angle) / DPHI)))
+            pieces = [(abs(angle) / n, (False, 0.0, math.copysign(1.0, angle)))] * n
+            limits = [max_rotation] * n
+            add_pieces(pieces, _speeds([p[0] for p in pieces], limits, rot_accel))
+            continue
+        for seg in chain:
+            length = abs(seg[1])
+            curvature = seg[2] if seg[0] == "arc" else 0.0
+            sign = -1.0 if seg[0] == "line" and seg[1] < 0 else 1.0
+            limit = max_speed if curvature == 0.0 else min(max_speed, max_rotation / abs(curvature))
+            n = max(1, int(math.ceil(length / DS)))
+            pieces += [(length / n, (True, curvature, sign))] * n
+            limits += [limit] * n
+        start = len(samples) - 1
+        add_pieces(pieces, _speeds([p[0] for p in pieces], limits, accel))
+        forward_start = start if chain[0][0] == "arc" or chain[0][1] > 0 else None
+    return Trajectory(samples)
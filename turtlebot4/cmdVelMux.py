@@ -0,0 +1,109 @@
+"""Priority multiplexer for /cmd_vel that goes quiet when nobody drives.
+
+Several things may want to drive the robot: the dashboard buttons, a
+joystick, an autonomous node such as lidar_pkg. Each is an input with a
+priority and a timeout:
+
+    * an input is active while its last command is younger than its timeout
+    * the active input with the highest priority wins; the others are ignored
+      until it times out
+    * while an input is active its command is published at `rate` Hz (the
+      Create 3 base stops by itself when /cmd_vel stops coming)
+    * when the last input times out, `stop_count` zero twists are sent and
+      then the timer is cancelled: nothing is published (and nothing wakes up)
+      until the next command arrives
+
+External nodes publish on their own topic instead of /cmd_vel, e.g.
+
+    ros2 run lidar_pkg lidar --ros-args -r cmd_vel:=/cmd_vel/auto
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+from geometry_msgs.msg import Twist
+
+
+@dataclass
+class MuxInput:
+    name: str
+    priority: int          # higher wins
+    timeout: float         # seconds a command stays valid
+    topic: str = None      # Twist topic to listen on (None = set() from code)
+
+
+# Dashboard buttons first, then a joystick, then autonomous nodes.
+DEFAULT_INPUTS = [
+    MuxInput("teleop", 30, 0.6),
+    MuxInput("joystick", 20, 0.5, "/cmd_vel/joystick"),
+    MuxInput("auto", 10, 1.0, "/cmd_vel/auto"),
+]
+
+
+class CmdVelMux:
+    def __init__(self, node, inputs=DEFAULT_INPUTS, output="/cmd_vel", rate=10.0, stop_count=3):
+        self.inputs = {i.name: i for i in inputs}
+        self.stop_count = stop_count
+        self._lock = threading.Lock()
+        self._last = {}          # input name -> (monotonic time, Twist)
+        self._stops_left = 0
+        self.active = None       # name of the input that drives right now
+        self.counters = {"published": 0, "stops": 0, "preempted": 0}
+
+        self._pub = node.create_publisher(Twist, output, 10)
+        for i in inputs:
+            if i.topic:
+                node.create_subscription(
+                    Twist, i.topic, lambda msg, name=i.name: self.set(name, msg), 10
+                )
+        self._timer = node.create_timer(1.0 / rate, self._tick)
+        self._timer.cancel()  # nothing to publish yet
+
+    def set(self, name, twist):
+        """New command from input `name`."""
+        with self._lock:
+            self._last[name] = (time.monotonic(), twist)
+            if self._timer.is_canceled():
+                self._timer.reset()
+        # publish right away instead of waiting for the next tick
+        self._tick()
+
+    def _winner(self, now):
+        best = None
+        for name, (stamp, twist) in self._last.items():
+            spec = self.inputs[name]
+            if now - stamp <= spec.timeout and (best is None or spec.priority > best[0].priority):
+                best = (spec, twist)
+        return best
+
+    def _tick(self):
+        with self._lock:
+            best = self._winner(time.monotonic())
+            if best is not None:
+                spec, twist = best
+                if self.active not in (None, spec.name) and \
+                        self.inputs[self.active].priority < spec.priority:
+                    self.counters["preempted"] += 1
+                self.active = spec.name
+                self._stops_left = self.stop_count
+                self.counters["published"] += 1
+            elif self._stops_left > 0:
+                self.active = None
+                twist = Twist()  # zero -> stop
+                self._stops_left -= 1
+                self.counters["stops"] += 1
+            else:
+                # idle: stop publishing until set() is called again
+                self.active = None
+                self._timer.cancel()
+                return
+        self._pub.publish(twist)
+
+    def status(self):
+        with self._lock:
+            return {
+                "active": self.active,
+                "idle": self._timer.is_canceled(),
+                **self.counters,
+            }
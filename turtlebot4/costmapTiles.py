@@ -0,0 +1,168 @@
+"""nav2 costmaps as tiles that are only re-encoded where the costmap changed.
+
+nav2 (shells/launch-navigation.sh) publishes every costmap as a full
+OccupancyGrid (/global_costmap/costmap, /local_costmap/costmap) plus small
+OccupancyGridUpdate messages with just the rectangle that changed
+(.../costmap_updates). CostmapTiles keeps one costmap as a NumPy grid:
+
+    * a full grid replaces the array; when the size / resolution / origin
+      did not change, only tiles whose cells differ count as changed
+    * an update is written into the array in place, and only the tiles it
+      overlaps (and that really changed) are marked
+    * every change bumps a sequence number; each tile remembers the
+      sequence number of its last change, so a client that has seen
+      sequence N asks for changed_since(N) and re-fetches just those tiles
+    * tiles are encoded to RGBA PNG on request and cached until they change
+
+So the work per update is proportional to the changed area, not to the size
+of the costmap. The grid is stored top row first (like the saved map
+images), i.e. flipped compared to the message, so tile (0, 0) is top left.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from mapTiles import encode_png
+
+TILE_SIZE = 128
+
+
+def _palette():
+    """Costmap value (0..100, 255 = unknown) -> RGBA."""
+    lut = np.zeros((256, 4), dtype=np.uint8)
+    cost = np.arange(1, 99) / 98.0
+    # low cost: transparent blue, high cost: opaque red
+    lut[1:99, 0] = (cost * 255).astype(np.uint8)
+    lut[1:99, 2] = ((1.0 - cost) * 255).astype(np.uint8)
+    lut[1:99, 3] = (60 + cost * 140).astype(np.uint8)
+    lut[99] = (160, 40, 220, 220)   # inscribed: the robot touches an obstacle
+    lut[100] = (255, 40, 40, 255)   # lethal: obstacle
+    lut[255] = (128, 128, 128, 60)  # unknown
+    return lut
+
+
+PALETTE = _palette()
+
+
+def _cells(data, height, width):
+    """int8[] of a message (-1 = unknown) -> uint8 rows, top row first."""
+    return np.asarray(data, dtype=np.int8).view(np.uint8).reshape(height, width)[::-1]
+
+
+class CostmapTiles:
+    def __init__(self, tile_size=TILE_SIZE):
+        self.tile_size = tile_size
+        self.grid = None          # uint8 (height, width), top row first
+        self.info = None          # size / resolution / origin of the current grid
+        self.seq = 0              # bumped by every change
+        self.reset_seq = 0        # seq of the last change of size / origin
+        self.tile_seq = None      # per tile: seq of its last change
+        self._png = {}            # (tx, ty) -> (seq, png bytes)
+        self._lock = threading.Lock()
+        self.counters = {"full": 0, "updates": 0, "tiles_changed": 0,
+                         "tiles_encoded": 0, "encode_ms": 0.0}
+
+    # ---- applying messages ----------------------------------------------
+    def _tiles_of(self, changed):
+        """Boolean cell mask (display rows) -> boolean mask per tile."""
+        t = self.tile_size
+        h, w = changed.shape
+        padded = np.zeros((-(-h // t) * t, -(-w // t) * t), dtype=bool)
+        padded[:h, :w] = changed
+        return padded.reshape(padded.shape[0] // t, t, padded.shape[1] // t, t).any(axis=(1, 3))
+
+    def set_full(self, msg):
+        """nav_msgs/OccupancyGrid."""
+        w, h = msg.info.width, msg.info.height
+        grid = _cells(msg.data, h, w)
+        o = msg.info.origin.position
+        info = {"width": w, "height": h, "resolution": round(msg.info.resolution, 6),
+                "origin": [round(o.x, 4), round(o.y, 4)], "frame": msg.header.frame_id,
+                "tile_size": self.tile_size}
+        with self._lock:
+            self.counters["full"] += 1
+            self.seq += 1
+            if self.grid is None or info != self.info:
+                # new geometry: everything is new
+                self.grid = grid.copy()
+                self.info = info
+                self.reset_seq = self.seq
+                self.tile_seq = np.full(self._tiles_of(np.zeros((h, w), bool)).shape, self.seq,
+                                        dtype=np.int64)
+                self._png.clear()
+                return
+            changed = self._tiles_of(self.grid != grid)
+            self.grid[...] = grid
+            self._mark(changed)
+
+    def apply_update(self, msg):
+        """map_msgs/OccupancyGridUpdate; ignored until a full grid arrived."""
+        with self._lock:
+            if self.grid is None:
+                return
+            h = self.info["height"]
+            x, y, w, uh = msg.x, msg.y, msg.width, msg.height
+            if x < 0 or y < 0 or x + w > self.info["width"] or y + uh > h:
+                return  # does not fit the grid we have; the next full grid fixes it
+            data = _cells(msg.data, uh, w)
+            # message rows y..y+uh are display rows h-y-uh..h-y
+            top = h - y - uh
+            region = self.grid[top:top + uh, x:x + w]
+            diff = region != data
+            self.counters["updates"] += 1
+            if not diff.any():
+                return
+            region[...] = data
+            # only the tiles the rectangle overlaps, as a tile-aligned mask
+            t = self.tile_size
+            ty0, tx0 = top // t, x // t
+            ty1, tx1 = (top + uh - 1) // t, (x + w - 1) // t
+            changed = np.zeros(((ty1 - ty0 + 1) * t, (tx1 - tx0 + 1) * t), dtype=bool)
+            changed[top - ty0 * t:top - ty0 * t + uh, x - tx0 * t:x - tx0 * t + w] = diff
+            self.seq += 1
+            self._mark(self._tiles_of(changed), ty0, tx0)
+
+    def _mark(self, tiles, ty=0, tx=0):
+        """Give the true tiles of `tiles` (starting at tile ty, tx) the current seq."""
+        count = int(tiles.sum())
+        if count:
+            self.tile_seq[ty:ty + tiles.shape[0], tx:tx + tiles.shape[1]][tiles] = self.seq
+            self.counters["tiles_changed"] += count
+
+    # ---- reading ---------------------------------------------------------
+    def changed_since(self, seq):
+        """What a client that has seen `seq` has to fetch again."""
+        with self._lock:
+            if self.grid is None:
+                return {"seq": 0, "ready": False}
+            result = {"seq": self.seq, "ready": True, "counters": dict(self.counters)}
+            if seq < self.reset_seq:
+                result.update(reset=True, info=self.info)
+            else:
+                ty, tx = np.nonzero(self.tile_seq > seq)
+                result.update(reset=False, tiles=[[int(a), int(b)] for a, b in zip(tx, ty)])
+            return result
+
+    def tile(self, tx, ty):
+        """RGBA PNG of tile (tx, ty), or None when it is outside the grid."""
+        with self._lock:
+            if self.grid is None:
+                return None
+            t = self.tile_size
+            th, tw = self.tile_seq.shape
+            if not (0 <= tx < tw and 0 <= ty < th):
+                return None
+            seq = int(self.tile_seq[ty, tx])
+            cached = self._png.get((tx, ty))
+            if cached and cached[0] == seq:
+                return cached[1]
+            cells = self.grid[ty * t:(ty + 1) * t, tx * t:(tx + 1) * t].copy()
+        start = time.perf_counter()
+        png = encode_png(PALETTE[cells])
+        with self._lock:
+            self._png[(tx, ty)] = (seq, png)
+            self.counters["tiles_encoded"] += 1
+            self.counters["encode_ms"] += (time.perf_counter() - start) * 1000.0
+        return png
@@ -15,6 +15,18 @@ with ROS 2 sourced:
 
     source /opt/ros/humble/setup.bash
     python3 drivePattern.py
+
+With --mode blended the drives and turns between undock and dock are not
+sent as separate actions: they are compiled into one smooth trajectory
+(see blendedTrajectory.py) that is tracked on /cmd_vel with /odom feedback,
+so the robot only stops where it has to: for this sequence only at the end,
+the 160 degree turn starts while the drive slows down. Both modes log the
+time and the final pose error (from /odom) of that part of the sequence.
+
+Every run is profiled per step (see missionProfiler.py) and saved in runs/
+next to this script (or --log-dir). Compare runs with:
+
+    python3 missionProfiler.py runs/*.jsonl
 """
 
 import os
@@ -22,23 +34,71 @@ import os
 # Force the correct ROS domain before rclpy reads the environment.
 os.environ["ROS_DOMAIN_ID"] = "4"
 
+import argparse
 import math
+import time
 
 import rclpy
 from rclpy.action import ActionClient
 from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from rclpy.task import Future
 
+from action_msgs.msg import GoalStatus
+from geometry_msgs.msg import Twist
+from nav_msgs.msg import Odometry
 from irobot_create_msgs.action import Undock, Dock, DriveDistance, RotateAngle
 
+from blendedTrajectory import compile_steps, end_pose, wrap
+from missionProfiler import MissionProfile
+
+DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+
+# The full sequence as data, so both modes drive exactly the same steps.
+# In blended mode the two turns merge into one 160 degree turn that starts
+# while the drive brakes, so the robot does not stop before turning.
+SEQUENCE = [
+    ("undock", None),
+    ("drive", 0.5),
+    ("turn", 90),
+    ("turn", 70),
+    ("dock", None),
+]
+
+# Blended mode: trajectory tracking gains and limits.
+TRACK_RATE = 50.0       # Hz on /cmd_vel
+K_X, K_Y, K_THETA = 1.5, 6.0, 3.0
+MAX_V, MAX_W = 0.3, 1.5
+SETTLE_TIME = 2.0       # s to correct the last error after the trajectory ends
+
 
 class DrivePattern(Node):
-    def __init__(self):
+    def __init__(self, log_dir=DEFAULT_LOG_DIR, mode="actions"):
         super().__init__("drive_pattern")
+        self.mode = mode
+        self.profile = MissionProfile("drivePattern", log_dir)
+        self.profile.info["mode"] = mode
         self._undock = ActionClient(self, Undock, "/undock")
         self._dock = ActionClient(self, Dock, "/dock")
         self._drive = ActionClient(self, DriveDistance, "/drive_distance")
         self._rotate = ActionClient(self, RotateAngle, "/rotate_angle")
 
+        # /odom gives the pose error in both modes and the feedback in blended mode
+        self._odom = None
+        self.create_subscription(Odometry, "/odom", self._on_odom, qos_profile_sensor_data)
+        self._cmd_pub = self.create_publisher(Twist, "/cmd_vel", 10)
+
+    def _on_odom(self, msg):
+        p = msg.pose.pose
+        yaw = 2.0 * math.atan2(p.orientation.z, p.orientation.w)
+        self._odom = (p.position.x, p.position.y, wrap(yaw))
+
+    def _wait_for_odom(self, timeout_sec=5.0):
+        end = time.monotonic() + timeout_sec
+        while self._odom is None and time.monotonic() < end:
+            rclpy.spin_once(self, timeout_sec=0.1)
+        return self._odom
+
     # ---- generic helper: send a goal and block until it finishes ----------
     def _run(self, client, goal, description):
         self.get_logger().info(f"→ {description}")
@@ -46,16 +106,25 @@ class DrivePattern(Node):
             self.get_logger().error(f"   action server not available: {description}")
             return False
 
-        send_future = client.send_goal_async(goal)
+        step = self.profile.start_step(description)
+        # feedback is streamed into the profile while the goal runs
+        send_future = client.send_goal_async(goal, feedback_callback=step.on_feedback)
         rclpy.spin_until_future_complete(self, send_future)
         goal_handle = send_future.result()
+        step.on_accepted(goal_handle is not None and goal_handle.accepted)
         if goal_handle is None or not goal_handle.accepted:
             self.get_logger().error(f"   goal rejected: {description}")
             return False
 
         result_future = goal_handle.get_result_async()
         rclpy.spin_until_future_complete(self, result_future)
-        self.get_logger().info(f"   done: {description}")
+        result = result_future.result()
+        step.on_result(result.status if result else None)
+        t = step.to_dict()
+        self.get_logger().info(
+            f"   done: {description} (accept {t['send_ms']} ms, first feedback "
+            f"{t['first_feedback_ms']} ms, result {t['result_ms']} ms)"
+        )
         return True
 
     # ---- individual moves -------------------------------------------------
@@ -78,25 +147,134 @@ class DrivePattern(Node):
         goal.max_rotation_speed = float(speed)
         return self._run(self._rotate, goal, f"turn left {degrees}°")
 
+    # ---- blended mode: one trajectory on /cmd_vel -------------------------
+    def _stop(self):
+        for _ in range(3):
+            self._cmd_pub.publish(Twist())
+
+    def _track(self, trajectory):
+        """Follow `trajectory` (relative to the current pose) until its end."""
+        x0, y0, th0 = self._odom
+        c0, s0 = math.cos(th0), math.sin(th0)
+        done = Future()
+        t0 = time.monotonic()
+
+        def tick():
+            t = time.monotonic() - t0
+            xr, yr, thr, vr, wr = trajectory.at(t)
+            # reference pose in the odom frame
+            gx, gy, gth = x0 + c0 * xr - s0 * yr, y0 + s0 * xr + c0 * yr, th0 + thr
+            x, y, th = self._odom
+            # error in the robot frame
+            ex = math.cos(th) * (gx - x) + math.sin(th) * (gy - y)
+            ey = -math.sin(th) * (gx - x) + math.cos(th) * (gy - y)
+            eth = wrap(gth - th)
+            if t >= trajectory.duration and (
+                (abs(ex) < 0.01 and abs(eth) < math.radians(1.0)) or t > trajectory.duration + SETTLE_TIME
+            ):
+                done.set_result(True)
+                return
+            cmd = Twist()
+            cmd.linear.x = max(-MAX_V, min(MAX_V, vr * math.cos(eth) + K_X * ex))
+            cmd.angular.z = max(-MAX_W, min(MAX_W, wr + vr * K_Y * ey + K_THETA * math.sin(eth)))
+            self._cmd_pub.publish(cmd)
+
+        timer = self.create_timer(1.0 / TRACK_RATE, tick)
+        try:
+            rclpy.spin_until_future_complete(self, done)
+        finally:
+            self.destroy_timer(timer)
+            self._stop()
+
+    def blended(self, steps):
+        trajectory = compile_steps(steps)
+        description = "blended: " + ", ".join(f"{k} {v}" for k, v in steps)
+        self.get_logger().info(f"→ {description} ({trajectory.duration:.1f} s planned)")
+        step = self.profile.start_step(description)
+        step.on_accepted(True)
+        self._track(trajectory)
+        step.on_result(GoalStatus.STATUS_SUCCEEDED)
+        self.get_logger().info(f"   done: {description}")
+        return True
+
     # ---- the full sequence ------------------------------------------------
+    def _motion(self, steps):
+        """Drive a block of drive/turn steps in the current mode; log time and pose error.
+
+        Blended mode needs /odom to track the trajectory; the actions run
+        without it, only the pose error is then not reported.
+        """
+        # the actions do not wait long for it: they never needed /odom
+        start_pose = self._wait_for_odom(5.0 if self.mode == "blended" else 1.0)
+        if start_pose is None and self.mode == "blended":
+            self.get_logger().error("   no /odom received")
+            return False
+        start = time.monotonic()
+        if self.mode == "blended":
+            ok = self.blended(steps)
+        else:
+            moves = {"drive": self.drive_forward, "turn": self.turn_left}
+            ok = all(moves[kind](value) for kind, value in steps)
+        if not ok:
+            return False
+        # wait a moment for the last odometry, then compare with the plan
+        end = time.monotonic() + 0.2
+        while time.monotonic() < end:
+            rclpy.spin_once(self, timeout_sec=0.05)
+        elapsed = time.monotonic() - start
+        self.profile.info["motion_s"] = round(elapsed, 2)
+        if start_pose is None:
+            self.get_logger().info(f"   {self.mode}: {elapsed:.2f} s (no /odom, pose error unknown)")
+            return True
+        x0, y0, th0 = start_pose
+        x, y, th = self._odom
+        dx, dy = x - x0, y - y0
+        px, py, pth = end_pose(steps)
+        rx = math.cos(th0) * dx + math.sin(th0) * dy
+        ry = -math.sin(th0) * dx + math.cos(th0) * dy
+        error_m = math.hypot(rx - px, ry - py)
+        error_deg = math.degrees(abs(wrap(th - th0 - pth)))
+        self.get_logger().info(
+            f"   {self.mode}: {elapsed:.2f} s, final pose error {error_m * 100:.1f} cm / {error_deg:.1f}°"
+        )
+        self.profile.info["error_cm"] = round(error_m * 100, 1)
+        self.profile.info["error_deg"] = round(error_deg, 1)
+        return True
+
     def run_sequence(self):
-        steps = [
-            lambda: self.undock(),
-            lambda: self.drive_forward(0.5),
-            lambda: self.turn_left(90),
-            lambda: self.turn_left(70),
-            lambda: self.dock(),
-        ]
-        for step in steps:
-            if not step():
-                self.get_logger().error("Sequence aborted.")
-                return
-        self.get_logger().info("Sequence complete. 🐢")
+        # consecutive drive/turn steps form one block of motion
+        blocks = []
+        for kind, value in SEQUENCE:
+            if kind in ("drive", "turn"):
+                if not blocks or not isinstance(blocks[-1], list):
+                    blocks.append([])
+                blocks[-1].append((kind, value))
+            else:
+                blocks.append(kind)
+        actions = {"undock": self.undock, "dock": self.dock}
+        completed = False
+        try:
+            for block in blocks:
+                ok = self._motion(block) if isinstance(block, list) else actions[block]()
+                if not ok:
+                    self.get_logger().error("Sequence aborted.")
+                    return
+            completed = True
+            self.get_logger().info("Sequence complete. 🐢")
+        finally:
+            path = self.profile.save(completed)
+            self.get_logger().info(f"Run profile saved to {path}")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Scripted TurtleBot 4 drive.")
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIR, help="where run profiles are saved")
+    parser.add_argument("--mode", choices=["actions", "blended"], default="actions",
+                        help="one action per step, or one blended trajectory on /cmd_vel")
+    args = parser.parse_args()
+
     rclpy.init()
-    node = DrivePattern()
+    node = DrivePattern(args.log_dir, args.mode)
     try:
         node.run_sequence()
     finally:
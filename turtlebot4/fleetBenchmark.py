@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""Memory and CPU of one fleet dashboard vs one dashboard per robot.
+
+Starts sensorDashboard.py for the given robots twice:
+
+    * separate -> one process per robot (--domains <id> --port <port + i>)
+    * single   -> one process for all robots (--domains <ids>)
+
+and for each set-up reports how long it took until every robot's /data
+answered, the summed resident memory (RSS) of the processes, and their CPU
+use (percent of one core) during --window seconds. With --poll the robot
+pages are fetched like an open browser tab would (data + lidar, 2x per
+second per robot), otherwise the dashboards are idle.
+
+Usage (ROS 2 sourced; the robots do not have to be online):
+    python3 fleetBenchmark.py --domains 1-4
+    python3 fleetBenchmark.py --domains 1-8 --window 30 --poll
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from testalive import parse_domains
+
+DASHBOARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sensorDashboard.py")
+TICKS = os.sysconf("SC_CLK_TCK")
+
+
+# ---- /proc helpers -------------------------------------------------------
+def descendants(pid):
+    """pid and the pids of all its children."""
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the command name may contain spaces, the ppid follows the last ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+    result, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        result.append(p)
+        todo.extend(parents.get(p, []))
+    return result
+
+
+def rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def cpu_s(pid):
+    """User + system CPU seconds of a process."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / TICKS
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+def tree_usage(procs):
+    pids = [p for proc in procs for p in descendants(proc.pid)]
+    return sum(rss_kb(p) for p in pids), sum(cpu_s(p) for p in pids)
+
+
+# ---- measuring -----------------------------------------------------------
+def ok(url):
+    try:
+        with urllib.request.urlopen(url, timeout=1.0) as resp:
+            resp.read()
+            return resp.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+
+def robot_urls(mode, domains, port):
+    """Base URL of every robot page in the given set-up."""
+    if mode == "separate":
+        return [f"http://127.0.0.1:{port + i}" for i in range(len(domains))]
+    return [f"http://127.0.0.1:{port}/robot/{d}" for d in domains]
+
+
+def start(mode, domains, port):
+    if mode == "separate":
+        cmds = [[sys.executable, DASHBOARD, "--domains", str(d), "--port", str(port + i)]
+                for i, d in enumerate(domains)]
+    else:
+        cmds = [[sys.executable, DASHBOARD, "--domains", ",".join(map(str, domains)),
+                 "--port", str(port)]]
+    return [subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             start_new_session=True)
+            for cmd in cmds]
+
+
+def stop(procs):
+    for proc in procs:
+        os.killpg(proc.pid, signal.SIGINT)
+    for proc in procs:
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            os.killpg(proc.pid, signal.SIGKILL)
+
+
+def measure(mode, domains, port, window, poll, timeout):
+    urls = robot_urls(mode, domains, port)
+    t0 = time.monotonic()
+    procs = start(mode, domains, port)
+    try:
+        startup = None
+        waiting = list(urls)
+        while waiting and time.monotonic() - t0 < timeout:
+            waiting = [u for u in waiting if not ok(u + "/data")]
+            if waiting:
+                time.sleep(0.1)
+        if not waiting:
+            startup = time.monotonic() - t0
+        time.sleep(1.0)  # let discovery settle
+
+        _, cpu_start = tree_usage(procs)
+        t1 = time.monotonic()
+        while time.monotonic() - t1 < window:
+            if poll:
+                for u in urls:
+                    ok(u + "/data")
+                    ok(u + "/lidar.json")
+            time.sleep(0.5)
+        rss, cpu_end = tree_usage(procs)
+        elapsed = time.monotonic() - t1
+    finally:
+        stop(procs)
+    return {
+        "mode": mode,
+        "processes": len(procs),
+        "startup_s": startup,
+        "rss_mb": rss / 1024.0,
+        "cpu_percent": 100.0 * (cpu_end - cpu_start) / elapsed,
+    }
+
+
+def print_table(results, robots):
+    print(f"{robots} robot(s)")
+    print(f"{'mode':<9} {'procs':>6} {'startup s':>10} {'RSS MB':>9} {'CPU %':>7}")
+    for r in results:
+        startup = f"{r['startup_s']:.2f}" if r["startup_s"] is not None else "timeout"
+        print(f"{r['mode']:<9} {r['processes']:>6} {startup:>10} {r['rss_mb']:>9.1f} "
+              f"{r['cpu_percent']:>7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one fleet dashboard with one per robot.")
+    parser.add_argument("--domains", type=parse_domains, default=[1, 2, 3, 4],
+                        help="robots to watch, e.g. 1-4 (default)")
+    parser.add_argument("--port", type=int, default=5100, help="first port to use")
+    parser.add_argument("--window", type=float, default=20.0, help="seconds to measure CPU")
+    parser.add_argument("--poll", action="store_true", help="fetch the robot pages while measuring")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for startup")
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("separate", "single"):
+        print(f"measuring {mode} ...")
+        results.append(measure(mode, args.domains, args.port, args.window, args.poll, args.timeout))
+    print_table(results, len(args.domains))
+
+
+if __name__ == "__main__":
+    main()
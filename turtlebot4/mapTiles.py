@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""Tile pyramid for maps saved with shells/save-map.sh.
+
+save-map.sh writes ~/mapGazeboTurtlebot<ID>.pgm + .yaml. Showing such a map
+normally means loading and decoding the whole image. MapPyramid converts it
+once into a multi-resolution pyramid that is cached on disk and opened with
+numpy.memmap, and serves 256x256 PNG tiles by zoom level, x and y:
+
+    * zoom 0 is the whole map in one tile, max_zoom is full resolution
+    * every level is half the size of the next one; 2x2 pixels become their
+      darkest pixel, so walls (black) stay visible when zoomed out
+    * only the tiles that are asked for are read from disk and encoded, and
+      the last encoded tiles are kept in a small LRU cache, so memory use and
+      time per tile do not grow with the size of the map
+
+The cache lives in ~/.cache/map_tiles and is rebuilt when the map changes.
+sensorDashboard.py serves the tiles of all saved maps under /map/...
+
+Build (or check) the cache from the command line:
+
+    python3 mapTiles.py ~/mapGazeboTurtlebot4.yaml
+"""
+
+import json
+import os
+import shutil
+import struct
+import sys
+import threading
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+import yaml
+
+DEFAULT_CACHE = os.path.expanduser("~/.cache/map_tiles")
+TILE_SIZE = 256
+UNKNOWN = 205  # map_saver's grey for unknown cells, used as padding
+
+
+# --------------------------------------------------------------------------
+# Reading the saved map
+# --------------------------------------------------------------------------
+def read_pgm(path):
+    """PGM (P5 binary or P2 ascii, 8 bit) -> (uint8 array, memory-mapped if P5)."""
+    with open(path, "rb") as f:
+        data = f.read(4096)
+    tokens, pos = [], 0
+    # header: magic, width, height, maxval, separated by whitespace / comments
+    while len(tokens) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b"#":
+            pos = data.index(b"\n", pos) + 1
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        tokens.append(data[pos:end])
+        pos = end
+    magic, width, height, maxval = tokens[0], int(tokens[1]), int(tokens[2]), int(tokens[3])
+    if maxval > 255:
+        raise ValueError(f"{path}: only 8-bit PGM maps are supported")
+    if magic == b"P5":
+        # exactly one whitespace character after maxval
+        return np.memmap(path, dtype=np.uint8, mode="r", offset=pos + 1, shape=(height, width))
+    if magic == b"P2":
+        with open(path, "rb") as f:
+            values = f.read()[pos:].split()
+        return np.array(values, dtype=np.uint8).reshape(height, width)
+    raise ValueError(f"{path}: not a PGM file ({magic!r})")
+
+
+def load_map_yaml(path):
+    with open(path) as f:
+        meta = yaml.safe_load(f)
+    image = meta["image"]
+    if not os.path.isabs(image):
+        image = os.path.join(os.path.dirname(os.path.abspath(path)), image)
+    meta["image"] = image
+    return meta
+
+
+def _downsample(level):
+    """Half size; each 2x2 block becomes its darkest pixel."""
+    h, w = level.shape
+    padded = np.full((h + h % 2, w + w % 2), UNKNOWN, dtype=np.uint8)
+    padded[:h, :w] = level
+    return padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).min(axis=(1, 3))
+
+
+# --------------------------------------------------------------------------
+# PNG encoding (8 bit, no dependencies besides zlib)
+# --------------------------------------------------------------------------
+# channels -> PNG colour type: gray, gray + alpha, RGB, RGBA
+COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+
+def encode_png(pixels):
+    """uint8 array (h, w) or (h, w, channels) -> PNG bytes."""
+    h, w = pixels.shape[:2]
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    raw = np.zeros((h, w * channels + 1), dtype=np.uint8)  # filter byte 0 in front of every row
+    raw[:, 1:] = pixels.reshape(h, w * channels)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, COLOR_TYPES[channels], 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + _chunk(b"IEND", b"")
+    )
+
+
+# --------------------------------------------------------------------------
+# The pyramid
+# --------------------------------------------------------------------------
+class MapPyramid:
+    def __init__(self, yaml_path, cache_dir=DEFAULT_CACHE, tile_size=TILE_SIZE, cached_tiles=256):
+        self.yaml_path = os.path.abspath(yaml_path)
+        self.name = os.path.splitext(os.path.basename(yaml_path))[0]
+        self.meta = load_map_yaml(yaml_path)
+        self.tile_size = tile_size
+        self.version = self._key()
+        self.directory = os.path.join(cache_dir, f"{self.name}-{self.version}")
+        if not os.path.exists(os.path.join(self.directory, "index.json")):
+            self._build(cache_dir)
+        with open(os.path.join(self.directory, "index.json")) as f:
+            self.index = json.load(f)
+        self.levels = [
+            np.memmap(os.path.join(self.directory, f"level{z}.raw"), dtype=np.uint8, mode="r",
+                      shape=(lvl["height"], lvl["width"]))
+            for z, lvl in enumerate(self.index["levels"])
+        ]
+        self._tiles = OrderedDict()
+        self._cached_tiles = cached_tiles
+        self._lock = threading.Lock()
+
+    def _key(self):
+        """Changes whenever the map files or the tile size change."""
+        parts = [str(self.tile_size)]
+        for path in (self.yaml_path, self.meta["image"]):
+            st = os.stat(path)
+            parts += [str(st.st_size), str(int(st.st_mtime))]
+        return format(zlib.crc32("-".join(parts).encode()), "08x")
+
+    def _build(self, cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = self.directory + f".tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        level = np.asarray(read_pgm(self.meta["image"]))
+        if self.meta.get("negate"):
+            level = 255 - level
+        levels = [level]
+        while max(levels[0].shape) > self.tile_size:
+            levels.insert(0, _downsample(levels[0]))
+        for z, lvl in enumerate(levels):
+            lvl.tofile(os.path.join(tmp, f"level{z}.raw"))
+        index = {
+            "name": self.name,
+            "tile_size": self.tile_size,
+            "resolution": self.meta.get("resolution"),
+            "origin": self.meta.get("origin"),
+            "max_zoom": len(levels) - 1,
+            "levels": [
+                {
+                    "width": lvl.shape[1],
+                    "height": lvl.shape[0],
+                    "tiles_x": -(-lvl.shape[1] // self.tile_size),
+                    "tiles_y": -(-lvl.shape[0] // self.tile_size),
+                }
+                for lvl in levels
+            ],
+        }
+        with open(os.path.join(tmp, "index.json"), "w") as f:
+            json.dump(index, f)
+        try:
+            os.rename(tmp, self.directory)
+        except OSError:
+            # someone else built it at the same time
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def is_current(self):
+        """False once the map was saved again (the cache is then out of date)."""
+        try:
+            return self._key() == self.version
+        except OSError:
+            return False
+
+    def info(self):
+        return dict(self.index, version=self.version)
+
+    def tile(self, z, x, y):
+        """PNG bytes of tile (z, x, y), or None when it is outside the map."""
+        if not 0 <= z < len(self.levels):
+            return None
+        level = self.levels[z]
+        t = self.tile_size
+        if not (0 <= x * t < level.shape[1] and 0 <= y * t < level.shape[0]):
+            return None
+        key = (z, x, y)
+        with self._lock:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+                return self._tiles[key]
+        # only this tile's rows are read from the memory-mapped level
+        png = encode_png(np.ascontiguousarray(level[y * t:(y + 1) * t, x * t:(x + 1) * t]))
+        with self._lock:
+            self._tiles[key] = png
+            while len(self._tiles) > self._cached_tiles:
+                self._tiles.popitem(last=False)
+        return png
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python3 mapTiles.py <map.yaml> [...]")
+    for path in sys.argv[1:]:
+        pyramid = MapPyramid(path)
+        info = pyramid.info()
+        full = info["levels"][-1]
+        print(f"{pyramid.name}: {full['width']}x{full['height']} px, zoom 0..{info['max_zoom']}, "
+              f"cache {pyramid.directory}")
+
+
+if __name__ == "__main__":
+    main()
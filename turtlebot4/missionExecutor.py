@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""Run a TurtleBot 4 mission described in a YAML file.
+
+A faster, more flexible version of drivePattern.py:
+
+    * the steps come from a YAML file (see missions/drivePattern.yaml)
+    * all action servers the mission needs are discovered once, at the same
+      time, at startup (drivePattern.py waits for a server before every step)
+    * the steps run as rclpy coroutines, so no step blocks the node: while a
+      goal is running, the monitors keep receiving messages
+    * monitors (hazard detection, low battery) cancel the running goal the
+      moment they trigger and abort the mission; `on_abort` steps then run
+
+Run this ON the Raspberry Pi of the TurtleBot 4 with ROS 2 sourced:
+
+    source /opt/ros/humble/setup.bash
+    python3 missionExecutor.py missions/drivePattern.yaml
+"""
+
+import os
+
+# Use ROS domain 4 unless another one is set before rclpy reads the environment.
+os.environ.setdefault("ROS_DOMAIN_ID", "4")
+
+import argparse
+import math
+import sys
+import time
+
+import yaml
+
+import rclpy
+from rclpy.action import ActionClient
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from rclpy.task import Future
+
+from action_msgs.msg import GoalStatus
+from sensor_msgs.msg import BatteryState
+from irobot_create_msgs.action import Undock, Dock, DriveDistance, RotateAngle
+from irobot_create_msgs.msg import HazardDetection, HazardDetectionVector
+
+
+# step kind -> (action type, action server)
+ACTIONS = {
+    "undock": (Undock, "/undock"),
+    "dock": (Dock, "/dock"),
+    "drive": (DriveDistance, "/drive_distance"),
+    "turn": (RotateAngle, "/rotate_angle"),
+}
+
+# HazardDetection.type values by name, taken from the message constants
+HAZARD_TYPES = {
+    name: getattr(HazardDetection, name)
+    for name in ("BACKUP_LIMIT", "BUMP", "CLIFF", "STALL", "WHEEL_DROP", "OBJECT_PROXIMITY")
+}
+
+
+# arguments every step kind needs
+REQUIRED = {
+    "drive": ["distance"],
+    "turn": ["angle"],
+    "wait": ["seconds"],
+}
+
+
+class MissionError(Exception):
+    pass
+
+
+def parse_step(raw):
+    """'dock' or {'drive': {'distance': 0.5}} -> ('drive', {'distance': 0.5})."""
+    if isinstance(raw, str):
+        kind, args = raw, {}
+    elif isinstance(raw, dict) and len(raw) == 1:
+        kind, args = next(iter(raw.items()))
+        args = args or {}
+    else:
+        raise MissionError(f"invalid step: {raw!r}")
+    if kind not in ACTIONS and kind != "wait":
+        raise MissionError(f"unknown step '{kind}' (use {', '.join(list(ACTIONS) + ['wait'])})")
+    missing = [a for a in REQUIRED.get(kind, []) if a not in args]
+    if missing:
+        raise MissionError(f"step '{kind}' needs: {', '.join(missing)}")
+    return kind, dict(args)
+
+
+def describe(kind, args):
+    if kind == "drive":
+        return f"drive {args['distance']} m"
+    if kind == "turn":
+        return f"turn {'left' if args['angle'] >= 0 else 'right'} {abs(args['angle'])}°"
+    if kind == "wait":
+        return f"wait {args['seconds']} s"
+    return kind
+
+
+def load_mission(path):
+    with open(path) as f:
+        data = yaml.safe_load(f) or {}
+    mission = {
+        "steps": [parse_step(s) for s in data.get("steps", [])],
+        "on_abort": [parse_step(s) for s in data.get("on_abort") or []],
+        "monitors": data.get("monitors") or {},
+    }
+    for name in mission["monitors"].get("hazards") or []:
+        if name not in HAZARD_TYPES:
+            raise MissionError(f"unknown hazard type '{name}' (use {', '.join(HAZARD_TYPES)})")
+    if not mission["steps"]:
+        raise MissionError(f"{path}: no steps")
+    return mission
+
+
+class MissionExecutor(Node):
+    def __init__(self, mission):
+        super().__init__("mission_executor")
+        self.mission = mission
+        kinds = {kind for kind, _ in mission["steps"] + mission["on_abort"]}
+        self._action_clients = {
+            kind: ActionClient(self, *ACTIONS[kind]) for kind in kinds if kind in ACTIONS
+        }
+
+        # what is running now: a goal handle or the future of a wait step
+        self._active_goal = None
+        self._active_wait = None
+        self.abort_reason = None
+
+        monitors = mission["monitors"]
+        self._hazards = {HAZARD_TYPES[h] for h in monitors.get("hazards") or []}
+        self._battery_min = monitors.get("battery_min")
+        if self._hazards:
+            self.create_subscription(
+                HazardDetectionVector, "/hazard_detection", self._on_hazard, qos_profile_sensor_data
+            )
+        if self._battery_min is not None:
+            self.create_subscription(
+                BatteryState, "/battery_state", self._on_battery, qos_profile_sensor_data
+            )
+
+    # ---- discovery: every server at once, only at startup ------------------
+    def discover(self, timeout_sec=10.0):
+        """Wait until every action server is up. Returns the missing ones."""
+        pending = dict(self._action_clients)
+        end = time.monotonic() + timeout_sec
+        while pending and time.monotonic() < end:
+            rclpy.spin_once(self, timeout_sec=0.1)
+            for kind in [k for k, c in pending.items() if c.server_is_ready()]:
+                del pending[kind]
+        return sorted(ACTIONS[k][1] for k in pending)
+
+    # ---- monitors -----------------------------------------------------------
+    def _on_hazard(self, msg):
+        hit = [d for d in msg.detections if d.type in self._hazards]
+        if hit:
+            names = {v: k for k, v in HAZARD_TYPES.items()}
+            self.abort(f"hazard {names[hit[0].type]} ({hit[0].header.frame_id})")
+
+    def _on_battery(self, msg):
+        if 0.0 <= msg.percentage < self._battery_min:
+            self.abort(f"battery low ({msg.percentage * 100:.0f}%)")
+
+    def abort(self, reason):
+        """Stop the running step right away; the mission loop then stops."""
+        if self.abort_reason is not None:
+            return
+        self.abort_reason = reason
+        self.get_logger().error(f"ABORT: {reason}")
+        if self._active_goal is not None:
+            self._active_goal.cancel_goal_async()
+        if self._active_wait is not None and not self._active_wait.done():
+            self._active_wait.set_result(False)
+
+    # ---- steps ---------------------------------------------------------------
+    def _goal(self, kind, args):
+        action = ACTIONS[kind][0]
+        goal = action.Goal()
+        if kind == "drive":
+            goal.distance = float(args["distance"])
+            goal.max_translation_speed = float(args.get("speed", 0.15))
+        elif kind == "turn":
+            # ROS convention: positive angle = counter-clockwise = left turn.
+            goal.angle = math.radians(args["angle"])
+            goal.max_rotation_speed = float(args.get("speed", 0.8))
+        return goal
+
+    async def _wait(self, seconds):
+        future = Future()
+        self._active_wait = future
+
+        def done():
+            timer.cancel()
+            if not future.done():
+                future.set_result(True)
+
+        timer = self.create_timer(float(seconds), done)
+        try:
+            return await future
+        finally:
+            self.destroy_timer(timer)
+            self._active_wait = None
+
+    async def run_step(self, kind, args, abortable=True):
+        description = describe(kind, args)
+        self.get_logger().info(f"→ {description}")
+        start = time.monotonic()
+        if kind == "wait":
+            ok = await self._wait(args["seconds"])
+        else:
+            goal_handle = await self._action_clients[kind].send_goal_async(self._goal(kind, args))
+            if goal_handle is None or not goal_handle.accepted:
+                self.get_logger().error(f"   goal rejected: {description}")
+                return False
+            self._active_goal = goal_handle
+            # the monitor may have fired while the goal was being accepted
+            if abortable and self.abort_reason is not None:
+                goal_handle.cancel_goal_async()
+            try:
+                result = await goal_handle.get_result_async()
+            finally:
+                self._active_goal = None
+            ok = result.status == GoalStatus.STATUS_SUCCEEDED
+        if abortable and self.abort_reason is not None:
+            return False
+        if not ok:
+            self.get_logger().error(f"   failed: {description}")
+            return False
+        self.get_logger().info(f"   done: {description} ({time.monotonic() - start:.1f} s)")
+        return True
+
+    async def run(self):
+        start = time.monotonic()
+        for kind, args in self.mission["steps"]:
+            if self.abort_reason is not None or not await self.run_step(kind, args):
+                break
+        else:
+            self.get_logger().info(f"Mission complete in {time.monotonic() - start:.1f} s. 🐢")
+            return True
+
+        self.get_logger().error("Mission aborted.")
+        if self.mission["on_abort"]:
+            self.get_logger().info("Running on_abort steps.")
+            for kind, args in self.mission["on_abort"]:
+                if not await self.run_step(kind, args, abortable=False):
+                    break
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("mission", help="mission YAML file")
+    parser.add_argument("--discovery-timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    try:
+        mission = load_mission(args.mission)
+    except (OSError, MissionError, yaml.YAMLError) as e:
+        sys.exit(f"Cannot load mission: {e}")
+
+    rclpy.init()
+    node = MissionExecutor(mission)
+    ok = False
+    try:
+        missing = node.discover(args.discovery_timeout)
+        if missing:
+            node.get_logger().error(f"action server(s) not available: {', '.join(missing)}")
+        else:
+            executor = SingleThreadedExecutor()
+            executor.add_node(node)
+            task = executor.create_task(node.run())
+            executor.spin_until_future_complete(task)
+            ok = bool(task.result())
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
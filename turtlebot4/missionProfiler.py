@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Per-step timing of TurtleBot 4 missions, and a report to compare runs.
+
+drivePattern.py records every step of a run with a MissionProfile:
+
+    * send     -> goal sent until the server accepted it
+    * feedback -> accepted until the first feedback message
+    * result   -> accepted until the result arrived
+    * the feedback stream itself (time + the first numeric field, e.g.
+      DriveDistance remaining_travel_distance), rounded to keep it small
+
+Each run is saved as one JSON-lines file (a header line, then one line per
+step) in the log directory, by default runs/ next to this script.
+
+Compare runs (the first file is the baseline):
+
+    python3 missionProfiler.py runs/*.jsonl
+    python3 missionProfiler.py --threshold 10 runs/2024-05-01_*.jsonl runs/latest.jsonl
+"""
+
+import argparse
+import json
+import os
+import socket
+import time
+
+
+def _ms(start, end):
+    return None if start is None or end is None else round((end - start) * 1000.0, 1)
+
+
+def _first_number(msg):
+    """Value of the first numeric field of a feedback message (or None)."""
+    for name in msg.get_fields_and_field_types():
+        value = getattr(msg, name)
+        if isinstance(value, (bool, int, float)):
+            return round(float(value), 4)
+    return None
+
+
+class StepProfile:
+    def __init__(self, description):
+        self.description = description
+        self.sent = time.monotonic()
+        self.accepted_at = None
+        self.first_feedback = None
+        self.result_at = None
+        self.accepted = None
+        self.status = None
+        self.feedback = []  # [ms since accepted (or sent), value]
+
+    def on_feedback(self, feedback_msg):
+        """feedback_callback for ActionClient.send_goal_async."""
+        now = time.monotonic()
+        if self.first_feedback is None:
+            self.first_feedback = now
+        since = self.accepted_at or self.sent
+        self.feedback.append([round((now - since) * 1000.0), _first_number(feedback_msg.feedback)])
+
+    def on_accepted(self, accepted):
+        self.accepted_at = time.monotonic()
+        self.accepted = bool(accepted)
+
+    def on_result(self, status):
+        self.result_at = time.monotonic()
+        self.status = int(status) if status is not None else None
+
+    def to_dict(self):
+        return {
+            "step": self.description,
+            "accepted": self.accepted,
+            "status": self.status,
+            "send_ms": _ms(self.sent, self.accepted_at),
+            "first_feedback_ms": _ms(self.accepted_at, self.first_feedback),
+            "result_ms": _ms(self.accepted_at, self.result_at),
+            "total_ms": _ms(self.sent, self.result_at or self.accepted_at),
+            "feedback_count": len(self.feedback),
+            "feedback": self.feedback,
+        }
+
+
+class MissionProfile:
+    def __init__(self, name, log_dir):
+        self.name = name
+        self.log_dir = log_dir
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.steps = []
+        # extra run information for the header line (mode, pose error, ...)
+        self.info = {}
+
+    def start_step(self, description):
+        step = StepProfile(description)
+        self.steps.append(step)
+        return step
+
+    def save(self, completed):
+        """Write the run to <log_dir>/<name>_<date>_<time>.jsonl; returns the path."""
+        os.makedirs(self.log_dir, exist_ok=True)
+        stamp = time.strftime("%Y-%m-%d_%H%M%S", time.localtime(self.started))
+        path = os.path.join(self.log_dir, f"{self.name}_{stamp}.jsonl")
+        header = {
+            "mission": self.name,
+            "started": stamp,
+            "host": socket.gethostname(),
+            "ros_domain_id": os.environ.get("ROS_DOMAIN_ID"),
+            "completed": completed,
+            "total_ms": round((time.monotonic() - self._start) * 1000.0, 1),
+        }
+        header.update(self.info)
+        with open(path, "w") as f:
+            f.write(json.dumps(header, separators=(",", ":")) + "\n")
+            for step in self.steps:
+                f.write(json.dumps(step.to_dict(), separators=(",", ":")) + "\n")
+        return path
+
+
+# --------------------------------------------------------------------------
+# Report
+# --------------------------------------------------------------------------
+# header fields every run has; anything else (MissionProfile.info) is printed
+RUN_FIELDS = {"mission", "started", "host", "ros_domain_id", "completed", "total_ms"}
+
+
+def load_run(path):
+    with open(path) as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    return {"path": path, "header": lines[0], "steps": lines[1:]}
+
+
+def _fmt(value):
+    return "—" if value is None else f"{value / 1000.0:.2f}"
+
+
+def _keyed_steps(run):
+    """{(step name, occurrence): step} in run order."""
+    seen = {}
+    keyed = {}
+    for s in run["steps"]:
+        n = seen[s["step"]] = seen.get(s["step"], 0) + 1
+        keyed[(s["step"], n)] = s
+    return keyed
+
+
+def report(runs, threshold):
+    """Print every run next to the baseline (first run); flag slower steps."""
+    base = runs[0]
+    names = [os.path.basename(r["path"]) for r in runs]
+    width = max(24, max((len(s["step"]) for r in runs for s in r["steps"]), default=0) + 2)
+    print("Runs:")
+    for i, (name, run) in enumerate(zip(names, runs)):
+        h = run["header"]
+        extra = "".join(f"  {k} {v}" for k, v in h.items() if k not in RUN_FIELDS)
+        print(f"  [{i}] {name}  total {_fmt(h['total_ms'])} s{extra}"
+              f"{'' if h['completed'] else '  (aborted)'}")
+    print()
+    print("seconds per step: send / first feedback / result   (* = slower than "
+          f"baseline by more than {threshold:.0f}%)")
+    print(f"{'step':<{width}}" + "".join(f"{'[' + str(i) + ']':>24}" for i in range(len(runs))))
+
+    # match steps by name (and occurrence, e.g. the second "turn 90"), not by position:
+    # an actions run and a blended run have different step lists
+    keyed = [_keyed_steps(r) for r in runs]
+    rows = []
+    for steps in keyed:
+        rows += [key for key in steps if key not in rows]
+    regressions = 0
+    for key in rows:
+        row = ""
+        ref = keyed[0].get(key)
+        for run, steps in zip(runs, keyed):
+            s = steps.get(key)
+            if s is None:
+                row += f"{'—':>24}"
+                continue
+            cell = f"{_fmt(s['send_ms'])}/{_fmt(s['first_feedback_ms'])}/{_fmt(s['result_ms'])}"
+            if (run is not base and ref and ref["total_ms"] and s["total_ms"]
+                    and s["total_ms"] > ref["total_ms"] * (1.0 + threshold / 100.0)):
+                cell += "*"
+                regressions += 1
+            row += f"{cell:>24}"
+        print(f"{key[0]:<{width}}" + row)
+
+    totals = "".join(f"{_fmt(r['header']['total_ms']):>24}" for r in runs)
+    print(f"{'total (incl. discovery)':<{width}}" + totals)
+    # time not spent inside any step: discovery, waiting between steps
+    dead = "".join(
+        f"{_fmt(r['header']['total_ms'] - sum(s['total_ms'] or 0 for s in r['steps'])):>24}"
+        for r in runs
+    )
+    print(f"{'outside steps':<{width}}" + dead)
+    if regressions:
+        print(f"\n{regressions} step(s) slower than the baseline.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare mission runs step by step.")
+    parser.add_argument("runs", nargs="+", help="run logs (.jsonl); the first is the baseline")
+    parser.add_argument("--threshold", type=float, default=20.0,
+                        help="percent slower than the baseline that counts as a regression")
+    args = parser.parse_args()
+    report([load_run(p) for p in args.runs], args.threshold)
+
+
+if __name__ == "__main__":
+    main()
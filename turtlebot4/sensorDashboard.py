@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 """Flask sensor dashboard for the TurtleBot 4.
 
-Run this ON the Raspberry Pi of the TurtleBot 4 (ROS 2 sourced).
-It starts a ROS 2 node on ROS_DOMAIN_ID=4, subscribes to the robot's
-sensor topics and serves a web page that visualises them live:
+Run this ON the Raspberry Pi of the TurtleBot 4 (ROS 2 sourced), or on any
+machine in the same network. It starts a ROS 2 node on ROS_DOMAIN_ID=4,
+subscribes to the robot's sensor topics and serves a web page that
+visualises them live:
 
     * Bumpers / cliff / wheel-drop   -> /hazard_detection
     * Proximity IR sensors           -> /ir_intensity   (TB4 has IR, not sonar)
@@ -11,24 +12,37 @@ sensor topics and serves a web page that visualises them live:
     * OAK-D camera (depthai)         -> /oakd/rgb/image_raw/compressed (MJPEG)
     * OAK-D depth / 3D (depthai)     -> /oakd/stereo/image_raw (colorised depth MJPEG)
     * Battery / IMU / dock           -> /battery_state, /imu, /dock_status
+    * Saved maps (save-map.sh)       -> ~/mapGazeboTurtlebot*.yaml as map tiles
+    * nav2 costmaps                  -> /global_costmap/costmap (+ _updates), same for local
+    * Teleop buttons                 -> /cmd_vel, through the mux in cmdVelMux.py
+                                        (also /cmd_vel/joystick and /cmd_vel/auto)
+
+One process can also watch a whole fleet: with --domains every robot gets
+its own SensorHub in its own rclpy context (= DDS domain) and executor
+thread. The robots are then served under /robot/<domain id>/ and / shows a
+fleet overview. fleetBenchmark.py compares the memory / CPU use of that with
+one dashboard process per robot.
 
 Usage:
     source /opt/ros/humble/setup.bash
     python3 sensorDashboard.py
     # then browse to http://<pi-ip>:5000
+    python3 sensorDashboard.py --domains 1-4 --port 5000
 """
 
-import os
-
-# Force the correct ROS domain before rclpy reads the environment.
-os.environ["ROS_DOMAIN_ID"] = "4"
-
+import argparse
+import glob
 import math
+import os
+import resource
 import threading
+import time
 
 import rclpy
+from rclpy.context import Context
+from rclpy.executors import SingleThreadedExecutor
 from rclpy.node import Node
-from rclpy.qos import qos_profile_sensor_data
+from rclpy.qos import DurabilityPolicy, QoSProfile, ReliabilityPolicy, qos_profile_sensor_data
 
 from rclpy.action import ActionClient
 
@@ -48,6 +62,7 @@ except ImportError:  # pragma: no cover
 # those subscriptions (and dock/undock) instead of crashing the dashboard.
 try:
     from irobot_create_msgs.msg import (
+        HazardDetection,
         HazardDetectionVector,
         IrIntensityVector,
         DockStatus,
@@ -57,29 +72,53 @@ try:
 except ImportError:  # pragma: no cover
     HAVE_CREATE_MSGS = False
 
-from flask import Flask, Response, jsonify, render_template_string, request
+# Saved maps are served as tiles (see mapTiles.py); that needs numpy + yaml.
+try:
+    from mapTiles import MapPyramid
+    HAVE_MAPS = True
+except ImportError:  # pragma: no cover
+    HAVE_MAPS = False
+
+# nav2 costmaps are kept as tiles that are re-encoded where they change (see
+# costmapTiles.py); that needs numpy and map_msgs for the update messages.
+try:
+    from nav_msgs.msg import OccupancyGrid
+    from map_msgs.msg import OccupancyGridUpdate
+    from costmapTiles import CostmapTiles
+    HAVE_COSTMAPS = True
+except ImportError:  # pragma: no cover
+    HAVE_COSTMAPS = False
+
+from flask import Flask, Response, abort, jsonify, render_template_string, request
+
+from cmdVelMux import DEFAULT_INPUTS, CmdVelMux, MuxInput
+from testalive import parse_domains
+
+# Maps written by shells/save-map.sh.
+MAP_GLOB = os.path.expanduser("~/mapGazeboTurtlebot*.yaml")
 
 
 # --------------------------------------------------------------------------
 # ROS 2 node that collects the latest reading of every sensor.
 # --------------------------------------------------------------------------
 class SensorHub(Node):
-    # Human-readable names for the hazard vector types.
+    # Human-readable names for the hazard vector types (HazardDetection constants).
     HAZARD_TYPES = {
-        0: "BACKUP_LIMIT",
-        1: "BUMP",
-        2: "CLIFF",
-        3: "WHEEL_DROP",
-        4: "OBJECT_PROXIMITY",
-    }
+        getattr(HazardDetection, name): name
+        for name in ("BACKUP_LIMIT", "BUMP", "CLIFF", "STALL", "WHEEL_DROP", "OBJECT_PROXIMITY")
+    } if HAVE_CREATE_MSGS else {}
 
     # Teleop speeds and how long one button press keeps driving.
     LINEAR_SPEED = 0.15   # m/s
     ANGULAR_SPEED = 0.8   # rad/s
     DRIVE_DURATION = 0.6  # seconds per press
 
-    def __init__(self):
-        super().__init__("sensor_dashboard")
+    # nav2 costmap layers: /<layer>_costmap/costmap and .../costmap_updates
+    COSTMAP_LAYERS = ("global", "local")
+
+    def __init__(self, domain_id, context=None):
+        super().__init__("sensor_dashboard", context=context)
+        self.domain_id = domain_id
         self._lock = threading.Lock()
 
         # Latest values, protected by _lock.
@@ -93,12 +132,14 @@ class SensorHub(Node):
         self.depth_jpeg = None      # latest colourised depth frame as JPEG bytes
         self.depth_center_m = None  # distance (m) at the centre of the frame
 
-        # Teleop: cmd_vel publisher + a deadman timer so the robot stops
-        # automatically shortly after each button press.
-        self.cmd_pub = self.create_publisher(Twist, "/cmd_vel", 10)
-        self._cmd_twist = Twist()
-        self._drive_until = 0.0  # ROS time (seconds) the current command expires
-        self.create_timer(0.1, self._drive_tick)
+        # Teleop goes through the /cmd_vel mux: a button press is valid for
+        # DRIVE_DURATION seconds and beats the joystick and autonomous inputs.
+        # When nobody drives, the mux sends a few stops and then stays quiet.
+        self.mux = CmdVelMux(
+            self,
+            [MuxInput("teleop", 30, self.DRIVE_DURATION)]
+            + [i for i in DEFAULT_INPUTS if i.name != "teleop"],
+        )
 
         sensor_qos = qos_profile_sensor_data
 
@@ -141,6 +182,28 @@ class SensorHub(Node):
                 "irobot_create_msgs not found: bumpers/IR/dock/undock disabled."
             )
 
+        # nav2 publishes its costmaps latched and reliable.
+        self.costmaps = {}
+        if HAVE_COSTMAPS:
+            costmap_qos = QoSProfile(
+                depth=10,
+                reliability=ReliabilityPolicy.RELIABLE,
+                durability=DurabilityPolicy.TRANSIENT_LOCAL,
+            )
+            for layer in self.COSTMAP_LAYERS:
+                tiles = self.costmaps[layer] = CostmapTiles()
+                self.create_subscription(
+                    OccupancyGrid, f"/{layer}_costmap/costmap", tiles.set_full, costmap_qos
+                )
+                self.create_subscription(
+                    OccupancyGridUpdate, f"/{layer}_costmap/costmap_updates",
+                    tiles.apply_update, costmap_qos
+                )
+        else:
+            self.get_logger().warn(
+                "numpy/map_msgs not found: nav2 costmap view disabled."
+            )
+
     # ---- callbacks -------------------------------------------------------
     def _on_hazard(self, msg):
         with self._lock:
@@ -247,6 +310,7 @@ class SensorHub(Node):
     def snapshot(self):
         with self._lock:
             return {
+                "domain_id": self.domain_id,
                 "hazards": list(self.hazards),
                 "ir": dict(self.ir),
                 "battery": self.battery,
@@ -256,6 +320,7 @@ class SensorHub(Node):
                 "have_camera": self.jpeg is not None,
                 "have_depth": self.depth_jpeg is not None,
                 "depth_center_m": self.depth_center_m,
+                "drive": self.mux.status(),
             }
 
     def scan_snapshot(self):
@@ -271,23 +336,12 @@ class SensorHub(Node):
             return self.depth_jpeg
 
     # ---- teleop / actions ------------------------------------------------
-    def _now(self):
-        return self.get_clock().now().nanoseconds / 1e9
-
-    def _drive_tick(self):
-        """Deadman: publish the commanded twist, or stop when it expires."""
-        if self._now() < self._drive_until:
-            self.cmd_pub.publish(self._cmd_twist)
-        else:
-            self.cmd_pub.publish(Twist())  # zero -> stop
-
     def drive(self, linear, angular):
         """Drive for DRIVE_DURATION seconds (re-pressing extends it)."""
         t = Twist()
         t.linear.x = float(linear)
         t.angular.z = float(angular)
-        self._cmd_twist = t
-        self._drive_until = self._now() + self.DRIVE_DURATION
+        self.mux.set("teleop", t)
 
     def command(self, action):
         """Handle a button press. Returns (ok, message)."""
@@ -315,16 +369,26 @@ class SensorHub(Node):
 
 
 # --------------------------------------------------------------------------
-# ROS spinning in a background thread so Flask stays responsive.
+# ROS spinning in background threads (one per robot) so Flask stays responsive.
 # --------------------------------------------------------------------------
-hub = None
+DOMAINS = [4]  # set from --domains; the first one is also served without prefix
+hubs = {}      # domain id -> SensorHub, filled in by the ROS threads
+
 
+def ros_thread(domain_id):
+    """One robot: its own context (DDS domain), node and executor."""
+    context = Context()
+    rclpy.init(context=context, domain_id=domain_id)
+    hub = SensorHub(domain_id, context=context)
+    executor = SingleThreadedExecutor(context=context)
+    executor.add_node(hub)
+    hubs[domain_id] = hub
+    executor.spin()
 
-def ros_thread():
-    global hub
-    rclpy.init()
-    hub = SensorHub()
-    rclpy.spin(hub)
+
+def get_hub(domain):
+    """SensorHub for a robot URL (domain None = the first robot), or None."""
+    return hubs.get(DOMAINS[0] if domain is None else domain)
 
 
 # --------------------------------------------------------------------------
@@ -361,8 +425,16 @@ INDEX_HTML = """
   .dockrow button{flex:1;padding:.6rem;border:1px solid #263445;border-radius:10px;
     background:#1b2b3a;color:#e6edf3;cursor:pointer;}
   .dockrow button:hover{background:#243848;}
+  .mapbar{display:flex;gap:.5rem;margin-bottom:.5rem;}
+  .mapbar select,.mapbar button{background:#22303f;color:#e6edf3;border:1px solid #263445;
+    border-radius:8px;padding:.3rem .6rem;}
+  .tilebox{height:320px;overflow:auto;border-radius:8px;background:#000;}
+  .tilebox div{position:relative;}
+  .tilebox img{position:absolute;width:auto;border-radius:0;image-rendering:pixelated;background:none;}
 </style></head><body>
-<h1>🐢 TurtleBot 4 &mdash; live sensors <span class="muted" id="conn"></span></h1>
+<h1>🐢 TurtleBot 4 &mdash; live sensors
+  {% if fleet %}<span class="muted">· domein {{ domain_id }} · <a href="{{ url_for('fleet') }}" style="color:#7ee787">vloot</a></span>{% endif %}
+  <span class="muted" id="conn"></span></h1>
 <div class="grid">
 
   <div class="card">
@@ -383,6 +455,7 @@ INDEX_HTML = """
       <span></span>
     </div>
     <div class="muted" id="cmdmsg" style="margin-top:.5rem;font-size:.8rem;"></div>
+    <div class="muted" id="drivemsg" style="font-size:.8rem;"></div>
   </div>
 
   <div class="card">
@@ -407,13 +480,13 @@ INDEX_HTML = """
 
   <div class="card">
     <h2>OAK-D camera</h2>
-    <img id="cam" src="{{ url_for('camera') }}" alt="camera stream"
+    <img id="cam" src="{{ url_for('camera', domain=domain) }}" alt="camera stream"
          onerror="this.replaceWith(Object.assign(document.createElement('div'),{className:'muted',textContent:'geen camerabeeld'}))">
   </div>
 
   <div class="card">
     <h2>OAK-D diepte (3D)</h2>
-    <img id="depth" src="{{ url_for('depth') }}" alt="depth stream"
+    <img id="depth" src="{{ url_for('depth', domain=domain) }}" alt="depth stream"
          onerror="this.replaceWith(Object.assign(document.createElement('div'),{className:'muted',textContent:'geen dieptebeeld'}))">
     <div class="kv" style="margin-top:.5rem">
       <span>Afstand (midden)</span><span id="depthmid" class="muted">…</span>
@@ -423,15 +496,38 @@ INDEX_HTML = """
     </div>
   </div>
 
+  <div class="card">
+    <h2>Kaart</h2>
+    <div class="mapbar">
+      <select id="mapsel" onchange="selectMap(this.value)"></select>
+      <button onclick="zoomMap(-1)">−</button>
+      <button onclick="zoomMap(1)">+</button>
+      <span class="muted" id="mapmsg" style="font-size:.8rem;align-self:center"></span>
+    </div>
+    <div class="tilebox" id="mapbox"><div id="maptiles"></div></div>
+  </div>
+
+  <div class="card">
+    <h2>Costmap (nav2)</h2>
+    <div class="mapbar">
+      <select onchange="costmapLayer = this.value; costmapSeq = 0;">
+        <option value="global">global</option><option value="local">local</option>
+      </select>
+      <span class="muted" id="costmapmsg" style="font-size:.8rem;align-self:center"></span>
+    </div>
+    <div class="tilebox"><div id="costmaptiles"></div></div>
+  </div>
+
 </div>
 
 <script>
+const PREFIX = "{{ prefix }}";
 function pill(text, alert){return `<span class="pill ${alert?'alert':'ok'}">${text}</span>`;}
 
 async function send(action){
   const el = document.getElementById('cmdmsg');
   try{
-    const j = await (await fetch("/cmd/" + action, {method:"POST"})).json();
+    const j = await (await fetch(PREFIX + "/cmd/" + action, {method:"POST"})).json();
     el.textContent = (j.ok ? "→ " : "⚠ ") + j.msg;
   }catch(e){ el.textContent = "⚠ commando mislukt"; }
 }
@@ -444,7 +540,7 @@ document.addEventListener('keydown', (e) => {
 
 async function refresh(){
   try{
-    const j = await (await fetch("{{ url_for('data') }}")).json();
+    const j = await (await fetch("{{ url_for('data', domain=domain) }}")).json();
     document.getElementById('conn').textContent = "• verbonden";
 
     // Hazards / bumpers
@@ -488,6 +584,12 @@ async function refresh(){
     }
     st.innerHTML = html || '<span class="muted">geen data</span>';
 
+    // Who drives (/cmd_vel mux)
+    if(j.drive){
+      document.getElementById('drivemsg').textContent = j.drive.active
+        ? `/cmd_vel: ${j.drive.active}` : (j.drive.idle ? "/cmd_vel: stil" : "/cmd_vel: stoppen…");
+    }
+
     // OAK-D depth centre distance
     const dm = document.getElementById('depthmid');
     if(dm){
@@ -507,7 +609,7 @@ async function refresh(){
 // LIDAR polar plot
 async function drawLidar(){
   try{
-    const s = await (await fetch("{{ url_for('lidar') }}")).json();
+    const s = await (await fetch("{{ url_for('lidar', domain=domain) }}")).json();
     const c = document.getElementById('lidar'), ctx = c.getContext('2d');
     const W = c.width, H = c.height, cx = W/2, cy = H/2;
     ctx.clearRect(0,0,W,H);
@@ -530,6 +632,87 @@ async function drawLidar(){
   }catch(e){}
 }
 
+// Saved map: only the tiles that scroll into view are loaded (loading=lazy).
+let mapInfo = null, mapZoom = 0;
+
+async function loadMaps(){
+  const sel = document.getElementById('mapsel');
+  try{
+    const names = await (await fetch("{{ url_for('maps') }}")).json();
+    sel.innerHTML = names.map(n => `<option>${n}</option>`).join("");
+    if(names.length){ selectMap(names[0]); }
+    else { document.getElementById('mapmsg').textContent = "geen kaarten gevonden"; }
+  }catch(e){ document.getElementById('mapmsg').textContent = "kaarten niet beschikbaar"; }
+}
+
+async function selectMap(name){
+  mapInfo = await (await fetch(`/map/${name}/info.json`)).json();
+  // start at the level where the map is about as wide as the box
+  const box = document.getElementById('mapbox').clientWidth;
+  mapZoom = mapInfo.levels.findIndex(l => l.width >= box);
+  if(mapZoom < 0) mapZoom = mapInfo.max_zoom;
+  drawMap();
+}
+
+function zoomMap(d){
+  if(!mapInfo) return;
+  mapZoom = Math.max(0, Math.min(mapInfo.max_zoom, mapZoom + d));
+  drawMap();
+}
+
+function drawMap(){
+  const lvl = mapInfo.levels[mapZoom], t = mapInfo.tile_size;
+  const el = document.getElementById('maptiles');
+  el.style.width = lvl.width + "px"; el.style.height = lvl.height + "px";
+  let html = "";
+  for(let y=0;y<lvl.tiles_y;y++){
+    for(let x=0;x<lvl.tiles_x;x++){
+      html += `<img loading="lazy" style="left:${x*t}px;top:${y*t}px" alt=""
+               src="/map/${mapInfo.name}/${mapZoom}/${x}/${y}.png?v=${mapInfo.version}">`;
+    }
+  }
+  el.innerHTML = html;
+  const m = (mapInfo.resolution * 2 ** (mapInfo.max_zoom - mapZoom) * 100).toFixed(0);
+  document.getElementById('mapmsg').textContent = `zoom ${mapZoom}/${mapInfo.max_zoom} · ${m} cm/px`;
+}
+
+// Costmap: ask which tiles changed since the last seen sequence number and
+// reload only those images.
+let costmapLayer = "global", costmapSeq = 0;
+
+async function pollCostmap(){
+  const msg = document.getElementById('costmapmsg');
+  try{
+    const r = await fetch(`${PREFIX}/costmap/${costmapLayer}/changes.json?since=${costmapSeq}`);
+    const j = await r.json();
+    if(!j.ready){
+      msg.textContent = r.status === 404 ? "niet beschikbaar" : "geen costmap (draait nav2?)";
+      return;
+    }
+    const url = (x, y) => `${PREFIX}/costmap/${costmapLayer}/${x}/${y}.png?v=${j.seq}`;
+    const el = document.getElementById('costmaptiles');
+    if(j.reset){
+      const t = j.info.tile_size, nx = Math.ceil(j.info.width / t), ny = Math.ceil(j.info.height / t);
+      el.style.width = j.info.width + "px"; el.style.height = j.info.height + "px";
+      let html = "";
+      for(let y=0;y<ny;y++) for(let x=0;x<nx;x++){
+        html += `<img id="cm_${x}_${y}" style="left:${x*t}px;top:${y*t}px" alt="" src="${url(x, y)}">`;
+      }
+      el.innerHTML = html;
+    } else {
+      for(const [x, y] of j.tiles){
+        const img = document.getElementById(`cm_${x}_${y}`);
+        if(img) img.src = url(x, y);
+      }
+    }
+    costmapSeq = j.seq;
+    const c = j.counters;
+    msg.textContent = `${c.updates} updates · ${c.tiles_encoded} tegels gecodeerd (${c.encode_ms.toFixed(0)} ms)`;
+  }catch(e){}
+}
+
+loadMaps();
+pollCostmap(); setInterval(pollCostmap, 500);
 refresh(); setInterval(refresh, 500);
 drawLidar(); setInterval(drawLidar, 300);
 </script>
@@ -537,62 +720,259 @@ drawLidar(); setInterval(drawLidar, 300);
 """
 
 
+# Every robot page is served twice: without prefix for the first robot (the
+# old single-robot URLs) and under /robot/<domain>/ for every robot.
+def robot_route(rule, **options):
+    def decorator(view):
+        app.route(rule, defaults={"domain": None}, **options)(view)
+        return app.route("/robot/<int:domain>" + rule, **options)(view)
+    return decorator
+
+
 @app.route("/")
 def index():
-    return render_template_string(INDEX_HTML)
+    if len(DOMAINS) > 1:
+        return render_template_string(FLEET_HTML)
+    return robot_index(None)
+
+
+@app.route("/robot/<int:domain>/")
+def robot_index(domain):
+    if domain is not None and domain not in DOMAINS:
+        abort(404)
+    return render_template_string(
+        INDEX_HTML,
+        domain=domain,
+        domain_id=DOMAINS[0] if domain is None else domain,
+        prefix="" if domain is None else f"/robot/{domain}",
+        fleet=len(DOMAINS) > 1,
+    )
 
 
-@app.route("/data")
-def data():
+@robot_route("/data")
+def data(domain):
+    hub = get_hub(domain)
     if hub is None:
         return jsonify({"have_create_msgs": False, "hazards": [], "ir": {}}), 503
     return jsonify(hub.snapshot())
 
 
-@app.route("/lidar.json")
-def lidar():
+@robot_route("/lidar.json")
+def lidar(domain):
+    hub = get_hub(domain)
     if hub is None:
         return jsonify(None), 503
     return jsonify(hub.scan_snapshot())
 
 
-@app.route("/cmd/<action>", methods=["POST"])
-def cmd(action):
+@robot_route("/cmd/<action>", methods=["POST"])
+def cmd(action, domain):
+    hub = get_hub(domain)
     if hub is None:
         return jsonify({"ok": False, "msg": "ROS not ready"}), 503
     ok, msg = hub.command(action)
     return jsonify({"ok": ok, "msg": msg}), (200 if ok else 400)
 
 
+@robot_route("/costmap/<layer>/changes.json")
+def costmap_changes(layer, domain):
+    hub = get_hub(domain)
+    tiles = hub.costmaps.get(layer) if hub else None
+    if tiles is None:
+        return jsonify({"seq": 0, "ready": False}), 404
+    return jsonify(tiles.changed_since(request.args.get("since", 0, type=int)))
+
+
+@robot_route("/costmap/<layer>/<int:tx>/<int:ty>.png")
+def costmap_tile(layer, tx, ty, domain):
+    hub = get_hub(domain)
+    tiles = hub.costmaps.get(layer) if hub else None
+    png = tiles.tile(tx, ty) if tiles else None
+    if png is None:
+        abort(404)
+    resp = Response(png, mimetype="image/png")
+    # the page adds ?v=<seq of the change>, so a cached tile is never stale
+    resp.headers["Cache-Control"] = "public, max-age=3600"
+    return resp
+
+
 def mjpeg_generator(getter):
     """Yield frames from `getter` (a callable returning JPEG bytes) as MJPEG."""
-    import time
-
     boundary = b"--frame\r\nContent-Type: image/jpeg\r\n\r\n"
     while True:
-        frame = getter() if hub else None
+        frame = getter()
         if frame:
             yield boundary + frame + b"\r\n"
         time.sleep(0.05)  # ~20 fps cap
 
 
-@app.route("/camera")
-def camera():
-    return Response(
-        mjpeg_generator(lambda: hub.latest_jpeg() if hub else None),
-        mimetype="multipart/x-mixed-replace; boundary=frame",
-    )
+@robot_route("/camera")
+def camera(domain):
+    def frame():
+        hub = get_hub(domain)
+        return hub.latest_jpeg() if hub else None
 
+    return Response(mjpeg_generator(frame), mimetype="multipart/x-mixed-replace; boundary=frame")
 
-@app.route("/depth")
-def depth():
-    return Response(
-        mjpeg_generator(lambda: hub.latest_depth_jpeg() if hub else None),
-        mimetype="multipart/x-mixed-replace; boundary=frame",
-    )
+
+@robot_route("/depth")
+def depth(domain):
+    def frame():
+        hub = get_hub(domain)
+        return hub.latest_depth_jpeg() if hub else None
+
+    return Response(mjpeg_generator(frame), mimetype="multipart/x-mixed-replace; boundary=frame")
+
+
+# --------------------------------------------------------------------------
+# Fleet overview
+# --------------------------------------------------------------------------
+FLEET_HTML = """
+<!doctype html><html><head><meta charset="utf-8">
+<title>TurtleBot 4 fleet</title>
+<style>
+  body{font-family:sans-serif;margin:1.5rem;background:#0f1720;color:#e6edf3;}
+  h1{margin:0 0 1rem;font-size:1.4rem;}
+  table{border-collapse:collapse;width:100%;background:#161f2b;border-radius:12px;}
+  th,td{padding:.5rem .8rem;border-bottom:1px solid #22303f;text-align:left;}
+  th{color:#7ee787;font-weight:normal;}
+  a{color:#7ee787;}
+  .muted{color:#8b98a5;}
+  .alert{color:#ff9a9a;}
+</style></head><body>
+<h1>🐢 TurtleBot 4 &mdash; vloot <span class="muted" id="proc"></span></h1>
+<table>
+  <thead><tr><th>Domein</th><th>Batterij</th><th>Dock</th><th>Hazards</th>
+    <th>LIDAR</th><th>Camera</th><th></th></tr></thead>
+  <tbody id="robots"></tbody>
+</table>
+<script>
+async function refresh(){
+  try{
+    const j = await (await fetch("{{ url_for('fleet_data') }}")).json();
+    document.getElementById('proc').textContent =
+      `· ${j.process.rss_mb.toFixed(0)} MB · CPU ${j.process.cpu_percent.toFixed(1)}%`;
+    document.getElementById('robots').innerHTML = j.robots.map(r => {
+      if(!r.ready) return `<tr><td>${r.domain_id}</td><td colspan="5" class="muted">ROS start…</td><td></td></tr>`;
+      const hz = r.hazards.length ? `<span class="alert">${r.hazards.map(h => h.type).join(", ")}</span>` : "clear";
+      return `<tr><td>${r.domain_id}</td>
+        <td>${r.battery ? r.battery.percentage + "%" : '<span class="muted">—</span>'}</td>
+        <td>${r.docked === null ? '<span class="muted">—</span>' : (r.docked ? "gedockt" : "los")}</td>
+        <td>${hz}</td><td>${r.have_scan ? "✔" : "—"}</td><td>${r.have_camera ? "✔" : "—"}</td>
+        <td><a href="/robot/${r.domain_id}/">open</a></td></tr>`;
+    }).join("");
+  }catch(e){
+    document.getElementById('proc').textContent = "· geen verbinding";
+  }
+}
+refresh(); setInterval(refresh, 1000);
+</script>
+</body></html>
+"""
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+_cpu_sample = [time.monotonic(), cpu_seconds()]
+
+
+def process_usage():
+    """RSS of this process and its CPU use since the previous call."""
+    cpu = cpu_seconds()
+    now = time.monotonic()
+    last_time, last_cpu = _cpu_sample
+    _cpu_sample[:] = [now, cpu]
+    rss_kb = 0
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+    return {
+        "rss_mb": rss_kb / 1024.0,
+        "cpu_percent": 100.0 * (cpu - last_cpu) / max(now - last_time, 1e-3),
+        "cpu_s": cpu,
+        "threads": threading.active_count(),
+    }
+
+
+@app.route("/fleet")
+def fleet():
+    return render_template_string(FLEET_HTML)
+
+
+@app.route("/fleet.json")
+def fleet_data():
+    robots = []
+    for domain in DOMAINS:
+        hub = hubs.get(domain)
+        if hub is None:
+            robots.append({"domain_id": domain, "ready": False})
+            continue
+        snap = hub.snapshot()
+        snap.update(ready=True, have_scan=hub.scan_snapshot() is not None)
+        robots.append(snap)
+    return jsonify({"robots": robots, "process": process_usage()})
+
+
+# --------------------------------------------------------------------------
+# Saved maps as tiles
+# --------------------------------------------------------------------------
+_maps = {}
+_maps_lock = threading.Lock()
+
+
+def map_paths():
+    return {os.path.splitext(os.path.basename(p))[0]: p for p in sorted(glob.glob(MAP_GLOB))}
+
+
+def get_map(name):
+    """MapPyramid for a saved map; (re)built on first use or after a new save."""
+    path = map_paths().get(name)
+    if path is None:
+        return None
+    with _maps_lock:
+        pyramid = _maps.get(name)
+        if pyramid is None or not pyramid.is_current():
+            pyramid = _maps[name] = MapPyramid(path)
+        return pyramid
+
+
+@app.route("/maps.json")
+def maps():
+    return jsonify(sorted(map_paths()) if HAVE_MAPS else [])
+
+
+@app.route("/map/<name>/info.json")
+def map_info(name):
+    pyramid = get_map(name) if HAVE_MAPS else None
+    if pyramid is None:
+        abort(404)
+    return jsonify(pyramid.info())
+
+
+@app.route("/map/<name>/<int:z>/<int:x>/<int:y>.png")
+def map_tile(name, z, x, y):
+    pyramid = get_map(name) if HAVE_MAPS else None
+    png = pyramid.tile(z, x, y) if pyramid else None
+    if png is None:
+        abort(404)
+    resp = Response(png, mimetype="image/png")
+    # the page asks for tiles with ?v=<version>, so they never go stale
+    resp.headers["Cache-Control"] = "public, max-age=86400"
+    return resp
 
 
 if __name__ == "__main__":
-    threading.Thread(target=ros_thread, daemon=True).start()
+    parser = argparse.ArgumentParser(description="Live sensor dashboard for one or more TurtleBot 4s.")
+    parser.add_argument("--domains", type=parse_domains, default=[4],
+                        help="ROS domain id(s) of the robots, e.g. 4 or 1-4,7 (default 4)")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    DOMAINS[:] = args.domains
+    for domain in DOMAINS:
+        threading.Thread(target=ros_thread, args=(domain,), daemon=True).start()
     # threaded=True so the MJPEG stream doesn't block the JSON endpoints.
-    app.run(host="0.0.0.0", port=5000, threaded=True, debug=False)
+    app.run(host="0.0.0.0", port=args.port, threaded=True, debug=False)
@@ -1,55 +1,345 @@
 #!/usr/bin/env python3
-"""Quick 'is it alive?' test for the TurtleBot 4.
+"""Quick 'is it alive?' test for the TurtleBot 4 (or a whole fleet of them).
 
-Run this on the Raspberry Pi of the TurtleBot 4. It forces
-ROS_DOMAIN_ID=4, starts a ROS 2 node and checks that the robot's
-ROS graph is reachable by discovering the other nodes and topics.
+Run this on the Raspberry Pi of the TurtleBot 4, or on any machine in the
+same network. It starts a ROS 2 node and checks that the robot's ROS graph
+is reachable by discovering the other nodes and topics.
+
+Without options it checks ROS_DOMAIN_ID=4 and lists everything it finds.
+With --domains it checks many robots at the same time: every domain gets its
+own rclpy context (and DDS participant) in this one process, all of them
+discover in parallel, and a domain is done as soon as the expected nodes /
+topics are there. The result is one table.
+
+Finding the topics does not mean data is flowing: with --probe every
+discovered topic (or only those matching the given patterns) is subscribed
+to for --probe-time seconds. The subscriptions are raw: messages are never
+deserialized, so no per-type code is needed and it stays cheap for camera
+topics. Each topic's rate, bandwidth and time since the last message are
+reported; topics that stayed silent, are below their --min-rate or sent
+nothing for STALL_PERIODS periods of it are flagged, as are --min-rate
+topics that were never discovered, and the robot counts as STALLED.
 
 Usage:
     python3 testalive.py
+    python3 testalive.py --domains 1-12
+    python3 testalive.py --domains 1,2,5-8 --expect-topics /scan /battery_state
+    python3 testalive.py --probe '/scan' '/oakd/*' --min-rate /scan=5 '/oakd/*=10'
 """
 
-import os
-
-# Make sure we are on the right ROS domain before rclpy reads the env.
-os.environ["ROS_DOMAIN_ID"] = "4"
+import argparse
+import fnmatch
+import time
+from collections import deque
 
 import rclpy
+from rclpy.context import Context
+from rclpy.executors import SingleThreadedExecutor
 from rclpy.node import Node
+from rclpy.qos import QoSProfile, ReliabilityPolicy
+from rosidl_runtime_py.utilities import get_message
 
+DEFAULT_DOMAIN = 4
+NODE_NAME = "testalive"
+# without explicit expectations, wait this long after the first other node
+# appeared so the rest of the graph can come in as well
+SETTLE_SEC = 0.5
+# never probed unless asked for explicitly: they only carry sporadic events
+PROBE_EXCLUDE = ["/rosout", "/parameter_events"]
+# a --min-rate topic is stalled after this many of its periods without data;
+# a single period would flag a topic at exactly its minimum rate on jitter
+STALL_PERIODS = 3.0
 
-def main():
-    rclpy.init()
-    node = Node("testalive")
 
-    print(f"[testalive] ROS_DOMAIN_ID = {os.environ.get('ROS_DOMAIN_ID')}")
-    print("[testalive] Discovering the ROS 2 graph (waiting a few seconds)...")
+def parse_domains(text):
+    """'1-3,7' -> [1, 2, 3, 7]"""
+    domains = []
+    for part in text.split(","):
+        part = part.strip()
+        if "-" in part:
+            first, last = part.split("-", 1)
+            domains.extend(range(int(first), int(last) + 1))
+        elif part:
+            domains.append(int(part))
+    for d in domains:
+        if not 0 <= d <= 232:
+            raise argparse.ArgumentTypeError(f"invalid ROS domain id: {d}")
+    return sorted(set(domains))
+
+
+def parse_min_rate(text):
+    """'/scan=5' -> ('/scan', 5.0)"""
+    pattern, sep, rate = text.rpartition("=")
+    if not sep or not pattern:
+        raise argparse.ArgumentTypeError(f"expected TOPIC=HZ, got '{text}'")
+    return pattern, float(rate)
+
+
+class TopicWindow:
+    """Arrival time and size of the last messages of one topic."""
+
+    def __init__(self, min_rate=None, size=500):
+        self.min_rate = min_rate
+        self.messages = deque(maxlen=size)
+        self.count = 0
+        self.error = None   # set when we could not subscribe
+
+    def add(self, data):
+        self.messages.append((time.monotonic(), len(data)))
+        self.count += 1
+
+    def stats(self, now):
+        """(rate Hz, bandwidth B/s, seconds since the last message); None if unknown."""
+        if not self.messages:
+            return None, None, None
+        since = now - self.messages[-1][0]
+        if len(self.messages) < 2:
+            return None, None, since
+        span = self.messages[-1][0] - self.messages[0][0]
+        if span <= 0:
+            return None, None, since
+        rate = (len(self.messages) - 1) / span
+        bandwidth = sum(size for _, size in list(self.messages)[1:]) / span
+        return rate, bandwidth, since
+
+    def problem(self, now):
+        if self.error:
+            return self.error
+        rate, _, since = self.stats(now)
+        if not self.count:
+            return "silent"
+        if self.min_rate and since > STALL_PERIODS / self.min_rate:
+            # the rate over the window hides a topic that stopped halfway
+            return f"stalled for {since:.1f} s"
+        if self.min_rate and (rate is None or rate < self.min_rate):
+            return f"below {self.min_rate:g} Hz"
+        return None
+
+
+class DomainCheck:
+    """A node in its own context on one ROS domain, watching the graph."""
+
+    def __init__(self, domain_id, expect_nodes, expect_topics):
+        self.domain_id = domain_id
+        self.expect_nodes = set(expect_nodes)
+        self.expect_topics = set(expect_topics)
+        self.context = Context()
+        rclpy.init(context=self.context, domain_id=domain_id)
+        self.node = Node(NODE_NAME, context=self.context)
+        self.started = time.monotonic()
+        self.first_seen = None   # when the first other node showed up
+        self.done_after = None   # seconds until the check was complete
+        self.nodes = []
+        self.topics = []
+        self.executor = None
+        self.windows = {}        # topic -> TopicWindow while probing
+
+    def poll(self):
+        """Refresh the graph; returns True once the check is complete."""
+        if self.done_after is not None:
+            return True
+        # the graph is discovered by the DDS threads, no spinning needed
+        self.nodes = sorted(n for n in self.node.get_node_names() if n != NODE_NAME)
+        self.topics = sorted(self.node.get_topic_names_and_types())
+        now = time.monotonic()
+        if self.nodes and self.first_seen is None:
+            self.first_seen = now
+        if self.expect_nodes or self.expect_topics:
+            complete = not self.missing()
+        else:
+            complete = self.first_seen is not None and now - self.first_seen >= SETTLE_SEC
+        if complete:
+            self.done_after = now - self.started
+        return complete
+
+    def missing(self):
+        names = {f"/{n}" for n in self.nodes} | set(self.nodes)
+        topics = {t for t, _ in self.topics}
+        return sorted((self.expect_nodes - names) | (self.expect_topics - topics))
+
+    # ---- data probe ---------------------------------------------------------
+    def start_probe(self, patterns, min_rates):
+        """Raw-subscribe to every discovered topic matching `patterns`."""
+        self.executor = SingleThreadedExecutor(context=self.context)
+        self.executor.add_node(self.node)
+        # best effort receives from reliable and best-effort publishers alike
+        qos = QoSProfile(depth=10, reliability=ReliabilityPolicy.BEST_EFFORT)
+        for name, types in self.topics:
+            min_rate = next((r for p, r in min_rates if fnmatch.fnmatch(name, p)), None)
+            if patterns:
+                if not any(fnmatch.fnmatch(name, p) for p in patterns):
+                    continue
+            elif name in PROBE_EXCLUDE and min_rate is None:
+                continue
+            window = self.windows[name] = TopicWindow(min_rate)
+            try:
+                # the type is only needed for the type support, nothing is deserialized
+                self.node.create_subscription(
+                    get_message(types[0]), name, window.add, qos, raw=True
+                )
+            except (AttributeError, ModuleNotFoundError, ValueError) as e:
+                window.error = f"type {types[0]} not available here ({e.__class__.__name__})"
+        # a topic with an expected rate that is not in the graph at all
+        names = [name for name, _ in self.topics]
+        for pattern, rate in min_rates:
+            if not any(fnmatch.fnmatch(name, pattern) for name in names):
+                self.windows[pattern] = TopicWindow(rate)
+                self.windows[pattern].error = "never discovered"
+
+    def spin_once(self):
+        self.executor.spin_once(timeout_sec=0.0)
 
-    # Spin briefly so discovery has time to find the other nodes.
-    end = node.get_clock().now().nanoseconds + 5 * 1_000_000_000
-    while rclpy.ok() and node.get_clock().now().nanoseconds < end:
-        rclpy.spin_once(node, timeout_sec=0.5)
+    def problems(self, now):
+        return {t: p for t, w in self.windows.items() if (p := w.problem(now))}
 
-    # A node named "testalive" is always present, so filter it out.
-    nodes = [n for n in node.get_node_names() if n != "testalive"]
-    topics = node.get_topic_names_and_types()
+    @property
+    def alive(self):
+        return bool(self.nodes) and not self.missing()
 
-    print(f"[testalive] Found {len(nodes)} other node(s):")
-    for n in sorted(nodes):
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.node.destroy_node()
+        rclpy.shutdown(context=self.context)
+
+
+def run_checks(domains, expect_nodes, expect_topics, timeout):
+    checks = [DomainCheck(d, expect_nodes, expect_topics) for d in domains]
+    try:
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            if all([c.poll() for c in checks]):
+                break
+            time.sleep(0.1)
+    except BaseException:
+        for c in checks:
+            c.close()
+        raise
+    return checks
+
+
+def run_probe(checks, patterns, min_rates, duration):
+    for c in checks:
+        if c.nodes:
+            c.start_probe(patterns, min_rates)
+    probing = [c for c in checks if c.executor is not None]
+    end = time.monotonic() + duration
+    while probing and time.monotonic() < end:
+        for c in probing:
+            c.spin_once()
+        time.sleep(0.001)
+
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024.0
+    return f"{n:.1f} GB"
+
+
+def print_probe(check, only_problems=False):
+    now = time.monotonic()
+    rows = sorted(check.windows.items())
+    if only_problems:
+        problems = check.problems(now)
+        rows = [(t, w) for t, w in rows if t in problems]
+    if not rows:
+        return
+    print(f"    {'topic':<40} {'rate Hz':>8} {'bandwidth/s':>12} {'last msg':>9}  status")
+    for topic, w in rows:
+        rate, bandwidth, since = w.stats(now)
+        print(f"    {topic:<40} {f'{rate:.1f}' if rate else '-':>8} "
+              f"{format_bytes(bandwidth) if bandwidth else '-':>12} "
+              f"{f'{since:.1f} s' if since is not None else 'never':>9}  "
+              f"{w.problem(now) or 'ok'}")
+
+
+def print_single(check):
+    print(f"[testalive] Found {len(check.nodes)} other node(s):")
+    for n in check.nodes:
         print(f"    - {n}")
 
-    print(f"[testalive] Found {len(topics)} topic(s):")
-    for name, types in sorted(topics):
+    print(f"[testalive] Found {len(check.topics)} topic(s):")
+    for name, types in check.topics:
         print(f"    - {name} {types}")
 
-    if nodes:
+    if check.windows:
+        print(f"[testalive] Data on {len(check.windows)} topic(s):")
+        print_probe(check)
+
+    problems = check.problems(time.monotonic())
+    if check.alive and problems:
+        print(f"[testalive] TurtleBot 4 is STALLED: {len(problems)} topic(s) without "
+              "(enough) data. ✗")
+    elif check.alive:
         print("[testalive] TurtleBot 4 is ALIVE. ✓")
+    elif check.nodes:
+        print(f"[testalive] Robot found but missing: {', '.join(check.missing())}")
     else:
         print("[testalive] No other nodes found - is the robot running / "
-              "on ROS_DOMAIN_ID 4?")
+              f"on ROS_DOMAIN_ID {check.domain_id}?")
+
+
+def print_table(checks):
+    print(f"{'domain':>6}  {'status':<7} {'nodes':>5} {'topics':>6} {'time s':>6}  missing")
+    now = time.monotonic()
+    for c in checks:
+        status = "ALIVE" if c.alive else ("PARTIAL" if c.nodes else "DOWN")
+        if c.alive and c.problems(now):
+            status = "STALLED"
+        took = f"{c.done_after:.1f}" if c.done_after is not None else "-"
+        print(f"{c.domain_id:>6}  {status:<7} {len(c.nodes):>5} {len(c.topics):>6} {took:>6}  "
+              f"{', '.join(c.missing()) if c.nodes else ''}")
+    for c in checks:
+        if c.problems(now):
+            print(f"[testalive] domain {c.domain_id}: topics without (enough) data:")
+            print_probe(c, only_problems=True)
+    alive = sum(c.alive and not c.problems(now) for c in checks)
+    print(f"[testalive] {alive}/{len(checks)} robot(s) alive.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that TurtleBot 4 robots are reachable.")
+    parser.add_argument("--domains", type=parse_domains,
+                        help=f"domain ids to check, e.g. 1-12 or 1,3,5 (default {DEFAULT_DOMAIN})")
+    parser.add_argument("--expect-nodes", nargs="*", default=[],
+                        help="node names that must be present")
+    parser.add_argument("--expect-topics", nargs="*", default=[],
+                        help="topics that must be present, e.g. /scan")
+    parser.add_argument("--timeout", type=float, default=5.0,
+                        help="seconds to wait for a domain at most")
+    parser.add_argument("--probe", nargs="*", metavar="PATTERN",
+                        help="measure the data on all topics, or on those matching the patterns")
+    parser.add_argument("--probe-time", type=float, default=3.0,
+                        help="seconds to measure the topic data")
+    parser.add_argument("--min-rate", nargs="*", type=parse_min_rate, default=[],
+                        metavar="TOPIC=HZ", help="expected minimum rate, e.g. /scan=5 '/oakd/*=10'")
+    args = parser.parse_args()
+
+    domains = args.domains or [DEFAULT_DOMAIN]
+    if len(domains) == 1:
+        print(f"[testalive] ROS_DOMAIN_ID = {domains[0]}")
+        print("[testalive] Discovering the ROS 2 graph (waiting a few seconds)...")
+    else:
+        print(f"[testalive] Checking {len(domains)} domains in parallel...")
 
-    node.destroy_node()
-    rclpy.shutdown()
+    checks = run_checks(domains, args.expect_nodes, args.expect_topics, args.timeout)
+    try:
+        if args.probe is not None or args.min_rate:
+            print(f"[testalive] Measuring topic data for {args.probe_time:g} s...")
+            # topics with an expected rate are always probed
+            patterns = list(args.probe or [])
+            if patterns or args.probe is None:
+                patterns += [p for p, _ in args.min_rate]
+            run_probe(checks, patterns, args.min_rate, args.probe_time)
+        if len(checks) == 1:
+            print_single(checks[0])
+        else:
+            print_table(checks)
+    finally:
+        for c in checks:
+            c.close()
 
 
 if __name__ == "__main__":